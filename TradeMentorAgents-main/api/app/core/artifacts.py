@@ -0,0 +1,21 @@
+from functools import lru_cache
+from typing import Optional
+
+from debate.sinks import AsyncArtifactWriter, DirectorySink, SQLiteSink
+
+from .config import get_settings
+
+
+@lru_cache()
+def get_artifact_writer() -> Optional[AsyncArtifactWriter]:
+    """按配置创建进程内共享的任务输出写入器，未启用时返回 None"""
+    settings = get_settings()
+    if not settings.ARTIFACT_SINK:
+        return None
+    if settings.ARTIFACT_SINK == "dir":
+        sink = DirectorySink(settings.ARTIFACT_PATH)
+    elif settings.ARTIFACT_SINK == "sqlite":
+        sink = SQLiteSink(settings.ARTIFACT_PATH)
+    else:
+        raise ValueError(f"不支持的输出持久化类型: {settings.ARTIFACT_SINK}")
+    return AsyncArtifactWriter(sink)
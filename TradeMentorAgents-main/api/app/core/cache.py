@@ -0,0 +1,27 @@
+from functools import lru_cache
+from typing import Optional
+
+from debate.cache import ResponseCache, MemoryCache, SQLiteCache
+
+from .config import get_settings
+
+
+@lru_cache()
+def get_response_cache() -> Optional[ResponseCache]:
+    """按配置创建进程内共享的 LLM 响应缓存，未启用时返回 None"""
+    settings = get_settings()
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+
+    disk = None
+    if settings.RESPONSE_CACHE_PATH:
+        disk = SQLiteCache(
+            settings.RESPONSE_CACHE_PATH,
+            ttl=settings.RESPONSE_CACHE_TTL,
+            max_entries=settings.RESPONSE_CACHE_DISK_MAX_ENTRIES
+        )
+
+    return ResponseCache(
+        memory=MemoryCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES, ttl=settings.RESPONSE_CACHE_TTL),
+        disk=disk
+    )
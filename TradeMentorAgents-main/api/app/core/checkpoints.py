@@ -0,0 +1,33 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+from debate.checkpoint import aclose_checkpointer, make_async_checkpointer, make_checkpointer
+
+from .config import get_settings
+
+
+@lru_cache()
+def get_checkpointer() -> Optional[Any]:
+    """按 DEBATE_CHECKPOINT_PATH 创建进程内共享的检查点存储，未配置时返回 None"""
+    path = get_settings().DEBATE_CHECKPOINT_PATH
+    return make_checkpointer(path) if path else None
+
+
+@lru_cache()
+def get_async_checkpointer() -> Optional[Any]:
+    """异步执行器使用的检查点存储，未配置时返回 None
+
+    第一次调用必须在运行 debate 的事件循环中进行（async 执行器只使用服务器的事件循环）。
+    """
+    path = get_settings().DEBATE_CHECKPOINT_PATH
+    return make_async_checkpointer(path) if path else None
+
+
+async def close_async_checkpointer() -> None:
+    """关闭异步检查点存储的连接，未创建过时不做任何事"""
+    if get_async_checkpointer.cache_info().currsize == 0:
+        return
+    checkpointer = get_async_checkpointer()
+    get_async_checkpointer.cache_clear()
+    if checkpointer is not None:
+        await aclose_checkpointer(checkpointer)
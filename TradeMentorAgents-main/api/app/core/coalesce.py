@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from debate.cache import hash_inputs
+from debate.policy import StoppingPolicy
+
+from .config import get_settings
+
+
+def flight_key(inputs: List[Dict[str, Any]], policy: StoppingPolicy, streaming: bool = False) -> str:
+    """相同输入数据和相同结束条件的 debate 结果相同，以此作为合并请求的键
+
+    非流式运行只发布最终的 result 事件，流式请求不能订阅它，因此两种运行使用不同的键。
+
+    Args:
+        inputs: 输入数据列表
+        policy: 辩论结束条件
+        streaming: 是否为发布 progress/token 事件的流式运行
+
+    Returns:
+        sha256 十六进制摘要
+    """
+    digest = hashlib.sha256(hash_inputs(inputs).encode("ascii"))
+    digest.update(repr(tuple(policy)).encode("ascii"))
+    if streaming:
+        digest.update(b"stream")
+    return digest.hexdigest()
+
+
+class Flight:
+    def __init__(self):
+        """一次正在运行的 debate，可被多个请求同时等待或订阅
+
+        所有方法都只能在事件循环线程中调用。事件会保留到 debate 结束，
+        中途加入的订阅者先收到之前的全部事件，再继续接收后续事件。
+        等待方/订阅者离开（如客户端断开）不影响这次运行：debate 总会运行到结束，
+        结束前到达的相同请求（包括客户端重试）仍可加入，结果也会写入缓存和结果存储。
+        """
+        self.events: List[Dict[str, Any]] = []
+        self.done = False
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.task: Optional["asyncio.Future[None]"] = None
+        # queue 模式下 debate 在任务队列中的 ID，可通过 GET /debate/jobs/{id} 查询
+        self.job_id: Optional[int] = None
+        self._waiter = asyncio.get_running_loop().create_future()
+
+    def _wake(self) -> None:
+        waiter, self._waiter = self._waiter, asyncio.get_running_loop().create_future()
+        waiter.set_result(None)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """发布一个事件给所有订阅者"""
+        self.events.append(event)
+        self._wake()
+
+    def set_job(self, job_id: int) -> None:
+        """记录 debate 在任务队列中的 ID，并以 job 事件发布给订阅者"""
+        self.job_id = job_id
+        self.publish({"type": "job", "job_id": job_id})
+
+    def finish(self, result: Optional[Dict[str, Any]] = None, error: Optional[BaseException] = None) -> None:
+        """结束运行；失败时向订阅者发布 error 事件"""
+        self.result = result
+        self.error = error
+        if error is not None:
+            self.events.append({"type": "error", "message": str(error) or type(error).__name__})
+        self.done = True
+        self._wake()
+
+    async def wait(self) -> Optional[Dict[str, Any]]:
+        """等待 debate 结束并返回最终状态
+
+        Raises:
+            运行 debate 时抛出的异常
+        """
+        while not self.done:
+            # shield：等待方被取消时不能取消共享的 _waiter
+            await asyncio.shield(self._waiter)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        """从头开始逐个产出事件，直到 debate 结束"""
+        index = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await asyncio.shield(self._waiter)
+
+
+class FlightRegistry:
+    def __init__(self, enabled: bool = True):
+        """按 flight_key 合并同时运行的相同 debate（single-flight）
+
+        Args:
+            enabled: 为 False 时每个请求都单独运行
+        """
+        self.enabled = enabled
+        self._flights: Dict[str, Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def join(self, key: str) -> Optional[Flight]:
+        """加入正在运行的相同 debate，没有时返回 None"""
+        flight = self._flights.get(key) if self.enabled else None
+        if flight is not None:
+            self.coalesced += 1
+        return flight
+
+    def start(self, key: str, runner: Callable[[Flight], Awaitable[Optional[Dict[str, Any]]]]) -> Flight:
+        """启动一个新的 debate 并登记，结束后自动注销
+
+        Args:
+            key: 合并键
+            runner: 接收 Flight 并运行 debate 的协程函数，可通过 flight.publish 发布中间事件，返回最终状态
+
+        Returns:
+            新的 Flight
+        """
+        flight = Flight()
+        if self.enabled:
+            self._flights[key] = flight
+        self.started += 1
+
+        async def run() -> None:
+            try:
+                result = await runner(flight)
+            except asyncio.CancelledError:
+                flight.finish(error=RuntimeError("debate 已取消"))
+            except Exception as e:
+                flight.finish(error=e)
+            else:
+                flight.finish(result=result)
+            finally:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+        flight.task = asyncio.ensure_future(run())
+        return flight
+
+    def join_or_start(
+        self,
+        key: str,
+        runner: Callable[[Flight], Awaitable[Optional[Dict[str, Any]]]],
+        also: Tuple[str, ...] = ()
+    ) -> Tuple[Flight, bool]:
+        """加入正在运行的相同 debate，没有时以 key 启动新的
+
+        Args:
+            key: 合并键
+            runner: 运行 debate 的协程函数
+            also: 同样可以加入的其他键（如非流式请求也可加入相同输入的流式运行）
+
+        Returns:
+            (Flight, 是否加入了已有的 debate)
+        """
+        for candidate in (*also, key):
+            flight = self.join(candidate)
+            if flight is not None:
+                return flight, True
+        return self.start(key, runner), False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+@lru_cache()
+def get_flights() -> FlightRegistry:
+    return FlightRegistry(enabled=get_settings().DEBATE_COALESCE)
@@ -7,7 +7,51 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Multi-Agents API"
     
     # 可以添加更多配置项，如数据库连接等
-    DATABASE_URL: Optional[str] = None
+    DATABASE_URL: Optional[str] = None  # debate 结果存储，目前支持 sqlite:///<path>，为空时不保存
+    
+    # debate 执行器配置
+    DEBATE_EXECUTOR: str = "thread"  # thread、process、async（协程 + 异步 HTTP 客户端）或 queue（写入任务队列，由 worker 进程执行）
+    DEBATE_MAX_WORKERS: int = 32  # 同时运行的 debate 数量
+    DEBATE_MAX_QUEUE: int = 64  # 等待执行的 debate 数量上限，超出后直接拒绝
+    DEBATE_RETRY_AFTER: int = 30  # 队列已满时建议客户端重试的秒数
+    DEBATE_MAX_ROUNDS: int = 4  # 请求未指定时的最大辩论回合数
+    DEBATE_MAX_ROUNDS_LIMIT: int = 10  # 请求可指定的最大辩论回合数上限
+    DEBATE_SELL_THRESHOLD: float = 1.0  # 交易决策分数 <= 该值时提前结束
+    DEBATE_BUY_THRESHOLD: float = 9.0  # 交易决策分数 >= 该值时提前结束
+    DEBATE_CONVERGENCE_DELTA: Optional[float] = None  # 相邻两轮分数之差小于该值时提前结束，为空时不检测收敛
+    DEBATE_PIPELINED: bool = False  # 下一轮看多分析与本轮交易决策并发执行
+    DEBATE_BATCH_CONCURRENCY: int = 8  # 所有批量请求合计同时运行的 debate 数量，按 LLM 后端并发能力设置
+    DEBATE_BATCH_MAX_JOBS: int = 1000  # 单个批量请求的最大任务数
+    DEBATE_COALESCE: bool = True  # 输入数据和结束条件相同的请求共用同一个正在运行的 debate
+    DEBATE_CONTEXT_REBUTTAL_TOKENS: int = 800  # 看多/看空任务中引用的对方分析的 token 预算，0 表示不压缩
+    DEBATE_CONTEXT_TRADER_TOKENS: int = 1600  # 交易决策任务中本轮两份分析合计的 token 预算，0 表示不压缩
+    DEBATE_CONTEXT_HISTORY_TOKENS: int = 400  # 交易决策任务中之前回合摘要的 token 预算，0 表示不提供摘要
+    DEBATE_CONTEXT_MEMORY_TOKENS: int = 300  # 看多/看空智能体回忆自己之前各轮观点的 token 预算，0 表示不使用记忆
+    DEBATE_CONTEXT_BRIEF_INPUTS: bool = False  # 第一轮之后的分析和交易决策使用简要输入（新闻正文截断），会丢失信息，默认关闭
+    DEBATE_MAX_TOKENS_IN_FLIGHT: int = 0  # 同时进行的 LLM 调用的估算 token 数（提示词 + 预留回复）上限，超出时按优先级和截止时间排队，0 表示不限制
+    DEBATE_COMPLETION_TOKENS: int = 512  # 每次 LLM 调用为回复预留的 token 数
+    DEBATE_CALL_TIMEOUT: float = 300  # 单次 LLM 调用的超时（秒），超时后换其他后端重试，仍然超时时返回已完成回合的结果，0 表示不限制
+    DEBATE_DEADLINE: Optional[float] = None  # 请求未指定 deadline 时的截止时间（收到请求后的秒数），到达时返回已完成回合的结果，为空时不限制
+    DEBATE_CHECKPOINT_PATH: Optional[str] = None  # 检查点 SQLite 文件，带 request_id 的 debate 失败后可从最后完成的回合继续，为空时不保存
+    
+    # 任务队列和 worker 进程配置（DEBATE_EXECUTOR=queue）
+    DEBATE_QUEUE_PATH: Optional[str] = None  # 任务队列 SQLite 文件，API 进程和 worker 进程共用
+    DEBATE_QUEUE_LEASE: float = 60  # worker 领取任务的租约（秒），worker 退出后超过该时间未续约的任务重新排队
+    DEBATE_QUEUE_MAX_ATTEMPTS: int = 3  # 每个任务最多执行的次数（worker 退出导致的重试）
+    DEBATE_QUEUE_RETENTION: int = 86400  # 已结束任务在队列中保留的秒数
+    DEBATE_WORKER_PROCESSES: int = 0  # worker 进程数，0 表示 CPU 核数
+    DEBATE_WORKER_THREADS: int = 8  # 每个 worker 进程同时运行的 debate 数量
+    
+    # LLM 响应缓存配置
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024  # 进程内 LRU 缓存条目数
+    RESPONSE_CACHE_PATH: Optional[str] = None  # SQLite 磁盘缓存文件，为空时不启用磁盘缓存
+    RESPONSE_CACHE_TTL: int = 86400  # 缓存有效期（秒）
+    RESPONSE_CACHE_DISK_MAX_ENTRIES: int = 100000
+    
+    # 每轮输出的持久化配置
+    ARTIFACT_SINK: Optional[str] = None  # dir 或 sqlite，为空时不保存每轮输出
+    ARTIFACT_PATH: str = "debate/output"  # dir 模式下为目录，sqlite 模式下为文件路径
     
     class Config:
         case_sensitive = True
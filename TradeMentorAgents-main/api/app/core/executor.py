@@ -0,0 +1,287 @@
+import asyncio
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Union
+
+from debate import metrics
+from debate.jobqueue import JobChannel, JobQueue
+from debate.scheduler import Schedule
+
+from .config import get_settings
+from .jobqueue import get_job_queue
+
+
+class QueueFullError(Exception):
+    """debate 执行队列已满，请求被拒绝"""
+
+
+def _timed_call(enqueued_at: float, kind: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """记录任务在执行器中的排队时间后运行任务
+
+    位于模块顶层以便在进程池模式下被 pickle；使用墙上时钟，跨进程也可比较。
+    """
+    metrics.QUEUE_WAIT_SECONDS.labels(executor=kind).observe(max(0.0, time.time() - enqueued_at))
+    return fn(*args)
+
+
+class LoopChannel:
+    def __init__(self):
+        """线程和 async 模式下的事件队列，必须在事件循环中创建
+
+        任务在任意线程中 put，事件通过 call_soon_threadsafe 交给事件循环，读取方 await aget 等待，不需要轮询。
+        """
+        self._loop = asyncio.get_running_loop()
+        self._events: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+
+    def put(self, event: Optional[Dict[str, Any]]) -> None:
+        self._loop.call_soon_threadsafe(self._events.put_nowait, event)
+
+    async def aget(self) -> Optional[Dict[str, Any]]:
+        """等待并读取下一个事件"""
+        return await self._events.get()
+
+    async def aclose(self) -> None:
+        """读取方不再读取时调用"""
+
+
+class ProcessChannel:
+    # 后台线程检查读取方是否已关闭通道的间隔（秒）
+    PUMP_TIMEOUT = 1.0
+
+    def __init__(self, events: "queue.Queue"):
+        """进程模式下的事件队列，必须在事件循环中创建
+
+        子进程中的任务向可跨进程传递的代理队列 put（pickle 时只传递代理队列）；
+        API 进程中由一个后台线程阻塞读取，再通过 LoopChannel 交给事件循环。
+
+        Args:
+            events: multiprocessing.Manager 创建的代理队列
+        """
+        self._queue = events
+        self._events = LoopChannel()
+        self._closed = threading.Event()
+        threading.Thread(target=self._pump, name="debate-channel", daemon=True).start()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"queue": self._queue}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._queue = state["queue"]
+
+    def _pump(self) -> None:
+        # 读到结束标记或读取方关闭通道后退出（任务异常退出时可能没有结束标记）
+        while not self._closed.is_set():
+            try:
+                event = self._queue.get(timeout=self.PUMP_TIMEOUT)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                # 执行器关闭时 Manager 进程已退出
+                return
+            self._events.put(event)
+            if event is None:
+                return
+
+    def put(self, event: Optional[Dict[str, Any]]) -> None:
+        self._queue.put(event)
+
+    async def aget(self) -> Optional[Dict[str, Any]]:
+        """等待并读取下一个事件"""
+        return await self._events.aget()
+
+    async def aclose(self) -> None:
+        """读取方不再读取时调用，停止后台线程"""
+        self._closed.set()
+
+
+class DebateExecutor:
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 32,
+        max_queue: int = 64,
+        batch_concurrency: int = 8,
+        job_queue: Optional[JobQueue] = None
+    ):
+        """初始化 debate 执行器
+
+        debate 在独立的线程池或进程池中执行，避免阻塞事件循环；
+        "async" 模式下 debate 以协程形式直接在事件循环中运行，LLM 调用不占用线程；
+        "queue" 模式下 debate 写入 SQLite 任务队列，由独立的 worker 进程（python -m app.worker）执行。
+        运行中和排队中的 debate 总数超过 max_workers + max_queue 时直接拒绝新请求。
+
+        Args:
+            kind: 执行器类型，"thread"、"process"、"async" 或 "queue"
+            max_workers: 同时运行的 debate 数量
+            max_queue: 等待执行的 debate 数量上限
+            batch_concurrency: 批量任务合计同时占用的执行名额
+            job_queue: "queue" 模式使用的任务队列
+        """
+        self._pool: Optional[Executor] = None
+        self._queue: Optional[JobQueue] = None
+        if kind == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="debate"
+            )
+        elif kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=max_workers)
+        elif kind == "queue":
+            if job_queue is None:
+                raise ValueError("queue 执行器需要任务队列，请配置 DEBATE_QUEUE_PATH")
+            self._queue = job_queue
+        elif kind != "async":
+            raise ValueError(f"不支持的执行器类型: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self._in_flight = 0
+        self._manager = None
+        self._batch_slots = asyncio.Semaphore(batch_concurrency)
+
+    @property
+    def in_flight(self) -> int:
+        """运行中和排队中的 debate 数量"""
+        return self._in_flight
+
+    def reserve(self) -> None:
+        """占用一个执行名额
+
+        Raises:
+            QueueFullError: 执行队列已满
+        """
+        if self._in_flight >= self.capacity:
+            metrics.REJECTED.labels(executor=self.kind).inc()
+            raise QueueFullError(f"debate 队列已满（{self._in_flight}/{self.capacity}），请稍后重试")
+        self._in_flight += 1
+        metrics.IN_FLIGHT.labels(executor=self.kind).inc()
+
+    def release(self) -> None:
+        """释放一个执行名额"""
+        self._in_flight -= 1
+        metrics.IN_FLIGHT.labels(executor=self.kind).dec()
+
+    async def run_reserved(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        on_job: Optional[Callable[[int], None]] = None
+    ) -> Any:
+        """在执行器中运行已占用名额的任务，任务真正结束后才释放名额
+
+        Args:
+            fn: 要执行的函数（进程和 queue 模式下必须可被 pickle，async 模式下为协程函数）
+            *args: 函数参数
+            on_job: queue 模式下任务写入队列后以任务 ID 调用，其他模式下不调用
+
+        Returns:
+            函数返回值
+        """
+        if self._queue is not None:
+            # 按参数中的调度参数决定任务在队列中的顺序
+            schedule = next((arg for arg in args if isinstance(arg, Schedule)), Schedule())
+            try:
+                return await self._queue.run(
+                    _timed_call, time.time(), self.kind, fn, *args,
+                    priority=schedule.priority, deadline=schedule.deadline, on_submit=on_job
+                )
+            finally:
+                self.release()
+
+        if self._pool is None:
+            try:
+                return await fn(*args)
+            finally:
+                self.release()
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._pool.submit(_timed_call, time.time(), self.kind, fn, *args)
+        except BaseException:
+            self.release()
+            raise
+        # 客户端断开时等待会被取消，但线程中的任务仍在运行，因此以任务完成作为释放时机
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self.release))
+        return await asyncio.wrap_future(future)
+
+    async def submit(self, fn: Callable[..., Any], *args: Any, on_job: Optional[Callable[[int], None]] = None) -> Any:
+        """占用名额并在执行器中运行任务
+
+        Args:
+            fn: 要执行的函数（进程模式下必须可被 pickle）
+            *args: 函数参数
+            on_job: queue 模式下任务写入队列后以任务 ID 调用
+
+        Returns:
+            函数返回值
+
+        Raises:
+            QueueFullError: 执行队列已满
+        """
+        self.reserve()
+        return await self.run_reserved(fn, *args, on_job=on_job)
+
+    async def submit_batched(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        on_job: Optional[Callable[[int], None]] = None
+    ) -> Any:
+        """以批量任务身份运行任务
+
+        批量任务先等待批量并发名额，再占用执行名额，避免一次批量请求占满整个执行队列。
+
+        Args:
+            fn: 要执行的函数（进程模式下必须可被 pickle）
+            *args: 函数参数
+            on_job: queue 模式下任务写入队列后以任务 ID 调用
+
+        Returns:
+            函数返回值
+
+        Raises:
+            QueueFullError: 执行队列已满
+        """
+        async with self._batch_slots:
+            return await self.submit(fn, *args, on_job=on_job)
+
+    def make_channel(self) -> Union[LoopChannel, ProcessChannel, JobChannel]:
+        """创建用于从执行器中的任务向事件循环传递事件的队列，必须在事件循环中调用
+
+        线程和 async 模式下直接交给事件循环；进程模式下经过可跨进程传递的代理队列；
+        queue 模式下使用保存在任务队列数据库中的事件通道。
+
+        Returns:
+            任务调用 put 写入事件，事件循环中 await aget 读取，不再读取时 await aclose
+        """
+        if self._queue is not None:
+            return self._queue.channel()
+        if self.kind == "process":
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return ProcessChannel(self._manager.Queue())
+        return LoopChannel()
+
+    def shutdown(self) -> None:
+        """关闭执行器"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+
+@lru_cache()
+def get_executor() -> DebateExecutor:
+    settings = get_settings()
+    return DebateExecutor(
+        kind=settings.DEBATE_EXECUTOR,
+        max_workers=settings.DEBATE_MAX_WORKERS,
+        max_queue=settings.DEBATE_MAX_QUEUE,
+        batch_concurrency=settings.DEBATE_BATCH_CONCURRENCY,
+        job_queue=get_job_queue() if settings.DEBATE_EXECUTOR == "queue" else None
+    )
@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+from debate.jobqueue import JobQueue
+
+from .config import get_settings
+
+
+@lru_cache()
+def get_job_queue() -> JobQueue:
+    """按 DEBATE_QUEUE_PATH 创建进程内共享的任务队列
+
+    Raises:
+        ValueError: 未配置 DEBATE_QUEUE_PATH
+    """
+    settings = get_settings()
+    if not settings.DEBATE_QUEUE_PATH:
+        raise ValueError("queue 执行器和 worker 进程需要配置 DEBATE_QUEUE_PATH")
+    return JobQueue(
+        settings.DEBATE_QUEUE_PATH,
+        lease=settings.DEBATE_QUEUE_LEASE,
+        max_attempts=settings.DEBATE_QUEUE_MAX_ATTEMPTS
+    )
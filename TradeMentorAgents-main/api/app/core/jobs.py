@@ -0,0 +1,325 @@
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from debate.context import ContextBudget
+from debate.policy import StoppingPolicy
+from debate.scheduler import Schedule
+from debate.state import round_dicts
+
+from .cache import get_response_cache
+from .artifacts import get_artifact_writer
+from .checkpoints import get_async_checkpointer, get_checkpointer
+from .config import get_settings
+from .scheduler import get_token_scheduler
+from .store import record_debate
+
+if TYPE_CHECKING:
+    from debate.graph import TradingWorkflow
+
+
+def make_policy(
+    max_rounds: Optional[int] = None,
+    sell_threshold: Optional[float] = None,
+    buy_threshold: Optional[float] = None,
+    convergence_delta: Optional[float] = None
+) -> StoppingPolicy:
+    """根据请求参数构造辩论结束条件，未指定的项使用服务器配置
+
+    Args:
+        max_rounds: 最大辩论回合数
+        sell_threshold: 分数小于等于该值时提前结束
+        buy_threshold: 分数大于等于该值时提前结束
+        convergence_delta: 相邻两轮分数之差小于该值时提前结束
+
+    Returns:
+        结束条件
+
+    Raises:
+        ValueError: 参数不合法或超出服务器允许的范围
+    """
+    settings = get_settings()
+    if max_rounds is not None and max_rounds > settings.DEBATE_MAX_ROUNDS_LIMIT:
+        raise ValueError(f"max_rounds 不能超过 {settings.DEBATE_MAX_ROUNDS_LIMIT}")
+    return StoppingPolicy(
+        max_rounds=max_rounds if max_rounds is not None else settings.DEBATE_MAX_ROUNDS,
+        sell_threshold=sell_threshold if sell_threshold is not None else settings.DEBATE_SELL_THRESHOLD,
+        buy_threshold=buy_threshold if buy_threshold is not None else settings.DEBATE_BUY_THRESHOLD,
+        convergence_delta=convergence_delta if convergence_delta is not None else settings.DEBATE_CONVERGENCE_DELTA
+    ).validate()
+
+
+def make_schedule(priority: int = 0, deadline: Optional[float] = None) -> Schedule:
+    """根据请求参数构造本次运行的调度参数，未指定截止时间时使用服务器配置
+
+    Args:
+        priority: 优先级，越大越先获得 LLM 调用名额
+        deadline: 截止时间（收到请求后的秒数）
+
+    Returns:
+        调度参数，截止时间换算为 Unix 时间戳
+    """
+    if deadline is None:
+        deadline = get_settings().DEBATE_DEADLINE
+    return Schedule(priority, time.time() + deadline if deadline else None)
+
+
+def make_context_budget() -> ContextBudget:
+    """根据服务器配置构造各任务的上下文和记忆预算，0 表示不限制（记忆为 0 时不使用）"""
+    settings = get_settings()
+    return ContextBudget(
+        rebuttal=settings.DEBATE_CONTEXT_REBUTTAL_TOKENS or None,
+        trader=settings.DEBATE_CONTEXT_TRADER_TOKENS or None,
+        history=settings.DEBATE_CONTEXT_HISTORY_TOKENS or None,
+        memory=settings.DEBATE_CONTEXT_MEMORY_TOKENS or None,
+        brief_inputs=settings.DEBATE_CONTEXT_BRIEF_INPUTS
+    ).validate()
+
+
+def build_workflow(policy: StoppingPolicy, asynchronous: bool = False) -> "TradingWorkflow":
+    """按服务器配置获取交易决策工作流，相同配置的工作流只编译一次，由所有请求共用
+
+    Args:
+        policy: 辩论结束条件
+        asynchronous: 是否在事件循环中运行（使用异步检查点存储）
+    """
+    # LangGraph/crewAI 在第一次运行 debate 时才导入，加快服务器启动
+    from debate.graph import get_workflow
+
+    return get_workflow(
+        debug=False,
+        cache=get_response_cache(),
+        pipelined=get_settings().DEBATE_PIPELINED,
+        artifacts=get_artifact_writer(),
+        policy=policy,
+        checkpointer=None if asynchronous else get_checkpointer(),
+        async_checkpointer=get_async_checkpointer() if asynchronous else None,
+        context=make_context_budget(),
+        scheduler=get_token_scheduler(),
+        call_timeout=get_settings().DEBATE_CALL_TIMEOUT or None
+    )
+
+
+def checkpoint_policy(values: Optional[Dict[str, Any]]) -> StoppingPolicy:
+    """从检查点中的状态（或从检查点继续得到的最终状态）取出原 debate 使用的结束条件"""
+    if values and values.get("stop_policy"):
+        return StoppingPolicy(**values["stop_policy"]).validate()
+    return make_policy()
+
+
+def _progress_event(node_name: str, state: Dict[str, Any], max_rounds: int) -> Dict[str, Any]:
+    """构造节点完成时的 progress 事件"""
+    debate_rounds = state.get("debate_rounds") or []
+    return {
+        "type": "progress",
+        "node": node_name,
+        "round": len(debate_rounds),
+        "total_rounds": max_rounds,
+        "latest_analysis": round_dicts(debate_rounds)[-1] if node_name == "run_analysis_round" and debate_rounds else None
+    }
+
+
+def run_debate_job(
+    inputs: List[Dict[str, Any]],
+    policy: StoppingPolicy,
+    request_id: Optional[str] = None,
+    schedule: Optional[Schedule] = None
+) -> Dict[str, Any]:
+    """在执行器中运行一次完整的 debate 工作流
+
+    该函数位于模块顶层，以便在进程池模式下被 pickle。
+
+    Args:
+        inputs: 输入数据列表
+        policy: 辩论结束条件
+        request_id: 请求 ID，为 None 时自动生成
+        schedule: LLM 调用的调度参数（优先级、截止时间）
+
+    Returns:
+        最终状态
+    """
+    workflow = build_workflow(policy)
+    return workflow.run(inputs, request_id, schedule)
+
+
+def stream_debate_job(
+    inputs: List[Dict[str, Any]],
+    policy: StoppingPolicy,
+    channel: Any,
+    request_id: Optional[str] = None,
+    schedule: Optional[Schedule] = None
+) -> Optional[Dict[str, Any]]:
+    """在执行器中以流式方式运行 debate 工作流
+
+    每个节点完成时向 channel 写入一个 progress 事件，智能体生成的 token 以 token 事件写入，
+    最终状态以 result 事件写入。无论成功与否，最后都会写入 None 作为结束标记。
+
+    Args:
+        inputs: 输入数据列表
+        policy: 辩论结束条件
+        channel: 由执行器创建的事件队列
+        request_id: 请求 ID，为 None 时自动生成
+        schedule: LLM 调用的调度参数（优先级、截止时间）
+
+    Returns:
+        最终状态
+    """
+    try:
+        workflow = build_workflow(policy)
+        result: Optional[Dict[str, Any]] = None
+
+        for node_name, state in workflow.stream(inputs, event_sink=channel.put, request_id=request_id,
+                                                schedule=schedule):
+            channel.put(_progress_event(node_name, state, policy.max_rounds))
+            result = state
+
+        channel.put({"type": "result", "data": result})
+        return result
+    finally:
+        channel.put(None)
+
+
+async def arun_debate_job(
+    inputs: List[Dict[str, Any]],
+    policy: StoppingPolicy,
+    request_id: Optional[str] = None,
+    schedule: Optional[Schedule] = None
+) -> Dict[str, Any]:
+    """在事件循环中异步运行一次完整的 debate 工作流
+
+    Args:
+        inputs: 输入数据列表
+        policy: 辩论结束条件
+        request_id: 请求 ID，为 None 时自动生成
+        schedule: LLM 调用的调度参数（优先级、截止时间）
+
+    Returns:
+        最终状态
+    """
+    workflow = build_workflow(policy, asynchronous=True)
+    return await workflow.ainvoke(inputs, request_id, schedule)
+
+
+async def astream_debate_job(
+    inputs: List[Dict[str, Any]],
+    policy: StoppingPolicy,
+    channel: Any,
+    request_id: Optional[str] = None,
+    schedule: Optional[Schedule] = None
+) -> Optional[Dict[str, Any]]:
+    """在事件循环中以流式方式异步运行 debate 工作流，写入 channel 的事件与 stream_debate_job 相同
+
+    Args:
+        inputs: 输入数据列表
+        policy: 辩论结束条件
+        channel: 由执行器创建的事件队列
+        request_id: 请求 ID，为 None 时自动生成
+        schedule: LLM 调用的调度参数（优先级、截止时间）
+    """
+    try:
+        workflow = build_workflow(policy, asynchronous=True)
+        result: Optional[Dict[str, Any]] = None
+
+        async for node_name, state in workflow.astream(inputs, event_sink=channel.put, request_id=request_id,
+                                                       schedule=schedule):
+            channel.put(_progress_event(node_name, state, policy.max_rounds))
+            result = state
+
+        channel.put({"type": "result", "data": result})
+        return result
+    finally:
+        channel.put(None)
+
+
+def resume_debate_job(request_id: str, schedule: Optional[Schedule] = None) -> Optional[Dict[str, Any]]:
+    """从检查点继续 request_id 对应的未完成 debate，使用原 debate 的结束条件
+
+    Args:
+        request_id: 原请求的 ID
+        schedule: 本次运行的调度参数（优先级、截止时间）
+
+    Returns:
+        最终状态，没有未完成的检查点时返回 None
+
+    Raises:
+        RuntimeError: 未配置 DEBATE_CHECKPOINT_PATH
+    """
+    if get_checkpointer() is None:
+        raise RuntimeError("未配置 DEBATE_CHECKPOINT_PATH，无法从检查点继续")
+    values = build_workflow(make_policy()).checkpoint(request_id)
+    if values is None:
+        return None
+    return build_workflow(checkpoint_policy(values)).resume(request_id, schedule)
+
+
+async def aresume_debate_job(request_id: str, schedule: Optional[Schedule] = None) -> Optional[Dict[str, Any]]:
+    """resume_debate_job 的异步版本"""
+    if get_async_checkpointer() is None:
+        raise RuntimeError("未配置 DEBATE_CHECKPOINT_PATH，无法从检查点继续")
+    values = await build_workflow(make_policy(), asynchronous=True).acheckpoint(request_id)
+    if values is None:
+        return None
+    return await build_workflow(checkpoint_policy(values), asynchronous=True).aresume(request_id, schedule)
+
+
+def queued_debate_job(
+    inputs: List[Dict[str, Any]],
+    policy: StoppingPolicy,
+    request_id: Optional[str] = None,
+    schedule: Optional[Schedule] = None
+) -> Dict[str, Any]:
+    """queue 模式下在 worker 进程中运行 debate 并保存结果，提交任务的 API 进程退出时结果也不会丢失
+
+    保存的耗时为 worker 中的运行时间，不包括在队列中等待的时间。
+    """
+    started = time.perf_counter()
+    result = run_debate_job(inputs, policy, request_id, schedule)
+    record_debate(inputs, result, policy, time.perf_counter() - started)
+    return result
+
+
+def queued_stream_job(
+    inputs: List[Dict[str, Any]],
+    policy: StoppingPolicy,
+    channel: Any,
+    request_id: Optional[str] = None,
+    schedule: Optional[Schedule] = None
+) -> Optional[Dict[str, Any]]:
+    """queue 模式下在 worker 进程中以流式方式运行 debate 并保存结果"""
+    started = time.perf_counter()
+    result = stream_debate_job(inputs, policy, channel, request_id, schedule)
+    record_debate(inputs, result, policy, time.perf_counter() - started)
+    return result
+
+
+def queued_resume_job(request_id: str, schedule: Optional[Schedule] = None) -> Optional[Dict[str, Any]]:
+    """queue 模式下在 worker 进程中从检查点继续 debate 并保存结果"""
+    started = time.perf_counter()
+    result = resume_debate_job(request_id, schedule)
+    record_debate([], result, checkpoint_policy(result), time.perf_counter() - started)
+    return result
+
+
+def records_in_job(kind: str) -> bool:
+    """该类型的执行器是否在任务中保存 debate 结果（否则由 API 进程在任务完成后保存）"""
+    return kind == "queue"
+
+
+def get_debate_job(kind: str) -> Callable:
+    """根据执行器类型选择 debate 任务函数"""
+    if kind == "queue":
+        return queued_debate_job
+    return arun_debate_job if kind == "async" else run_debate_job
+
+
+def get_stream_job(kind: str) -> Callable:
+    """根据执行器类型选择流式 debate 任务函数"""
+    if kind == "queue":
+        return queued_stream_job
+    return astream_debate_job if kind == "async" else stream_debate_job
+
+
+def get_resume_job(kind: str) -> Callable:
+    """根据执行器类型选择从检查点继续 debate 的任务函数"""
+    if kind == "queue":
+        return queued_resume_job
+    return aresume_debate_job if kind == "async" else resume_debate_job
@@ -0,0 +1,18 @@
+from functools import lru_cache
+from typing import Optional
+
+from debate.scheduler import TokenScheduler
+
+from .config import get_settings
+
+
+@lru_cache()
+def get_token_scheduler() -> Optional[TokenScheduler]:
+    """按 DEBATE_MAX_TOKENS_IN_FLIGHT 创建进程内共享的 LLM 调用调度器，未配置时返回 None
+
+    进程池执行器的每个工作进程各有一个调度器，各自按该上限控制。
+    """
+    settings = get_settings()
+    if settings.DEBATE_MAX_TOKENS_IN_FLIGHT <= 0:
+        return None
+    return TokenScheduler(settings.DEBATE_MAX_TOKENS_IN_FLIGHT, settings.DEBATE_COMPLETION_TOKENS)
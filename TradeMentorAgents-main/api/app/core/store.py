@@ -0,0 +1,47 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from debate.agents import AGENT_MODELS
+from debate.policy import StoppingPolicy
+from debate.sinks import BatchWriter
+from debate.store import DebateStore, make_record, parse_database_url
+
+from .config import get_settings
+
+
+@lru_cache()
+def get_debate_store() -> Optional[DebateStore]:
+    """按 DATABASE_URL 创建进程内共享的 debate 结果存储，未配置时返回 None"""
+    settings = get_settings()
+    if not settings.DATABASE_URL:
+        return None
+    return DebateStore(parse_database_url(settings.DATABASE_URL))
+
+
+@lru_cache()
+def get_debate_writer() -> Optional[BatchWriter]:
+    """在后台线程中批量写入 debate 结果的写入器，未配置存储时返回 None"""
+    store = get_debate_store()
+    if store is None:
+        return None
+    return BatchWriter(store, name="debate-store-writer")
+
+
+def record_debate(
+    inputs: List[Dict[str, Any]],
+    result: Optional[Dict[str, Any]],
+    policy: StoppingPolicy,
+    elapsed: float
+) -> None:
+    """提交一次已完成的 debate，不等待写入完成；未配置存储或没有结果时忽略
+
+    Args:
+        inputs: 输入数据列表
+        result: 工作流最终状态
+        policy: 使用的结束条件
+        elapsed: debate 总耗时（秒），在 API 进程中保存时包括排队时间
+    """
+    writer = get_debate_writer()
+    if writer is None or not result:
+        return
+    writer.put(make_record(inputs, result, elapsed=elapsed, policy=policy._asdict(), model=AGENT_MODELS["trader"]))
@@ -1,14 +1,43 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import base
 from app.core.config import get_settings
+from app.core.executor import get_executor
+from app.core.artifacts import get_artifact_writer
+from app.core.store import get_debate_writer
+from app.core.checkpoints import close_async_checkpointer
+from debate.agents import get_async_llm_client
+from debate.metrics import generate_metrics
 
 settings = get_settings()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """服务退出时关闭执行器、LLM 客户端和检查点存储，并写完尚未保存的数据"""
+    yield
+    
+    get_executor().shutdown()
+    await get_async_llm_client().aclose()
+    await close_async_checkpointer()
+    
+    # 写完尚未落盘的任务输出
+    artifacts = get_artifact_writer()
+    if artifacts is not None:
+        artifacts.close()
+    
+    # 写完尚未保存的 debate 结果
+    debate_writer = get_debate_writer()
+    if debate_writer is not None:
+        debate_writer.close()
+
 app = FastAPI(
     title="Multi-Agents API",
     description="API for Multi-Agents project",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS 设置
@@ -33,4 +62,13 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 指标"""
+    try:
+        payload, content_type = generate_metrics()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return Response(content=payload, media_type=content_type) 
\ No newline at end of file
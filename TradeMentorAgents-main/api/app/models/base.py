@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Any, Dict, List, TypedDict, Union, Literal
 
 class InputData(BaseModel):
@@ -8,20 +8,39 @@ class InputData(BaseModel):
     data: Dict[str, Any]
 
 class State(BaseModel):
-    """状态模型"""
-    inputs: List[InputData]
-    analyses: List[str] = []
-    trader_scores: List[float] = []
-    debate_rounds: List[Dict[str, str]] = []
+    """状态模型，只包含请求的 fields（默认不含 analyses 和 score），未请求的字段不会出现在响应中"""
+    request_id: Optional[str] = None
+    input_hash: Optional[str] = None
+    analyses: Optional[List[str]] = None
+    trader_scores: Optional[List[float]] = None
+    score: Optional[float] = None
+    debate_rounds: Optional[List[Dict[str, str]]] = None
     decision: Optional[str] = None
+    # 因 LLM 调用超时（timeout）或到达截止时间（deadline）提前结束时的原因，此时 decision 和分数为最后完成的回合的结果
+    timed_out: Optional[str] = None
 
 class RequestBase(BaseModel):
     """基础请求模型"""
     request_id: Optional[str] = None
     data: List[InputData]
+    # 辩论结束条件，未指定的项使用服务器配置
+    max_rounds: Optional[int] = Field(None, ge=1)
+    sell_threshold: Optional[float] = Field(None, ge=0, le=10)
+    buy_threshold: Optional[float] = Field(None, ge=0, le=10)
+    convergence_delta: Optional[float] = Field(None, gt=0)
+    # 调度参数：启用 DEBATE_MAX_TOKENS_IN_FLIGHT 时，LLM 调用按优先级（越大越先）、截止时间（越早越先）排队
+    priority: int = 0
+    # 截止时间（收到请求后的秒数），到达时返回已完成回合的结果，未指定时使用 DEBATE_DEADLINE
+    deadline: Optional[float] = Field(None, gt=0)
+
+class BatchRequest(BaseModel):
+    """批量请求模型"""
+    jobs: List[RequestBase]
 
 class ResponseBase(BaseModel):
     """基础响应模型"""
     status: str
     message: str
-    data: Optional[State] = None 
\ No newline at end of file
+    data: Optional[State] = None
+    # DEBATE_EXECUTOR=queue 时 debate 在任务队列中的 ID，可通过 GET /debate/jobs/{job_id} 查询
+    job_id: Optional[int] = None 
\ No newline at end of file
@@ -1,90 +1,410 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
-from typing import Dict, Any, AsyncGenerator, List
-from ..models.base import RequestBase, ResponseBase, InputData
-from debate.graph import TradingWorkflow
-from debate.state import initialize_state
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Dict, Any, AsyncGenerator, Awaitable, Callable, List, Optional, Tuple
+from ..models.base import RequestBase, ResponseBase, InputData, BatchRequest, State
+from ..core.config import get_settings
+from ..core.executor import get_executor, QueueFullError
+from ..core.jobqueue import get_job_queue
+from ..core.jobs import (
+    checkpoint_policy, get_debate_job, get_resume_job, get_stream_job, make_policy, make_schedule, records_in_job
+)
+from debate.policy import StoppingPolicy
+from debate.scheduler import Schedule
+from debate.state import parse_fields, project_state
+from ..core.cache import get_response_cache
+from ..core.scheduler import get_token_scheduler
+from ..core.store import get_debate_store, record_debate
+from ..core.coalesce import Flight, flight_key, get_flights
+from debate import metrics
 import json
+import time
 import asyncio
 
 router = APIRouter()
 
-async def debate_stream(inputs: Dict[Any, Any]) -> AsyncGenerator[str, None]:
+# 结果字段投影的查询参数，例如 ?fields=decision,scores
+FIELDS_QUERY = Query(
+    None,
+    description="返回的结果字段，逗号分隔：request_id、input_hash、decision、score、scores、rounds、analyses；"
+                "默认返回 request_id、input_hash、trader_scores、debate_rounds、decision"
+)
+
+def request_policy(request: RequestBase) -> StoppingPolicy:
+    """根据请求构造辩论结束条件，参数不合法时返回 400"""
+    try:
+        return make_policy(
+            max_rounds=request.max_rounds,
+            sell_threshold=request.sell_threshold,
+            buy_threshold=request.buy_threshold,
+            convergence_delta=request.convergence_delta
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def request_schedule(request: RequestBase) -> Schedule:
+    """根据请求构造本次运行的调度参数（优先级、截止时间）"""
+    return make_schedule(request.priority, request.deadline)
+
+def request_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """解析结果字段投影，包含未知字段时返回 400"""
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _run_flight(
+    flight: Flight,
+    submit: Callable[..., Awaitable[Any]],
+    inputs: List[Dict[str, Any]],
+    policy: StoppingPolicy,
+    request_id: Optional[str] = None,
+    schedule: Optional[Schedule] = None
+) -> Dict[str, Any]:
+    """在执行器中运行 debate，完成后发布 result 事件并保存结果
+    
+    Args:
+        flight: 当前运行
+        submit: executor.submit 或 executor.submit_batched
+        inputs: 输入数据列表
+        policy: 辩论结束条件
+        request_id: 请求 ID
+        schedule: LLM 调用的调度参数
     """
-    生成 debate 工作流的流式输出
+    executor = get_executor()
+    started = time.perf_counter()
+    result = await submit(get_debate_job(executor.kind), inputs, policy, request_id, schedule, on_job=flight.set_job)
+    if not records_in_job(executor.kind):
+        record_debate(inputs, result, policy, time.perf_counter() - started)
+    flight.publish({"type": "result", "data": result})
+    return result
+
+async def _next_event(channel: Any, job: "asyncio.Future[Any]") -> Optional[Dict[str, Any]]:
+    """等待执行器中的流式任务写入下一个事件，任务失败且没有写入结束标记时返回 None"""
+    getter = asyncio.ensure_future(channel.aget())
+    await asyncio.wait({getter, job}, return_when=asyncio.FIRST_COMPLETED)
+    if not getter.done() and (job.cancelled() or job.exception() is not None):
+        getter.cancel()
+        return None
+    return await getter
+
+async def _run_stream_flight(
+    flight: Flight,
+    inputs: List[Dict[str, Any]],
+    policy: StoppingPolicy,
+    request_id: Optional[str] = None,
+    schedule: Optional[Schedule] = None
+) -> Optional[Dict[str, Any]]:
     """
+    以流式方式运行 debate，将执行器中的 progress、token 和 result 事件发布给所有订阅者
+    
+    调用前必须已通过 executor.reserve() 占用执行名额。
+    """
+    executor = get_executor()
+    channel = executor.make_channel()
+    started = time.perf_counter()
+    job = asyncio.ensure_future(executor.run_reserved(
+        get_stream_job(executor.kind), inputs, policy, channel, request_id, schedule, on_job=flight.set_job
+    ))
+    result = None
+    
+    # 逐个转发节点完成和 token 事件，直到收到结束标记
     try:
-        # 初始化工作流
-        workflow = TradingWorkflow(debug=False, max_rounds=4)
-        
-        # 准备初始状态
-        initial_state = initialize_state(inputs)
-        
-        # 发送初始状态
+        while True:
+            event = await _next_event(channel, job)
+            if event is None:
+                break
+            if event.get("type") == "result":
+                result = event.get("data")
+                if not records_in_job(executor.kind):
+                    record_debate(inputs, result, policy, time.perf_counter() - started)
+            flight.publish(event)
+    finally:
+        await channel.aclose()
+    
+    await job
+    return result
+
+async def _flight_job(flight: Flight) -> int:
+    """等待 debate 写入任务队列并返回任务 ID
+
+    Raises:
+        debate 在写入任务队列之前失败时抛出的异常
+    """
+    async for event in flight.subscribe():
+        if event.get("type") == "job":
+            return event["job_id"]
+    await flight.wait()
+    raise RuntimeError("debate 没有写入任务队列")
+
+async def debate_stream(
+    flight: Flight,
+    coalesced: bool = False,
+    projection: Optional[Tuple[str, ...]] = None
+) -> AsyncGenerator[str, None]:
+    """
+    生成 debate 工作流的流式输出
+    
+    加入已在运行的相同 debate 时，先补发之前的全部事件；result 事件只包含 projection 中的字段。
+    """
+    # 发送初始状态
+    if coalesced:
+        yield json.dumps({"type": "status", "message": "已加入相同输入的运行中 debate", "coalesced": True}) + "\n"
+    else:
         yield json.dumps({"type": "status", "message": "工作流已初始化"}) + "\n"
-        
-        # 创建一个事件循环来运行工作流
-        loop = asyncio.get_event_loop()
-        
-        # 定义进度回调函数
-        async def progress_callback(state):
-            # 发送当前轮次信息
-            if "debate_rounds" in state:
-                current_round = len(state["debate_rounds"])
-                yield json.dumps({
-                    "type": "progress",
-                    "round": current_round,
-                    "total_rounds": 4,
-                    "latest_analysis": state["debate_rounds"][-1] if state["debate_rounds"] else None
-                }) + "\n"
-        
-        # 运行工作流并获取结果
-        result = await loop.run_in_executor(None, workflow.app.invoke, initial_state)
-        
-        # 发送最终结果
-        yield json.dumps({"type": "result", "data": result}) + "\n"
-        
-    except Exception as e:
-        yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+    
+    async for event in flight.subscribe():
+        if event.get("type") == "result":
+            event = {**event, "data": project_state(event.get("data"), projection)}
+        yield json.dumps(event) + "\n"
 
 @router.post("/debate/stream")
-async def run_debate_stream(inputs: Dict[Any, Any]):
+async def run_debate_stream(request: RequestBase, fields: Optional[str] = FIELDS_QUERY):
     """
     运行 debate 工作流的流式端点
     
-    接收任意格式的输入数据，并通过工作流处理，实时返回进度
+    每个节点完成时返回一条 progress 事件，智能体生成内容时实时返回 token 事件；
+    输入数据和结束条件相同的 debate 正在运行时直接订阅它（沿用它的优先级和截止时间）；执行队列已满时返回 503。
+    
+    Args:
+        request: 包含输入数据的请求对象
+        fields: result 事件中返回的字段
     """
+    settings = get_settings()
+    policy = request_policy(request)
+    schedule = request_schedule(request)
+    projection = request_fields(fields)
+    inputs = [item.model_dump() for item in request.data]
+    key = flight_key(inputs, policy, streaming=True)
+    
+    flights = get_flights()
+    flight = flights.join(key)
+    coalesced = flight is not None
+    if coalesced:
+        metrics.COALESCED.labels(endpoint="stream").inc()
+    else:
+        try:
+            get_executor().reserve()
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": str(settings.DEBATE_RETRY_AFTER)}
+            )
+        flight = flights.start(key, lambda f: _run_stream_flight(f, inputs, policy, request.request_id, schedule))
+    
     return StreamingResponse(
-        debate_stream(inputs),
+        debate_stream(flight, coalesced, projection),
         media_type="text/event-stream"
     )
 
-@router.post("/debate")
-async def run_debate(request: RequestBase):
+@router.post("/debate", response_model=ResponseBase, response_model_exclude_unset=True)
+async def run_debate(
+    request: RequestBase,
+    fields: Optional[str] = FIELDS_QUERY,
+    wait: bool = Query(True, description="为 false 时写入任务队列后立即返回 202 和 job_id，"
+                                         "结果通过 GET /debate/jobs/{job_id} 查询（需要 DEBATE_EXECUTOR=queue）")
+):
     """
     运行 debate 工作流的端点
     
+    工作流在独立的执行器中运行，不阻塞事件循环；输入数据和结束条件相同的 debate 正在运行时
+    直接等待它的结果（结果中的 request_id、优先级和截止时间为实际运行的请求）；执行队列已满时返回 503。
+    queue 模式下响应包含任务 ID（job_id）。
+    
     Args:
         request: 包含输入数据的请求对象
+        fields: 返回的结果字段，例如 "decision,scores"
+        wait: 是否等待 debate 完成
     """
+    settings = get_settings()
+    policy = request_policy(request)
+    schedule = request_schedule(request)
+    projection = request_fields(fields)
+    if not wait and settings.DEBATE_EXECUTOR != "queue":
+        raise HTTPException(status_code=400, detail="wait=false 需要 DEBATE_EXECUTOR=queue")
     try:
-        # 初始化工作流
-        workflow = TradingWorkflow(debug=False, max_rounds=4)
-        
-        # 准备初始状态
-        initial_state = initialize_state(request.data)
+        inputs = [item.model_dump() for item in request.data]
         
-        # 运行工作流
-        result = workflow.app.invoke(initial_state)
+        # 在执行器中运行工作流，或加入正在运行的相同 debate
+        executor = get_executor()
+        flight, coalesced = get_flights().join_or_start(
+            flight_key(inputs, policy),
+            lambda f: _run_flight(f, executor.submit, inputs, policy, request.request_id, schedule),
+            also=(flight_key(inputs, policy, streaming=True),)
+        )
+        if coalesced:
+            metrics.COALESCED.labels(endpoint="debate").inc()
+        if not wait:
+            job_id = await _flight_job(flight)
+            return JSONResponse(status_code=202, content=ResponseBase(
+                status="queued",
+                message="Debate workflow queued" + (" (coalesced)" if coalesced else ""),
+                job_id=job_id
+            ).model_dump(exclude_unset=True))
+        result = await flight.wait()
         
-        return ResponseBase(
+        message = "Debate workflow completed successfully"
+        if result is not None and result.get("timed_out"):
+            message = f"Debate workflow stopped early ({result['timed_out']}), returning the last completed round"
+        response = ResponseBase(
             status="success",
-            message="Debate workflow completed successfully",
-            data=result
+            message=message + (" (coalesced)" if coalesced else ""),
+            data=State(**project_state(result, projection)) if result is not None else None
         )
+        if flight.job_id is not None:
+            response.job_id = flight.job_id
+        return response
         
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(settings.DEBATE_RETRY_AFTER)}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/debate/{request_id}/resume", response_model=ResponseBase, response_model_exclude_unset=True)
+async def resume_debate(request_id: str, fields: Optional[str] = FIELDS_QUERY):
+    """
+    从检查点继续之前失败的 debate（如 LLM 超时、进程重启），已完成的回合不会重新调用 LLM
+    
+    使用原 debate 的结束条件；需要配置 DEBATE_CHECKPOINT_PATH，且原请求提供了 request_id。
+    用相同的 request_id 和输入数据重新提交 /debate 也会自动从检查点继续。没有未完成的检查点时返回 404。
+    
+    Args:
+        request_id: 原请求的 ID
+        fields: 返回的结果字段
+    """
+    settings = get_settings()
+    projection = request_fields(fields)
+    if not settings.DEBATE_CHECKPOINT_PATH:
+        raise HTTPException(status_code=503, detail="未配置 DEBATE_CHECKPOINT_PATH，无法从检查点继续")
+    
+    executor = get_executor()
+    
+    async def run(flight: Flight) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        result = await executor.submit(get_resume_job(executor.kind), request_id, make_schedule(), on_job=flight.set_job)
+        # 检查点中只保留输入的哈希、股票代码和日期，记录结果时从最终状态中取出，结束条件使用原 debate 的
+        if not records_in_job(executor.kind):
+            record_debate([], result, checkpoint_policy(result), time.perf_counter() - started)
+        return result
+    
+    try:
+        # 同一 request_id 的多个继续请求只运行一次
+        flight, _ = get_flights().join_or_start(f"resume:{request_id}", run)
+        result = await flight.wait()
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(settings.DEBATE_RETRY_AFTER)}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"debate {request_id} 没有未完成的检查点")
+    response = ResponseBase(
+        status="success",
+        message="Debate resumed from checkpoint",
+        data=State(**project_state(result, projection))
+    )
+    if flight.job_id is not None:
+        response.job_id = flight.job_id
+    return response
+
+async def debate_batch_stream(
+    jobs: List[RequestBase],
+    policies: List[StoppingPolicy],
+    schedules: List[Schedule],
+    projection: Optional[Tuple[str, ...]] = None
+) -> AsyncGenerator[str, None]:
+    """
+    并发运行批量 debate，按完成顺序逐条输出结果，每个结果只包含 projection 中的字段
+    
+    所有任务在输出第一行之前就已启动（或加入相同输入的运行中 debate）；客户端断开时只停止等待结果，
+    已启动的 debate 会继续运行到结束，结果写入缓存和结果存储，供相同输入的请求复用。
+    """
+    executor = get_executor()
+    flights = get_flights()
+    
+    def start(index: int, job: RequestBase) -> Flight:
+        inputs = [item.model_dump() for item in job.data]
+        flight, coalesced = flights.join_or_start(
+            flight_key(inputs, policies[index]),
+            lambda f: _run_flight(
+                f, executor.submit_batched, inputs, policies[index], job.request_id, schedules[index]
+            ),
+            also=(flight_key(inputs, policies[index], streaming=True),)
+        )
+        if coalesced:
+            metrics.COALESCED.labels(endpoint="batch").inc()
+        return flight
+    
+    async def wait_one(index: int, job: RequestBase, flight: Flight) -> Dict[str, Any]:
+        try:
+            result = await flight.wait()
+            event = {"type": "result", "index": index, "request_id": job.request_id,
+                     "data": project_state(result, projection)}
+        except QueueFullError as e:
+            event = {"type": "error", "index": index, "request_id": job.request_id, "status": 503, "message": str(e)}
+        except Exception as e:
+            event = {"type": "error", "index": index, "request_id": job.request_id, "status": 500, "message": str(e)}
+        if flight.job_id is not None:
+            event["job_id"] = flight.job_id
+        return event
+    
+    # 先启动全部 debate（批量并发名额由 submit_batched 控制），再等待结果
+    waiters = [
+        asyncio.ensure_future(wait_one(index, job, start(index, job)))
+        for index, job in enumerate(jobs)
+    ]
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(waiters):
+            event = await next_done
+            if event["type"] == "error":
+                failed += 1
+            yield json.dumps(event) + "\n"
+        
+        yield json.dumps({"type": "done", "total": len(jobs), "failed": failed}) + "\n"
+    finally:
+        # 客户端断开时只取消等待方，不影响已启动的 debate
+        for waiter in waiters:
+            waiter.cancel()
+
+@router.post("/debate/batch")
+async def run_debate_batch(request: BatchRequest, fields: Optional[str] = FIELDS_QUERY):
+    """
+    批量运行 debate 工作流的端点
+    
+    所有任务并发执行，合计并发数受 DEBATE_BATCH_CONCURRENCY 限制；
+    每个任务完成后立即以一行 JSON 返回结果。
+    
+    Args:
+        request: 包含多个 debate 请求的批量请求对象
+        fields: 每个结果中返回的字段
+    """
+    settings = get_settings()
+    if not request.jobs:
+        raise HTTPException(status_code=400, detail="批量请求不能为空")
+    if len(request.jobs) > settings.DEBATE_BATCH_MAX_JOBS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"批量请求最多包含 {settings.DEBATE_BATCH_MAX_JOBS} 个任务"
+        )
+    
+    # 先校验所有任务的结束条件，任一不合法时整个批量请求返回 400
+    policies = [request_policy(job) for job in request.jobs]
+    schedules = [request_schedule(job) for job in request.jobs]
+    projection = request_fields(fields)
+    
+    return StreamingResponse(
+        debate_batch_stream(request.jobs, policies, schedules, projection),
+        media_type="application/x-ndjson"
+    )
 
 @router.get("/debate/sample")
 async def get_sample_inputs():
@@ -95,4 +415,123 @@ async def get_sample_inputs():
         from debate.state import get_sample_inputs
         return get_sample_inputs()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+@router.get("/debate/cache/stats")
+async def get_cache_stats():
+    """
+    获取 LLM 响应缓存的命中统计（仅统计当前进程）
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@router.get("/debate/coalesce/stats")
+async def get_coalesce_stats():
+    """
+    获取请求合并统计（仅统计当前进程）：正在运行的 debate 数、启动的 debate 数、合并的请求数
+    """
+    return get_flights().stats()
+
+@router.get("/debate/scheduler/stats")
+async def get_scheduler_stats():
+    """
+    获取 LLM 调用调度器的状态（仅统计当前进程）：进行中调用的估算 token 数、上限、排队的调用数
+    """
+    scheduler = get_token_scheduler()
+    if scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **scheduler.stats()}
+
+@router.get("/debate/queue/stats")
+async def get_queue_stats():
+    """
+    获取任务队列中各状态的任务数（DEBATE_EXECUTOR=queue 时，所有 API 进程和 worker 进程共用）
+    """
+    if get_settings().DEBATE_EXECUTOR != "queue":
+        return {"enabled": False}
+    stats = await asyncio.to_thread(get_job_queue().stats)
+    return {"enabled": True, **stats}
+
+@router.get("/debate/jobs/{job_id}")
+async def get_queued_job(job_id: int, fields: Optional[str] = FIELDS_QUERY):
+    """
+    查询任务队列中 debate 的状态（queued、running、done、failed、cancelled）和结果
+    
+    结果由 worker 进程写入，提交任务的请求断开或 API 进程重启后仍可查询；
+    结束超过 DEBATE_QUEUE_RETENTION 秒的任务会被清理，之后返回 404。
+    
+    Args:
+        job_id: 任务 ID（queue 模式下 /debate、/debate/stream 和批量请求的响应中的 job_id）
+        fields: 返回的结果字段
+    """
+    if get_settings().DEBATE_EXECUTOR != "queue":
+        raise HTTPException(status_code=503, detail="未启用任务队列（DEBATE_EXECUTOR=queue）")
+    projection = request_fields(fields)
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务 {job_id} 不存在")
+    result, error = job.pop("result"), job.pop("error")
+    return {
+        **job,
+        "data": project_state(result, projection),
+        "error": (str(error) or type(error).__name__) if error is not None else None
+    }
+
+@router.get("/debate/llm/stats")
+async def get_llm_stats():
+    """
+    获取各 LLM 后端的状态（仅统计当前进程）：进行中的调用数、平均调用耗时、成功/失败次数、是否可用
+    """
+    from debate.agents import get_router
+    return get_router().stats()
+
+def _require_store():
+    store = get_debate_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="未配置 DATABASE_URL，debate 历史记录不可用")
+    return store
+
+@router.get("/debate/history")
+async def list_debate_history(
+    symbol: Optional[str] = None,
+    date: Optional[str] = None,
+    input_hash: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=500)
+):
+    """
+    按股票代码、日期或输入哈希查询已保存的 debate 摘要，最新的在前
+    
+    Args:
+        symbol: 股票代码
+        date: 输入数据的最新日期（YYYY-MM-DD）
+        input_hash: 输入数据的规范化哈希
+        limit: 最多返回的条数
+    """
+    store = _require_store()
+    return await asyncio.to_thread(store.find, symbol, date, input_hash, limit)
+
+@router.get("/debate/history/{debate_id}")
+async def get_debate_history(debate_id: int):
+    """
+    获取一条已保存 debate 的完整记录（包括每轮分析）
+    """
+    record = await asyncio.to_thread(_require_store().get, debate_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"debate {debate_id} 不存在")
+    return record
+
+@router.post("/debate/lookup")
+async def lookup_debate(request: RequestBase):
+    """
+    查询与请求输入数据完全相同的最近一次 debate，不运行工作流，没有时返回 404
+    
+    Args:
+        request: 包含输入数据的请求对象
+    """
+    inputs = [item.model_dump() for item in request.data]
+    record = await asyncio.to_thread(_require_store().latest_for_inputs, inputs)
+    if record is None:
+        raise HTTPException(status_code=404, detail="没有相同输入的 debate 记录")
+    return record
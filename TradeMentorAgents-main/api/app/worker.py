@@ -0,0 +1,148 @@
+"""debate worker：从任务队列领取 debate 并执行
+
+与 DEBATE_EXECUTOR=queue 的 API 进程配合使用，在 api 目录下运行：
+
+    python -m app.worker --processes 8 --threads 8
+
+父进程启动并守护多个 worker 进程（退出的进程会被重新启动），每个 worker 进程用多个线程执行任务。
+收到 SIGTERM / SIGINT 后不再领取新任务，等待正在执行的任务完成后退出。
+所有进程通过 RESPONSE_CACHE_PATH 指定的磁盘缓存共享 LLM 响应；debate 结果由 worker 进程写入 DATABASE_URL，
+任务的状态和结果可通过 GET /debate/jobs/{id} 查询。
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List
+
+from debate.jobqueue import Job, JobQueue
+
+from app.core.artifacts import get_artifact_writer
+from app.core.config import get_settings
+from app.core.jobqueue import get_job_queue
+from app.core.store import get_debate_writer
+
+# 没有可领取的任务时的等待间隔（秒）
+IDLE_INTERVAL = 0.2
+# 清理已结束任务的间隔（秒）
+PRUNE_INTERVAL = 3600
+
+
+def execute(job_queue: JobQueue, job: Job, worker: str) -> None:
+    """执行一个任务并记录结果或异常；租约已过期、任务已交给其他 worker 时不记录"""
+    try:
+        fn, args = job.load()
+        result = fn(*args)
+    except Exception as e:
+        job_queue.fail(job.id, worker, e)
+    else:
+        job_queue.complete(job.id, worker, result)
+
+
+def run_worker(threads: int, stop: threading.Event) -> None:
+    """worker 进程的主循环：领取任务交给线程池执行，定期为执行中的任务续约
+
+    Args:
+        threads: 同时执行的任务数
+        stop: 设置后不再领取新任务，等待执行中的任务完成后返回
+    """
+    settings = get_settings()
+    job_queue = get_job_queue()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    running: Dict[int, "Future[None]"] = {}
+    heartbeat_interval = job_queue.lease / 3
+    beat_at = pruned_at = 0.0
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="debate-worker") as pool:
+        while not stop.is_set() or running:
+            for job_id in [job_id for job_id, future in running.items() if future.done()]:
+                del running[job_id]
+
+            now = time.monotonic()
+            if now - beat_at >= heartbeat_interval:
+                job_queue.heartbeat(running, worker)
+                beat_at = now
+            if now - pruned_at >= PRUNE_INTERVAL:
+                job_queue.prune(settings.DEBATE_QUEUE_RETENTION)
+                pruned_at = now
+
+            job = None
+            if not stop.is_set() and len(running) < threads:
+                job = job_queue.claim(worker)
+            if job is None:
+                # 没有任务、名额已满或正在退出
+                time.sleep(IDLE_INTERVAL)
+                continue
+            running[job.id] = pool.submit(execute, job_queue, job, worker)
+
+
+def _process_main(threads: int) -> None:
+    """worker 子进程入口"""
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    try:
+        run_worker(threads, stop)
+    finally:
+        # 写完尚未落盘的任务输出和尚未保存的 debate 结果
+        for writer in (get_artifact_writer(), get_debate_writer()):
+            if writer is not None:
+                writer.close()
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="debate worker：从任务队列领取 debate 并执行")
+    parser.add_argument("--processes", type=int, default=settings.DEBATE_WORKER_PROCESSES,
+                        help="worker 进程数，0 表示 CPU 核数")
+    parser.add_argument("--threads", type=int, default=settings.DEBATE_WORKER_THREADS,
+                        help="每个 worker 进程同时运行的 debate 数量")
+    args = parser.parse_args()
+
+    # 提前创建队列文件，配置错误时直接退出
+    try:
+        get_job_queue()
+    except ValueError as e:
+        sys.exit(str(e))
+    if not settings.RESPONSE_CACHE_PATH:
+        print("警告: 未配置 RESPONSE_CACHE_PATH，worker 进程之间不共享 LLM 响应缓存", file=sys.stderr)
+
+    processes = args.processes or os.cpu_count() or 1
+    # spawn 启动的子进程各自打开数据库连接和 HTTP 客户端
+    context = multiprocessing.get_context("spawn")
+    stopping = threading.Event()
+
+    def start() -> multiprocessing.Process:
+        process = context.Process(target=_process_main, args=(args.threads,), daemon=False)
+        process.start()
+        return process
+
+    def shutdown(*_: object) -> None:
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    workers: List[multiprocessing.Process] = [start() for _ in range(processes)]
+    print(f"已启动 {processes} 个 worker 进程，每个进程 {args.threads} 个线程", file=sys.stderr, flush=True)
+    while not stopping.wait(1.0):
+        for i, process in enumerate(workers):
+            if not process.is_alive():
+                print(f"worker 进程 {process.pid} 已退出（{process.exitcode}），重新启动", file=sys.stderr, flush=True)
+                workers[i] = start()
+
+    # 通知子进程停止领取任务，等待执行中的任务完成
+    for process in workers:
+        if process.is_alive():
+            process.terminate()
+    for process in workers:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
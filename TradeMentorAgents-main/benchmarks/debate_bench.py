@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""端到端延迟/吞吐基准
+
+启动 benchmarks/mock_llm.py 中的模拟 LLM 服务，在不同并发下驱动：
+    workflow  进程内直接运行 TradingWorkflow
+    api       POST /api/v1/debate
+    stream    POST /api/v1/debate/stream（额外统计首个 token 的延迟）
+
+每个并发级别输出 p50/p95/p99 延迟、每秒完成的 debate 数，以及平均每次 LLM 调用的框架开销：
+    (所有 debate 延迟之和 - 模拟服务生成耗时之和) / LLM 调用次数
+api/stream 目标默认会以子进程启动 uvicorn（关闭响应缓存），也可以用 --api-url 指定已运行的服务，
+此时该服务需要以 LLM_BASE_URL 指向同一个模拟服务，并关闭响应缓存。
+
+--backends N 启动 N 个模拟服务并通过 LLM_ENDPOINTS 在它们之间分配调用，配合 --slots（每个服务同时生成的
+回复数上限）可以比较增加模型服务后的吞吐；此时在模拟服务中排队的时间也计入框架开销。
+
+用法:
+    python benchmarks/debate_bench.py [--targets workflow,api,stream] [--concurrency 1,4,16]
+        [--debates 32] [--max-rounds 4] [--token-latency 0.002] [--backends 2 --slots 4] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT, "api")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_llm import MockLLMServer  # noqa: E402
+
+# 单次 debate 的结果：(延迟秒数, 首个 token 延迟秒数, 错误信息)
+Sample = Tuple[float, Optional[float], Optional[str]]
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def make_workflow_runner(max_rounds: int) -> Callable[[List[Dict[str, Any]]], Sample]:
+    # 先启动模拟服务并设置 LLM_BASE_URL，再导入 debate
+    from debate.graph import get_workflow
+
+    workflow = get_workflow(max_rounds=max_rounds)
+
+    def run(inputs: List[Dict[str, Any]]) -> Sample:
+        started = time.perf_counter()
+        try:
+            workflow.run(inputs)
+        except Exception as e:
+            return time.perf_counter() - started, None, repr(e)
+        return time.perf_counter() - started, None, None
+
+    return run
+
+
+def make_api_runner(api_url: str, client: Any) -> Callable[[List[Dict[str, Any]]], Sample]:
+    def run(inputs: List[Dict[str, Any]]) -> Sample:
+        started = time.perf_counter()
+        try:
+            response = client.post(f"{api_url}/api/v1/debate", json={"data": inputs})
+            response.raise_for_status()
+            body = response.json()
+            if body.get("status") != "success":
+                return time.perf_counter() - started, None, body.get("message")
+        except Exception as e:
+            return time.perf_counter() - started, None, repr(e)
+        return time.perf_counter() - started, None, None
+
+    return run
+
+
+def make_stream_runner(api_url: str, client: Any) -> Callable[[List[Dict[str, Any]]], Sample]:
+    def run(inputs: List[Dict[str, Any]]) -> Sample:
+        started = time.perf_counter()
+        first_token = None
+        error = None
+        try:
+            with client.stream("POST", f"{api_url}/api/v1/debate/stream", json={"data": inputs}) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event.get("type") == "token" and first_token is None:
+                        first_token = time.perf_counter() - started
+                    elif event.get("type") == "error":
+                        error = event.get("message")
+        except Exception as e:
+            error = repr(e)
+        return time.perf_counter() - started, first_token, error
+
+    return run
+
+
+def run_level(
+    runner: Callable[[List[Dict[str, Any]]], Sample],
+    inputs: List[Dict[str, Any]],
+    concurrency: int,
+    debates: int,
+    llms: List[MockLLMServer]
+) -> Dict[str, Any]:
+    """在指定并发下运行 debates 次 debate 并汇总结果"""
+    for llm in llms:
+        llm.reset_stats()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda _: runner(inputs), range(debates)))
+    wall = time.perf_counter() - started
+    per_backend = [llm.stats() for llm in llms]
+    llm_stats = {key: sum(stats[key] for stats in per_backend) for key in per_backend[0]}
+
+    ok = [latency for latency, _, error in samples if error is None]
+    errors = [error for _, _, error in samples if error is not None]
+    first_tokens = [ttft for _, ttft, error in samples if error is None and ttft is not None]
+    calls = llm_stats["calls"]
+    result = {
+        "concurrency": concurrency,
+        "debates": debates,
+        "errors": len(errors),
+        "wall_seconds": wall,
+        "debates_per_second": len(ok) / wall if wall else 0.0,
+        "llm_calls_per_debate": calls / debates if debates else 0.0,
+        # 失败的 debate 同样产生了 LLM 调用，开销按全部 debate 计算
+        "overhead_ms_per_call": (
+            (sum(latency for latency, _, _ in samples) - llm_stats["service_seconds"]) / calls * 1000
+            if calls else None
+        ),
+    }
+    if ok:
+        result.update({
+            "p50_ms": percentile(ok, 0.50) * 1000,
+            "p95_ms": percentile(ok, 0.95) * 1000,
+            "p99_ms": percentile(ok, 0.99) * 1000,
+            "mean_ms": statistics.mean(ok) * 1000,
+        })
+    if len(llms) > 1:
+        result["calls_per_backend"] = [stats["calls"] for stats in per_backend]
+    if first_tokens:
+        result["ttft_p50_ms"] = percentile(first_tokens, 0.50) * 1000
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+def start_api(llm_urls: List[str], max_rounds: int, workers: int, port: int) -> subprocess.Popen:
+    """以子进程启动 API 服务，等待 /health 可用"""
+    import httpx
+
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")])),
+        "LLM_BASE_URL": llm_urls[0],
+        "LLM_ENDPOINTS": ",".join(llm_urls),
+        "RESPONSE_CACHE_ENABLED": "false",
+        "DEBATE_MAX_ROUNDS": str(max_rounds),
+        "DEBATE_MAX_WORKERS": str(workers),
+        "DEBATE_MAX_QUEUE": str(workers * 4),
+    })
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=API_DIR, env=env
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API 服务启动失败，退出码 {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("等待 API 服务启动超时")
+
+
+def print_results(target: str, results: List[Dict[str, Any]]) -> None:
+    print(f"\n[{target}]")
+    print(f"{'conc':>5}{'ok':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'debates/s':>11}{'calls/deb':>11}{'ovh ms/call':>13}{'ttft ms':>10}")
+
+    def fmt(value: Optional[float], width: int, digits: int = 0) -> str:
+        return f"{value:>{width}.{digits}f}" if value is not None else f"{'-':>{width}}"
+
+    for r in results:
+        print(
+            f"{r['concurrency']:>5}{r['debates'] - r['errors']:>6}{r['errors']:>5}"
+            f"{fmt(r.get('p50_ms'), 10)}{fmt(r.get('p95_ms'), 10)}{fmt(r.get('p99_ms'), 10)}"
+            f"{fmt(r['debates_per_second'], 11, 2)}{fmt(r['llm_calls_per_debate'], 11, 1)}"
+            f"{fmt(r['overhead_ms_per_call'], 13, 1)}{fmt(r.get('ttft_p50_ms'), 10)}"
+        )
+        if r.get("calls_per_backend"):
+            print(f"      calls per backend: {r['calls_per_backend']}")
+        if r.get("first_error"):
+            print(f"      first error: {r['first_error']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="debate 端到端延迟/吞吐基准（使用模拟 LLM）")
+    parser.add_argument("--targets", default="workflow,api,stream")
+    parser.add_argument("--concurrency", default="1,4,16", help="逗号分隔的并发级别")
+    parser.add_argument("--debates", type=int, default=0, help="每个并发级别的 debate 数，默认为并发数的 2 倍（至少 4）")
+    parser.add_argument("--max-rounds", type=int, default=4)
+    parser.add_argument("--token-latency", type=float, default=0.002)
+    parser.add_argument("--first-token-latency", type=float, default=0.05)
+    parser.add_argument("--backends", type=int, default=1, help="模拟服务（LLM 后端）数量")
+    parser.add_argument("--slots", type=int, default=0, help="每个模拟服务同时生成的回复数上限，0 表示不限制")
+    parser.add_argument("--api-url", default=None, help="使用已运行的 API 服务，不自动启动")
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--json", default=None, help="将结果写入 JSON 文件，便于与上一次结果比较")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    llms = [
+        MockLLMServer(
+            token_latency=args.token_latency, first_token_latency=args.first_token_latency, slots=args.slots
+        ).start()
+        for _ in range(args.backends)
+    ]
+    llm_urls = [llm.url for llm in llms]
+    os.environ["LLM_BASE_URL"] = llm_urls[0]
+    os.environ["LLM_ENDPOINTS"] = ",".join(llm_urls)
+    print(f"模拟 LLM 服务: {', '.join(llm_urls)}（token 间隔 {args.token_latency * 1000:.1f} ms，"
+          f"首 token {args.first_token_latency * 1000:.0f} ms，并行度 {args.slots or '不限'}）")
+
+    from debate.state import get_sample_inputs
+    inputs = get_sample_inputs()
+
+    report: Dict[str, Any] = {"config": vars(args), "results": {}}
+    api_proc = None
+    client = None
+    try:
+        for target in targets:
+            if target == "workflow":
+                runner = make_workflow_runner(args.max_rounds)
+            elif target in ("api", "stream"):
+                import httpx
+
+                api_url = args.api_url
+                if api_url is None:
+                    if api_proc is None:
+                        api_proc = start_api(llm_urls, args.max_rounds, max(levels), args.api_port)
+                    api_url = f"http://127.0.0.1:{args.api_port}"
+                if client is None:
+                    client = httpx.Client(
+                        timeout=None,
+                        limits=httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+                    )
+                runner = (make_api_runner if target == "api" else make_stream_runner)(api_url, client)
+            else:
+                parser.error(f"未知的目标: {target}")
+
+            # 预热：触发延迟导入、智能体创建和工作流编译
+            runner(inputs)
+            results = [
+                run_level(runner, inputs, level, args.debates or max(4, level * 2), llms)
+                for level in levels
+            ]
+            report["results"][target] = results
+            print_results(target, results)
+    finally:
+        if client is not None:
+            client.close()
+        if api_proc is not None:
+            api_proc.terminate()
+            api_proc.wait()
+        for llm in llms:
+            llm.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""导入/启动耗时基准
+
+在全新的子进程中多次执行导入语句，输出耗时中位数，以及导入后已加载的重量级依赖。
+
+用法:
+    python benchmarks/import_time.py [--repeat 5]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT, "api")
+
+HEAVY_MODULES = ("crewai", "langchain_openai", "langchain_core", "langgraph", "httpx")
+
+CASES = [
+    ("import debate", "import debate", ROOT),
+    ("import debate.graph", "import debate.graph", ROOT),
+    ("build agents", "from debate.agents import get_agent; get_agent('bullish')", ROOT),
+    ("api startup (from app.main import app)", "from app.main import app", API_DIR),
+]
+
+REPORT = (
+    "; import sys; print(','.join(sorted({{m.split('.')[0] for m in sys.modules}} & set({heavy!r}))))"
+).format(heavy=HEAVY_MODULES)
+
+
+def run_case(statement, cwd):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", statement + REPORT],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+    return elapsed, proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else ""
+
+
+def main():
+    repeat = 5
+    if "--repeat" in sys.argv:
+        repeat = int(sys.argv[sys.argv.index("--repeat") + 1])
+
+    baseline, _ = run_case("pass", ROOT)
+    print(f"python 启动基线: {baseline * 1000:.0f} ms\n")
+    print(f"{'case':<42}{'median ms':>12}  loaded heavy modules")
+
+    for name, statement, cwd in CASES:
+        timings = []
+        loaded = ""
+        for _ in range(repeat):
+            elapsed, loaded = run_case(statement, cwd)
+            if elapsed is None:
+                break
+            timings.append(elapsed)
+        if not timings:
+            print(f"{name:<42}{'error':>12}  {loaded}")
+            continue
+        print(f"{name:<42}{statistics.median(timings) * 1000:>12.0f}  {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
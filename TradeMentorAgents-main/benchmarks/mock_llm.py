@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""离线的 OpenAI 兼容 LLM 模拟服务
+
+根据系统提示词中的智能体角色返回固定的看多/看空/交易决策回复（交易决策包含 Score: 行），
+按配置的延迟逐个 token 输出，结果完全确定，用于在不依赖真实模型的情况下测量 debate 流程自身的开销。
+
+接口:
+    POST /v1/chat/completions  支持 stream=true（SSE）和普通响应
+    GET  /v1/models
+    GET  /stats                调用次数、输出 token 数、生成耗时合计
+    POST /stats/reset
+
+用法:
+    python benchmarks/mock_llm.py [--port 8900] [--token-latency 0.002] [--first-token-latency 0.05] [--slots 4]
+    LLM_BASE_URL=http://127.0.0.1:8900/v1 python run_example.py
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# 角色 -> 固定回复；{score} 由交易决策分数替换
+CANNED_RESPONSES = {
+    "Bullish Investment Analyst": (
+        "## KEY BULLISH SIGNALS\n"
+        "Data center revenue keeps compounding and hyperscaler capex guidance was raised again. "
+        "Software and networking attach rates widen the moat beyond GPUs.\n\n"
+        "## COUNTER TO BEARISH POINTS\n"
+        "Export restrictions affect a minority of revenue and have been absorbed before. "
+        "Valuation compresses quickly at the current earnings growth rate.\n\n"
+        "## CONCLUSION\n"
+        "Risk/reward remains asymmetric to the upside over a 12-month horizon."
+    ),
+    "Bearish Risk Analyst": (
+        "## KEY RISKS\n"
+        "Customer concentration is high and several hyperscalers are building in-house accelerators. "
+        "Export controls can tighten without warning.\n\n"
+        "## COUNTER TO BULLISH POINTS\n"
+        "Capex cycles historically overshoot and then reverse sharply. "
+        "The multiple already discounts several years of flawless execution.\n\n"
+        "## CONCLUSION\n"
+        "Downside in a demand air pocket is larger than the market is pricing."
+    ),
+    "Trading Decision Strategist": (
+        "## ASSESSMENT OF BULLISH ARGUMENTS\n"
+        "Growth evidence is strong and well supported by recent results.\n\n"
+        "## ASSESSMENT OF BEARISH ARGUMENTS\n"
+        "Concentration and policy risks are real but not yet visible in the numbers.\n\n"
+        "## DECISION RATIONALE\n"
+        "Both sides present credible evidence; the debate should continue before committing.\n\n"
+        "## SCORE AND RECOMMENDATION\n"
+        "Score: {score}\n"
+        "Action: HOLD\n"
+        "Conviction: MEDIUM\n"
+        "Sizing: QUARTER position"
+    ),
+}
+
+DEFAULT_RESPONSE = "Acknowledged."
+
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # 默认的监听队列长度为 5，大量并发连接同时到达时会被重置
+    request_queue_size = 1024
+
+
+def split_tokens(text: str) -> List[str]:
+    """把回复按单词切成 token（保留空白），用于模拟逐 token 输出"""
+    return _TOKEN.findall(text)
+
+
+class MockLLMServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        token_latency: float = 0.002,
+        first_token_latency: float = 0.05,
+        trader_score: float = 5,
+        slots: int = 0
+    ):
+        """OpenAI 兼容的模拟 LLM 服务，在后台线程中运行
+
+        Args:
+            host: 监听地址
+            port: 监听端口，为 0 时自动选择空闲端口
+            token_latency: 每个 token 的输出间隔（秒）
+            first_token_latency: 首个 token 之前的等待时间（秒）
+            trader_score: 交易决策回复中的分数，默认 5（中性）使辩论跑满所有回合
+            slots: 同时生成的回复数上限（模拟模型服务的并行度，如 OLLAMA_NUM_PARALLEL），
+                超出的请求排队等待，为 0 时不限制
+        """
+        self.token_latency = token_latency
+        self.first_token_latency = first_token_latency
+        self.trader_score = trader_score
+        self.slots = threading.BoundedSemaphore(slots) if slots > 0 else None
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._tokens = 0
+        self._service_seconds = 0.0
+        self._httpd = _HTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """OpenAI 兼容接口地址，可直接用作 LLM_BASE_URL"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def respond(self, messages: List[Dict[str, Any]]) -> str:
+        """根据消息中的智能体角色选择回复
+
+        Args:
+            messages: chat completions 消息列表
+
+        Returns:
+            回复文本
+        """
+        prompt = "\n".join(str(message.get("content") or "") for message in messages)
+        text = DEFAULT_RESPONSE
+        for role, response in CANNED_RESPONSES.items():
+            if f"You are {role}" in prompt:
+                text = response.format(score=self.trader_score)
+                break
+        # crewAI 的提示词要求以 "Final Answer:" 给出结果，否则会判定为格式错误并重试
+        if "Final Answer:" in prompt:
+            text = "Thought: I now can give a great answer\nFinal Answer: " + text
+        return text
+
+    def record(self, tokens: int, elapsed: float) -> None:
+        with self._lock:
+            self._calls += 1
+            self._tokens += tokens
+            self._service_seconds += elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        """返回调用次数、输出 token 数和生成耗时合计"""
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "tokens": self._tokens,
+                "service_seconds": self._service_seconds,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._calls = 0
+            self._tokens = 0
+            self._service_seconds = 0.0
+
+
+def _make_handler(server: MockLLMServer) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _send_json(self, payload: Any, status: int = 200) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _write_chunk(self, data: bytes) -> None:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def do_GET(self) -> None:
+            if self.path == "/stats":
+                self._send_json(server.stats())
+            elif self.path.rstrip("/").endswith("/models"):
+                self._send_json({"object": "list", "data": [{"id": "mock", "object": "model"}]})
+            else:
+                self._send_json({"error": {"message": "not found"}}, status=404)
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+            if self.path == "/stats/reset":
+                server.reset_stats()
+                self._send_json({"status": "ok"})
+                return
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json({"error": {"message": "not found"}}, status=404)
+                return
+
+            if server.slots is None:
+                self._complete(body)
+                return
+            with server.slots:
+                self._complete(body)
+
+        def _complete(self, body: Dict[str, Any]) -> None:
+            started = time.perf_counter()
+            model = body.get("model", "mock")
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            tokens = split_tokens(server.respond(body.get("messages") or []))
+            time.sleep(server.first_token_latency)
+
+            if not body.get("stream"):
+                time.sleep(server.token_latency * len(tokens))
+                server.record(len(tokens), time.perf_counter() - started)
+                self._send_json({
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> bytes:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                return b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n"
+
+            self._write_chunk(chunk({"role": "assistant", "content": ""}))
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(server.token_latency)
+                self._write_chunk(chunk({"content": token}))
+            self._write_chunk(chunk({}, finish_reason="stop"))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+            server.record(len(tokens), time.perf_counter() - started)
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="离线的 OpenAI 兼容 LLM 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--token-latency", type=float, default=0.002, help="每个 token 的输出间隔（秒）")
+    parser.add_argument("--first-token-latency", type=float, default=0.05, help="首个 token 之前的等待时间（秒）")
+    parser.add_argument("--trader-score", type=float, default=5, help="交易决策回复中的分数")
+    parser.add_argument("--slots", type=int, default=0, help="同时生成的回复数上限，0 表示不限制")
+    args = parser.parse_args()
+
+    server = MockLLMServer(
+        host=args.host,
+        port=args.port,
+        token_latency=args.token_latency,
+        first_token_latency=args.first_token_latency,
+        trader_score=args.trader_score,
+        slots=args.slots
+    )
+    print(f"模拟 LLM 服务已启动: {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
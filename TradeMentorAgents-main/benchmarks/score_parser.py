@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""交易决策分数提取的吞吐量与一致性
+
+对比原先逐个正则扫描的实现（复制在下方的 legacy_extract_score）与 debate.scoring 的解析器，
+先在生成的决策文本上逐条核对两者提取的分数是否一致（不一致时以非零状态退出），再测量每条决策的耗时
+和批量接口（可选多进程）的吞吐量。
+
+用法:
+    python benchmarks/score_parser.py [--count 20000] [--processes 4] [--seed 0]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from debate.scoring import extract_score, extract_scores  # noqa: E402
+
+
+def legacy_extract_score(decision_text):
+    """原 Nodes.extract_score_from_decision（去掉调试输出）"""
+    if not decision_text:
+        return 5.0
+    potential_scores = []
+    try:
+        for line in decision_text.split("\n"):
+            line = line.strip()
+            if line.startswith("Score:"):
+                score_part = line.split("Score:")[1].strip()
+                potential_scores.append(float(score_part.split()[0].replace(',', '.')))
+    except Exception:
+        pass
+    for match in re.findall(r'Score:\s*(\d+(?:\.\d+)?)\s*(?:/10)?', decision_text, re.IGNORECASE):
+        score = float(match.replace(',', '.'))
+        if 0 <= score <= 10:
+            potential_scores.append(score)
+    for match in re.findall(r'(\d+(?:\.\d+)?)\s*(?:out of|\/)\s*10', decision_text, re.IGNORECASE):
+        score = float(match.replace(',', '.'))
+        if 0 <= score <= 10:
+            potential_scores.append(score)
+    match = re.search(r'SCORE AND RECOMMENDATION.*?(\d+(?:\.\d+)?)', decision_text, re.IGNORECASE | re.DOTALL)
+    if match:
+        score = float(match.group(1).replace(',', '.'))
+        if 0 <= score <= 10:
+            potential_scores.append(score)
+    valid_scores = [s for s in potential_scores if 0 <= s <= 10]
+    return valid_scores[0] if valid_scores else 5.0
+
+
+RATIONALE = (
+    "Revenue grew 12.5% year over year while margins compressed by 80 bps. "
+    "The stock trades at 24x forward earnings versus a 5-year average of 21x. "
+    "Bulls cite 3 new product launches in Q4; bears point to 2 downgrades this week. "
+)
+
+SCORE_LINES = [
+    "Score: {s}", "Score: {s}/10", "  Score: {s} ", "**Score:** {s}", "Score: [{s}]", "score: {s}",
+    "Final score: {s} out of 10", "I rate this {s}/10.", "Score: {s},", "Score:", "Score: N/A",
+    "Score: {big}", "Score: {s} (moderately bullish)", "SCORE: {s}", "Rating: {s}",
+]
+
+
+def make_decision(rng):
+    """生成一条格式有各种偏差的交易决策"""
+    s = rng.choice(["7", "6.5", "3", "10", "0", "8.25", "1", "9", "4,5"])
+    parts = [
+        "## ASSESSMENT OF BULLISH ARGUMENTS",
+        RATIONALE * rng.randint(1, 6),
+        "## ASSESSMENT OF BEARISH ARGUMENTS",
+        RATIONALE * rng.randint(1, 6),
+        "## DECISION RATIONALE",
+        RATIONALE * rng.randint(0, 4),
+    ]
+    if rng.random() < 0.9:
+        parts.append(rng.choice(["## SCORE AND RECOMMENDATION", "**Score and Recommendation**", "## Recommendation"]))
+    for _ in range(rng.choice([0, 1, 1, 1, 2])):
+        parts.append(rng.choice(SCORE_LINES).format(s=s, big=rng.choice(["12", "15.5", "100"])))
+    parts.append(rng.choice(["Action: BUY", "**Action:** SELL", "- Action: [HOLD]", "Action: buy now"]))
+    parts.append(rng.choice(["Conviction: HIGH", "Conviction: medium", ""]))
+    parts.append(rng.choice(["Sizing: HALF position", "Sizing: [QUARTER]", ""]))
+    tail = parts[-3:]
+    rng.shuffle(tail)
+    parts[-3:] = tail
+    return "\n".join(parts)
+
+
+def measure(fn, texts):
+    started = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[sys.argv.index("--count") + 1]) if "--count" in sys.argv else 20000
+    processes = int(sys.argv[sys.argv.index("--processes") + 1]) if "--processes" in sys.argv else 4
+    seed = int(sys.argv[sys.argv.index("--seed") + 1]) if "--seed" in sys.argv else 0
+
+    rng = random.Random(seed)
+    texts = [make_decision(rng) for _ in range(count)] + ["", "no score here", "SCORE AND RECOMMENDATION 42"]
+
+    mismatches = [(t, legacy_extract_score(t), extract_score(t)) for t in texts
+                  if legacy_extract_score(t) != extract_score(t)]
+    print(f"checked {len(texts)} decisions, {len(mismatches)} mismatches")
+    for text, old, new in mismatches[:5]:
+        print(f"  legacy={old} new={new}\n  {text[-200:]!r}")
+
+    print(f"{'case':<34}{'us/decision':>14}{'decisions/s':>14}")
+    for name, elapsed in (
+        ("legacy (4 regex passes)", measure(legacy_extract_score, texts)),
+        ("parse_decision", measure(extract_score, texts)),
+        ("extract_scores (1 process)", _timed(lambda: extract_scores(texts))),
+        (f"extract_scores ({processes} processes)", _timed(lambda: extract_scores(texts, processes=processes))),
+    ):
+        print(f"{name:<34}{elapsed / len(texts) * 1e6:>14.1f}{len(texts) / elapsed:>14.0f}")
+
+    if mismatches:
+        sys.exit(1)
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""每个请求在第一次 LLM 调用之前的开销
+
+对比每个请求都新建并编译 TradingWorkflow，与通过 get_workflow 复用已编译的工作流。
+两者都包括 initialize_state 和 prepare_inputs 节点（渲染输入），不调用 LLM。
+
+用法:
+    python benchmarks/workflow_overhead.py [--repeat 200]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from debate.graph import TradingWorkflow, clear_workflows, get_workflow  # noqa: E402
+from debate.state import get_sample_inputs, initialize_state  # noqa: E402
+
+
+def per_request_fresh(inputs):
+    workflow = TradingWorkflow(debug=False, max_rounds=4)
+    return workflow.nodes.prepare_inputs(initialize_state(inputs))
+
+
+def per_request_registry(inputs):
+    workflow = get_workflow(max_rounds=4)
+    return workflow.nodes.prepare_inputs(initialize_state(inputs))
+
+
+def measure(fn, inputs, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(inputs)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    repeat = 200
+    if "--repeat" in sys.argv:
+        repeat = int(sys.argv[sys.argv.index("--repeat") + 1])
+
+    inputs = get_sample_inputs()
+    clear_workflows()
+    # 预热：导入延迟加载的模块，并让注册表编译一次
+    per_request_fresh(inputs)
+    per_request_registry(inputs)
+
+    print(f"{'case':<34}{'median us':>12}{'p99 us':>12}")
+    for name, fn in (("new TradingWorkflow per request", per_request_fresh),
+                     ("get_workflow (compiled once)", per_request_registry)):
+        timings = sorted(measure(fn, inputs, repeat))
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{name:<34}{statistics.median(timings) * 1e6:>12.0f}{p99 * 1e6:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
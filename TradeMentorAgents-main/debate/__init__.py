@@ -1,20 +1,38 @@
-from debate.graph import run_trading_workflow, TradingWorkflow
-from debate.state import initialize_state, get_sample_inputs, State
-from debate.agents import bullish_researcher, bearish_researcher, trader_agent
-from debate.tasks import bullish_analysis_task, bearish_analysis_task, trader_decision_task
-from debate.nodes import Nodes
+import importlib
+from typing import Any
 
-__all__ = [
-    'run_trading_workflow',
-    'TradingWorkflow',
-    'initialize_state',
-    'get_sample_news',
-    'State',
-    'bullish_researcher',
-    'bearish_researcher',
-    'trader_agent',
-    'bullish_analysis_task',
-    'bearish_analysis_task',
-    'trader_decision_task',
-    'Nodes',
-] 
\ No newline at end of file
+# 导出名称 -> 所在模块。子模块在第一次访问对应名称时才导入，
+# 因此 `import debate` 不会加载 crewAI、langchain 或 langgraph
+_EXPORTS = {
+    'run_trading_workflow': 'debate.graph',
+    'run_trading_workflow_batch': 'debate.graph',
+    'TradingWorkflow': 'debate.graph',
+    'get_workflow': 'debate.graph',
+    'StoppingPolicy': 'debate.policy',
+    'initialize_state': 'debate.state',
+    'get_sample_inputs': 'debate.state',
+    'State': 'debate.state',
+    'bullish_researcher': 'debate.agents',
+    'bearish_researcher': 'debate.agents',
+    'trader_agent': 'debate.agents',
+    'get_agent': 'debate.agents',
+    'bullish_analysis_task': 'debate.tasks',
+    'bearish_analysis_task': 'debate.tasks',
+    'trader_decision_task': 'debate.tasks',
+    'Nodes': 'debate.nodes',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
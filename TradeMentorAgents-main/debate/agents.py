@@ -1,27 +1,101 @@
-from crewai import Agent
-from langchain_openai import ChatOpenAI
 import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from crewai import Agent
+    from debate.llm_client import RoutedLLMClient
+    from debate.router import LLMRouter
+
+from debate.timeouts import remaining_call
+
+AGENT_NAMES = ("bullish", "bearish", "trader")
+
+# LLM endpoint shared by the crewAI agents and the async client
+# Both can be overridden from the environment, e.g. to point at benchmarks/mock_llm.py
+LLM_MODEL = os.getenv("LLM_MODEL", "ollama/llama3.2:latest")  # Simplified model name for better compatibility
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:11434/v1")
+# Comma-separated OpenAI-compatible backends that calls are balanced across, see debate.router.parse_endpoints
+LLM_ENDPOINTS = os.getenv("LLM_ENDPOINTS") or LLM_BASE_URL
+# HTTP timeout of one LLM request in seconds when no per-call timeout or deadline applies (see _limit_request)
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "600"))
+# Per-agent models, e.g. LLM_MODEL_TRADER for a larger trader model; unset agents use LLM_MODEL
+AGENT_MODELS = {name: os.getenv(f"LLM_MODEL_{name.upper()}") or LLM_MODEL for name in AGENT_NAMES}
+
+def _limit_request(request: Any) -> None:
+    """Give each HTTP request at most the time left in the current LLM call (see debate.timeouts.limit_call)
+    
+    The timeout is set per request so the cached LLM instances and agents don't depend on it.
+    """
+    remaining = remaining_call()
+    if remaining is not None:
+        import httpx
+        request.extensions["timeout"] = httpx.Timeout(remaining).as_dict()
+
+@lru_cache()
+def get_http_client(base_url: str):
+    """Get the process-wide HTTP client for one backend, shared by all LLM instances that call it
+    
+    The client keeps the pool of keep-alive connections; requests made inside limit_call are limited to the time left.
+    """
+    import httpx
+    return httpx.Client(event_hooks={"request": [_limit_request]})
 
 # Configure LLM
-def get_llm():
-    """Get configured LLM instance"""
+def get_llm(model: Optional[str] = None, base_url: Optional[str] = None, timeout: Optional[float] = None):
+    """Get configured LLM instance for one model on one backend
+    
+    Args:
+        model: Model name, defaults to LLM_MODEL
+        base_url: Backend URL, defaults to LLM_BASE_URL
+        timeout: HTTP request timeout in seconds, defaults to LLM_TIMEOUT
+    """
+    # crewAI and langchain are imported on first use to keep `import debate` fast
+    from langchain_openai import ChatOpenAI
+    from debate.callbacks import TokenStreamHandler
+    
     # Set environment variables 
     os.environ["OPENAI_API_KEY"] = "dummy_key"  # Required by langchain-openai but not used with Ollama
     
     # Configure LLM with Ollama
+    # Streaming is enabled so generated tokens can be forwarded to /debate/stream clients
+    base_url = base_url or LLM_BASE_URL
     return ChatOpenAI(
-        model="ollama/llama3.2:latest",  # Simplified model name for better compatibility
-        base_url="http://localhost:11434/v1"
+        model=model or LLM_MODEL,
+        base_url=base_url,
+        streaming=True,
+        timeout=timeout or LLM_TIMEOUT,
+        http_client=get_http_client(base_url),
+        callbacks=[TokenStreamHandler()],
     )
 
-# Initialize LLM
-llm = get_llm()
+@lru_cache(maxsize=256)
+def get_shared_llm(model: Optional[str] = None, base_url: Optional[str] = None):
+    """Get the process-wide LLM instance for a model/backend, created on first use
+    
+    Instances for the same backend share its connection pool (see get_http_client).
+    """
+    return get_llm(model, base_url)
+
+@lru_cache()
+def get_router() -> "LLMRouter":
+    """Get the process-wide router over the LLM_ENDPOINTS backends"""
+    from debate.router import LLMRouter, parse_endpoints
+    return LLMRouter(parse_endpoints(LLM_ENDPOINTS))
+
+@lru_cache()
+def get_async_llm_client() -> "RoutedLLMClient":
+    """Get the process-wide async client that balances calls across the LLM_ENDPOINTS backends"""
+    from debate.llm_client import RoutedLLMClient
+    return RoutedLLMClient(get_router(), model=LLM_MODEL, timeout=LLM_TIMEOUT)
 
 # Define Agents
-bullish_researcher = Agent(
-    role='Bullish Investment Analyst',
-    goal='Identify compelling buying opportunities based on news and counter bearish arguments with data-driven insights',
-    backstory='''You are a former ARK Invest analyst who identified TSLA's 2019 breakout through supply chain analysis. 
+# Only the definitions live here; the crewAI Agents are built lazily by get_agent()
+AGENT_SPECS = {
+    "bullish": dict(
+        role='Bullish Investment Analyst',
+        goal='Identify compelling buying opportunities based on news and counter bearish arguments with data-driven insights',
+        backstory='''You are a former ARK Invest analyst who identified TSLA's 2019 breakout through supply chain analysis. 
     With 15+ years of experience in growth investing, you've developed an eye for spotting asymmetric risk/reward scenarios 
     with >3:1 payoff potential. You're known for your conviction and ability to see long-term value where others see risk.
     
@@ -33,16 +107,11 @@ bullish_researcher = Agent(
     5. You're skilled at refuting bearish arguments with data-driven counterpoints
     
     While you acknowledge risks, you believe that calculated risk-taking on high-conviction investments is the path to outperformance.''',
-    llm=llm,
-    verbose=True,
-    memory=True,
-    allow_delegation=False,
-)
-
-bearish_researcher = Agent(
-    role='Bearish Risk Analyst',
-    goal='Identify potential risks and valuation concerns based on news and challenge bullish narratives with historical precedents',
-    backstory='''You are a Lehman Brothers survivor specializing in counterparty risk analysis during liquidity crunches.
+    ),
+    "bearish": dict(
+        role='Bearish Risk Analyst',
+        goal='Identify potential risks and valuation concerns based on news and challenge bullish narratives with historical precedents',
+        backstory='''You are a Lehman Brothers survivor specializing in counterparty risk analysis during liquidity crunches.
     With 20+ years of experience navigating multiple market cycles, you've developed a finely-tuned radar for detecting 
     market euphoria, valuation disconnects, and hidden risks that others overlook.
     
@@ -55,16 +124,11 @@ bearish_researcher = Agent(
     
     While you acknowledge growth opportunities, you believe that risk management and avoiding permanent capital loss 
     are essential to long-term investment success.''',
-    llm=llm,
-    verbose=True,
-    memory=True,
-    allow_delegation=False,
-)
-
-trader_agent = Agent(
-    role='Trading Decision Strategist',
-    goal='Synthesize conflicting analyses to make optimal risk-adjusted trading decisions',
-    backstory='''You are a seasoned portfolio manager with experience at Goldman Sachs' SIGMA X trading desk,
+    ),
+    "trader": dict(
+        role='Trading Decision Strategist',
+        goal='Synthesize conflicting analyses to make optimal risk-adjusted trading decisions',
+        backstory='''You are a seasoned portfolio manager with experience at Goldman Sachs' SIGMA X trading desk,
     now enhanced with data science expertise. You've developed a systematic approach to evaluating conflicting
     investment theses and making decisive trading calls that balance opportunity and risk.
     
@@ -77,8 +141,58 @@ trader_agent = Agent(
     
     You believe that superior returns come from analytical rigor, emotional discipline, and making
     accurate probability-weighted decisions rather than seeking certainty.''',
-    llm=llm,
-    verbose=True,
-    memory=True,
-    allow_delegation=False,
-) 
\ No newline at end of file
+    ),
+}
+
+# Legacy module attribute names -> agent names
+_AGENT_ALIASES = {
+    "bullish_researcher": "bullish",
+    "bearish_researcher": "bearish",
+    "trader_agent": "trader",
+}
+
+_AGENT_BY_ROLE = {spec["role"]: name for name, spec in AGENT_SPECS.items()}
+
+@lru_cache(maxsize=256)
+def get_agent(name: str, base_url: Optional[str] = None) -> "Agent":
+    """Get the process-wide agent for "bullish", "bearish" or "trader", created on first use
+    
+    Args:
+        name: Agent name
+        base_url: Backend the agent's LLM calls go to, defaults to the first of LLM_ENDPOINTS
+    """
+    from crewai import Agent
+    
+    return Agent(
+        **AGENT_SPECS[name],
+        llm=get_shared_llm(AGENT_MODELS[name], base_url or get_router().endpoints[0].base_url),
+        verbose=True,
+        # Agents are shared by every debate in the process; per-debate memory lives in debate.memory instead
+        memory=False,
+        allow_delegation=False,
+    )
+
+def agent_model(agent: Any) -> str:
+    """Model assigned to an agent (LLM_MODEL for agents not defined here)"""
+    name = _AGENT_BY_ROLE.get(agent.role)
+    return AGENT_MODELS[name] if name else LLM_MODEL
+
+def routed_agent(agent: Any, base_url: str) -> Any:
+    """The same agent with its LLM calls sent to base_url (agents not defined here are returned as is)
+    
+    Args:
+        agent: Agent to route
+        base_url: Backend chosen by LLMRouter
+    """
+    name = _AGENT_BY_ROLE.get(agent.role)
+    if not name:
+        return agent
+    return get_agent(name, base_url)
+
+def __getattr__(name: str) -> Any:
+    # Keep `from debate.agents import llm, bullish_researcher, ...` working without eager construction
+    if name == "llm":
+        return get_shared_llm()
+    if name in _AGENT_ALIASES:
+        return get_agent(_AGENT_ALIASES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# 缓存条目：(响应文本, 生成该响应耗费的秒数)
+CacheEntry = Tuple[str, float]
+
+
+def make_cache_key(role: str, description: str, model: Optional[str]) -> str:
+    """根据智能体角色、渲染后的任务描述和模型名称生成缓存键
+
+    Args:
+        role: 智能体角色
+        description: 渲染后的 Task.description
+        model: 模型名称
+
+    Returns:
+        sha256 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    for part in (role, model or "", description):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def hash_inputs(inputs: Any) -> str:
+    """计算输入数据的规范化哈希：键排序、紧凑 JSON，与字段顺序和空白无关
+
+    Args:
+        inputs: 输入数据列表（字典或 pydantic 模型）
+
+    Returns:
+        sha256 十六进制摘要
+    """
+    items = [item.model_dump() if hasattr(item, "model_dump") else item for item in inputs or []]
+    canonical = json.dumps(items, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_model_name(llm: Any) -> Optional[str]:
+    """获取 LLM 客户端使用的模型名称"""
+    for attr in ("model_name", "model"):
+        name = getattr(llm, attr, None)
+        if isinstance(name, str):
+            return name
+    return None
+
+
+class MemoryCache:
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        """进程内 LRU 缓存
+
+        Args:
+            max_entries: 最大条目数，超出后淘汰最久未使用的条目
+            ttl: 条目有效期（秒），为 None 时不过期
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, elapsed, created_at = entry
+            if self.ttl is not None and time.time() - created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value, elapsed
+
+    def set(self, key: str, value: str, elapsed: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, elapsed, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    # 每写入多少次检查一次容量
+    EVICT_EVERY = 64
+
+    def __init__(self, path: str, ttl: Optional[float] = 86400, max_entries: int = 100000):
+        """基于 SQLite 的磁盘缓存，支持多进程共享同一文件
+
+        Args:
+            path: SQLite 文件路径
+            ttl: 条目有效期（秒），为 None 时不过期
+            max_entries: 最大条目数，超出后按最近访问时间淘汰
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, elapsed REAL NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, elapsed, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, elapsed, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value, elapsed
+
+    def set(self, key: str, value: str, elapsed: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, elapsed, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, elapsed, now, now)
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """删除过期条目，并在超出容量时删除最久未访问的条目（调用方需持有锁）"""
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    def __init__(self, memory: Optional[MemoryCache] = None, disk: Optional[SQLiteCache] = None):
+        """两级 LLM 响应缓存：进程内 LRU 在前，可选的磁盘缓存在后
+
+        Args:
+            memory: 进程内缓存，为 None 时使用默认大小的 MemoryCache
+            disk: 磁盘缓存，为 None 时只使用进程内缓存
+        """
+        self.memory = memory if memory is not None else MemoryCache()
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._saved_seconds = 0.0
+
+    def get(self, key: str) -> Optional[str]:
+        """查询缓存，命中时累计节省的生成时间
+
+        Args:
+            key: 由 make_cache_key 生成的缓存键
+
+        Returns:
+            缓存的响应文本，未命中时返回 None
+        """
+        entry = self.memory.get(key)
+        tier = "memory"
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            tier = "disk"
+            if entry is not None:
+                self.memory.set(key, *entry)
+
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            if tier == "memory":
+                self._memory_hits += 1
+            else:
+                self._disk_hits += 1
+            self._saved_seconds += entry[1]
+        return entry[0]
+
+    def set(self, key: str, value: str, elapsed: float) -> None:
+        """写入缓存
+
+        Args:
+            key: 由 make_cache_key 生成的缓存键
+            value: 响应文本
+            elapsed: 生成该响应耗费的秒数
+        """
+        self.memory.set(key, value, elapsed)
+        if self.disk is not None:
+            self.disk.set(key, value, elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中/未命中计数及节省的 LLM 生成时间"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "saved_seconds": self._saved_seconds,
+                "memory_entries": len(self.memory),
+            }
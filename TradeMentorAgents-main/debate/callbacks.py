@@ -0,0 +1,17 @@
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from debate.streaming import emit_token
+from debate.timeouts import check_call
+
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """将 LLM 生成的 token 转发给当前任务绑定的事件接收函数，超过调用时限时中断生成"""
+
+    # check_call 抛出的超时异常需要传出回调，结束正在进行的生成
+    raise_error = True
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        check_call()
+        emit_token(token)
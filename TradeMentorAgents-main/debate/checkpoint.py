@@ -0,0 +1,78 @@
+import os
+from typing import Any
+
+
+def _ensure_directory(path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+# 检查点中保存的自定义类型，需要显式允许反序列化
+CHECKPOINT_TYPES = [("debate.state", "DebateRound")]
+
+
+def _serializer() -> Any:
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+    try:
+        return JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_TYPES)
+    except TypeError:  # 较早的版本不限制反序列化的类型
+        return None
+
+
+def make_checkpointer(path: str) -> Any:
+    """创建保存在本地 SQLite 文件中的 LangGraph 检查点存储（同步执行路径使用）
+
+    每个节点完成后保存一次状态，可被多个线程共用；多个进程可以共用同一个文件。
+
+    Args:
+        path: SQLite 文件路径
+
+    Returns:
+        SqliteSaver
+
+    Raises:
+        ImportError: 未安装 langgraph-checkpoint-sqlite
+    """
+    import sqlite3
+
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    _ensure_directory(path)
+    return SqliteSaver(sqlite3.connect(path, check_same_thread=False, timeout=30), serde=_serializer())
+
+
+def make_async_checkpointer(path: str) -> Any:
+    """创建异步执行路径使用的 SQLite 检查点存储，必须在事件循环中调用，且只能在该事件循环中使用
+
+    Args:
+        path: SQLite 文件路径
+
+    Returns:
+        AsyncSqliteSaver
+
+    Raises:
+        ImportError: 未安装 langgraph-checkpoint-sqlite 或 aiosqlite
+    """
+    import aiosqlite
+
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    _ensure_directory(path)
+    # 连接在第一次读写检查点时才建立
+    return AsyncSqliteSaver(aiosqlite.connect(path, timeout=30), serde=_serializer())
+
+
+async def aclose_checkpointer(checkpointer: Any) -> None:
+    """关闭异步检查点存储的 aiosqlite 连接，结束其工作线程（否则进程退出时会一直等待该线程）
+
+    Args:
+        checkpointer: make_async_checkpointer 创建的 AsyncSqliteSaver
+    """
+    await checkpointer.conn.close()
+
+
+def thread_config(request_id: str) -> dict:
+    """每个 debate 以 request_id 作为 LangGraph 线程 ID 保存检查点"""
+    return {"configurable": {"thread_id": request_id}}
@@ -0,0 +1,187 @@
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+from debate.metrics import estimate_tokens
+from debate.scoring import parse_decision
+
+# 估算 token 数时每个 token 约 4 个字符，与 metrics.estimate_tokens 一致
+CHARS_PER_TOKEN = 4
+ELLIPSIS = " …"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+_HEADING = re.compile(r"^(?:#{1,6}\s+(.*?)|([A-Z][A-Z0-9 &/'()-]{2,}):?)\s*$")
+_BULLET = re.compile(r"^(?:[-*•]|\d+[.)])\s+")
+
+
+class ContextBudget(NamedTuple):
+    """每个任务提示词中辩论上下文的 token 预算
+
+    超出预算的分析按要点抽取压缩，使后面回合的提示词与第一轮大小相当。
+    可哈希、可 pickle，可直接作为已编译工作流的缓存键。
+    """
+    # 看多/看空任务中引用的对方上一份分析，为 None 时不压缩
+    rebuttal: Optional[int] = 800
+    # 交易决策任务中本轮的两份分析合计，为 None 时不压缩
+    trader: Optional[int] = 1600
+    # 交易决策任务中之前回合的滚动摘要，为 None 时不提供摘要
+    history: Optional[int] = 400
+    # 看多/看空任务中该智能体自己之前各轮观点的要点（debate 内的记忆），为 None 时不使用记忆
+    memory: Optional[int] = 300
+    # 第一轮之后的看多/看空任务和交易决策任务使用简要输入（新闻正文截断、价格只保留摘要），
+    # 会丢失输入中的信息，默认关闭：所有任务使用同一份完整的规范化输入
+    brief_inputs: bool = False
+
+    def validate(self) -> "ContextBudget":
+        """检查参数是否合法
+
+        Returns:
+            自身，便于链式调用
+
+        Raises:
+            ValueError: 预算不是正数
+        """
+        for name, value in self._asdict().items():
+            if isinstance(value, bool):
+                continue
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} 必须大于 0")
+        return self
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """在单词边界截断到 max_chars 个字符以内"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max(0, max_chars - len(ELLIPSIS))]
+    space = cut.rfind(" ")
+    if space > len(cut) // 2:
+        cut = cut[:space]
+    return cut.rstrip() + ELLIPSIS
+
+
+def _first_sentence(text: str) -> str:
+    return _SENTENCE_END.split(text, 1)[0]
+
+
+def _sections(text: str) -> List[Tuple[Optional[str], List[str]]]:
+    """按标题拆分为 (标题, 要点列表)，每个段落或列表项取第一句作为要点"""
+    sections: List[Tuple[Optional[str], List[str]]] = [(None, [])]
+    paragraph: List[str] = []
+
+    def flush() -> None:
+        if paragraph:
+            sections[-1][1].append(_first_sentence(" ".join(paragraph)))
+            paragraph.clear()
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            flush()
+            continue
+        heading = _HEADING.match(stripped)
+        if heading:
+            flush()
+            sections.append((heading.group(1) or heading.group(2), []))
+        elif _BULLET.match(stripped):
+            flush()
+            paragraph.append(_BULLET.sub("", stripped))
+            flush()
+        else:
+            paragraph.append(stripped)
+    flush()
+    return [(heading, points) for heading, points in sections if points]
+
+
+def key_points(text: str, max_tokens: Optional[int]) -> str:
+    """将分析压缩到 max_tokens 以内，未超出时原样返回
+
+    保留各部分标题，按顺序轮流从每个部分取一个要点（段落或列表项的第一句），
+    直到用完预算，使每个部分都有代表；单个要点也放不下时截断原文。
+
+    Args:
+        text: 分析文本
+        max_tokens: token 预算，为 None 时不压缩
+
+    Returns:
+        压缩后的文本
+    """
+    text = (text or "").strip()
+    if max_tokens is None or estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    sections = _sections(text)
+    # 标题先占用预算
+    used = sum(len(heading) + 4 for heading, _ in sections if heading)
+    chosen = [0] * len(sections)
+    depth = 0
+    progress = True
+    while progress:
+        progress = False
+        for i, (_, points) in enumerate(sections):
+            if depth < len(points) and chosen[i] == depth:
+                cost = len(points[depth]) + 3
+                if used + cost <= budget:
+                    used += cost
+                    chosen[i] += 1
+                    progress = True
+        depth += 1
+
+    lines = []
+    for (heading, points), count in zip(sections, chosen):
+        if not count:
+            continue
+        if heading:
+            lines.append(f"## {heading}")
+        lines.extend(f"- {point}" for point in points[:count])
+    if not lines:
+        return _truncate(" ".join(text.split()), budget)
+    return "\n".join(lines)
+
+
+def one_line(text: str) -> str:
+    """把要点合并为一行"""
+    parts = [line.lstrip("#- ").strip() for line in text.splitlines()]
+    return " / ".join(part for part in parts if part)
+
+
+def round_summary(round_num: int, bullish: str, bearish: str, decision: str, max_tokens: int) -> str:
+    """单个回合的摘要：交易决策分数和操作，以及双方分析的要点
+
+    Args:
+        round_num: 回合数（从1开始）
+        bullish: 看多分析
+        bearish: 看空分析
+        decision: 交易决策
+        max_tokens: 摘要所属的滚动摘要的 token 预算，每份分析使用其四分之一
+
+    Returns:
+        摘要文本
+    """
+    parsed = parse_decision(decision)
+    header = f"Round {round_num}: score {parsed.score:g}"
+    if parsed.action:
+        header += f", {parsed.action}"
+    side_tokens = max(1, max_tokens // 4)
+    return (
+        f"{header}\n"
+        f"Bullish: {one_line(key_points(bullish, side_tokens))}\n"
+        f"Bearish: {one_line(key_points(bearish, side_tokens))}"
+    )
+
+
+def roll_summary(summary: Optional[str], entry: str, max_tokens: int) -> str:
+    """将新回合的摘要追加到滚动摘要中，超出预算时先丢弃最早的回合
+
+    Args:
+        summary: 之前回合的滚动摘要
+        entry: 新回合的摘要
+        max_tokens: token 预算
+
+    Returns:
+        新的滚动摘要
+    """
+    entries = (summary.split("\n\n") if summary else []) + [entry]
+    while len(entries) > 1 and estimate_tokens("\n\n".join(entries)) > max_tokens:
+        entries.pop(0)
+    return _truncate("\n\n".join(entries), max_tokens * CHARS_PER_TOKEN)
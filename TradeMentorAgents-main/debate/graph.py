@@ -1,31 +1,90 @@
-from typing import Dict, Any, Optional, List, TypedDict, Literal, Union, cast
+from typing import Dict, Any, Optional, List, TypedDict, Literal, Union, Iterator, AsyncIterator, Tuple, Callable, cast
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
+import threading
+import time
+import uuid
 
 from langgraph.graph import StateGraph, START, END
 
 from debate.state import State, initialize_state, InputData
+from debate.cache import hash_inputs
+from debate.checkpoint import thread_config
 from debate.nodes import Nodes
+from debate.policy import StoppingPolicy
+from debate.context import ContextBudget
+from debate.scheduler import Schedule, TokenScheduler
+from debate.streaming import EventSink
+from debate.cache import ResponseCache
+from debate.sinks import AsyncArtifactWriter
+from debate import metrics
 
 class TradingWorkflow:
-    def __init__(self, debug: bool = False, max_rounds: int = 4):
+    def __init__(
+        self,
+        debug: bool = False,
+        max_rounds: int = 4,
+        cache: Optional[ResponseCache] = None,
+        pipelined: bool = False,
+        artifacts: Optional[AsyncArtifactWriter] = None,
+        policy: Optional[StoppingPolicy] = None,
+        checkpointer: Optional[Any] = None,
+        async_checkpointer: Optional[Any] = None,
+        context: Optional[ContextBudget] = None,
+        scheduler: Optional[TokenScheduler] = None,
+        call_timeout: Optional[float] = None
+    ):
         """初始化交易决策工作流
         
         Args:
             debug: 是否启用调试模式
-            max_rounds: 最大辩论回合数
+            max_rounds: 最大辩论回合数，提供 policy 时以 policy.max_rounds 为准
+            cache: LLM 响应缓存，为 None 时不使用缓存
+            pipelined: 是否让下一轮看多分析与本轮交易决策并发执行
+            artifacts: 任务输出写入器，为 None 时不保存每轮输出
+            policy: 辩论结束条件（最大回合数、提前结束的分数阈值、收敛检测），
+                为 None 时只限制最大回合数，其余使用默认值
+            checkpointer: LangGraph 检查点存储（如 debate.checkpoint.make_checkpointer），
+                提供 request_id 运行时每个节点完成后保存状态，失败后可从最后完成的回合继续
+            async_checkpointer: 异步执行路径使用的检查点存储（如 make_async_checkpointer）
+            context: 各任务提示词中辩论上下文的 token 预算，为 None 时使用默认预算
+            scheduler: LLM 调用的 token 预算调度器，可在多个工作流间共用，为 None 时不限制
+            call_timeout: 单次 LLM 调用的超时（秒），仍然超时时 debate 以已完成回合的结果结束，为 None 时不限制
         """
         self.debug = debug
-        self.max_rounds = max_rounds
+        self.checkpointer = checkpointer
+        self.async_checkpointer = async_checkpointer
+        self.policy = (policy or StoppingPolicy(max_rounds=max_rounds)).validate()
+        self.max_rounds = self.policy.max_rounds
         
         # 初始化节点处理类
-        self.nodes = Nodes(debug=debug)
+        self.nodes = Nodes(
+            debug=debug, cache=cache, pipelined=pipelined, artifacts=artifacts, policy=self.policy, context=context,
+            scheduler=scheduler, call_timeout=call_timeout
+        )
+        
+        # 编译工作流；异步版本在第一次使用时再编译
+        self.app = self._build_graph(self.nodes.run_analysis_round, checkpointer)
+        self._async_app = None
+        self._async_app_lock = threading.Lock()
+    
+    def _build_graph(self, run_analysis_round: Callable, checkpointer: Optional[Any] = None) -> Any:
+        """创建并编译状态图
         
+        Args:
+            run_analysis_round: 分析轮次节点函数（同步或异步版本）
+            checkpointer: 检查点存储，为 None 时不保存检查点
+            
+        Returns:
+            编译后的工作流
+        """
         # 创建状态图
         workflow = StateGraph(State)
         
         # 添加节点
         workflow.add_node("prepare_inputs", self.nodes.prepare_inputs)
-        workflow.add_node("run_analysis_round", self.nodes.run_analysis_round)
+        workflow.add_node("run_analysis_round", run_analysis_round)
         workflow.add_node("finalize_decision", self.nodes.finalize_decision)
         
         # 设置入口点
@@ -44,36 +103,368 @@ class TradingWorkflow:
         workflow.add_edge("finalize_decision", END)
         
         # 编译工作流
-        self.app = workflow.compile()
+        return workflow.compile(checkpointer=checkpointer)
+    
+    @property
+    def async_app(self) -> Any:
+        """使用异步 LLM 调用路径的编译工作流"""
+        if self._async_app is None:
+            with self._async_app_lock:
+                if self._async_app is None:
+                    self._async_app = self._build_graph(self.nodes.arun_analysis_round, self.async_checkpointer)
+        return self._async_app
+    
+    def _config(
+        self,
+        checkpointer: Optional[Any],
+        request_id: Optional[str],
+        event_sink: Optional[EventSink] = None,
+        schedule: Optional[Schedule] = None
+    ) -> Optional[Dict[str, Any]]:
+        """构造运行配置：启用检查点且提供了 request_id 时以它作为线程 ID
+
+        调度参数只属于本次运行、不保存到检查点，从检查点继续时使用新的截止时间。
+        """
+        configurable: Dict[str, Any] = {}
+        if checkpointer is not None and request_id:
+            configurable.update(thread_config(request_id)["configurable"])
+        if event_sink:
+            configurable["event_sink"] = event_sink
+        if schedule is not None:
+            configurable["schedule"] = schedule
+        return {"configurable": configurable} if configurable else None
+    
+    def _initial_input(
+        self,
+        inputs: List[InputData],
+        request_id: Optional[str],
+        snapshot: Optional[Any]
+    ) -> Optional[State]:
+        """同一 request_id 有输入相同的未完成检查点时返回 None（从检查点继续），否则返回新的初始状态"""
+        if snapshot is not None and snapshot.next:
+            values = snapshot.values
+            if values.get("input_hash") or values.get("inputs"):
+                checkpoint_hash = values.get("input_hash") or hash_inputs(values.get("inputs"))
+                if checkpoint_hash == hash_inputs(inputs):
+                    metrics.DEBATE_RESUMES.inc()
+                    if self.debug:
+                        print(f"从检查点继续 debate {request_id}（已完成 {len(values.get('debate_rounds') or [])} 轮）")
+                    return None
+        return initialize_state(inputs, request_id, stop_policy=self.policy._asdict())
     
-    def run(self, inputs: List[InputData]) -> Dict[str, Any]:
+    def _get_snapshot(self, config: Optional[Dict[str, Any]]) -> Optional[Any]:
+        if config is None or "thread_id" not in config["configurable"]:
+            return None
+        return self.app.get_state(config)
+    
+    async def _aget_snapshot(self, config: Optional[Dict[str, Any]]) -> Optional[Any]:
+        if config is None or "thread_id" not in config["configurable"]:
+            return None
+        return await self.async_app.aget_state(config)
+    
+    def _forget(self, config: Optional[Dict[str, Any]]) -> None:
+        """debate 成功结束后删除它的检查点"""
+        if config is not None and "thread_id" in config["configurable"]:
+            self.checkpointer.delete_thread(config["configurable"]["thread_id"])
+    
+    async def _aforget(self, config: Optional[Dict[str, Any]]) -> None:
+        if config is not None and "thread_id" in config["configurable"]:
+            await self.async_checkpointer.adelete_thread(config["configurable"]["thread_id"])
+    
+    def checkpoint(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """获取未完成的 debate 最后保存的状态，没有未完成的检查点时返回 None"""
+        snapshot = self._get_snapshot(self._config(self.checkpointer, request_id))
+        return snapshot.values if snapshot is not None and snapshot.next else None
+    
+    async def acheckpoint(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """checkpoint 的异步版本"""
+        snapshot = await self._aget_snapshot(self._config(self.async_checkpointer, request_id))
+        return snapshot.values if snapshot is not None and snapshot.next else None
+    
+    def resume(self, request_id: str, schedule: Optional[Schedule] = None) -> Optional[Dict[str, Any]]:
+        """从最后一个检查点继续未完成的 debate，已完成的回合不会重新调用 LLM
+        
+        Args:
+            request_id: 原请求的 ID
+            schedule: 本次运行的调度参数（优先级、截止时间）
+            
+        Returns:
+            最终状态，没有未完成的检查点时返回 None
+        """
+        config = self._config(self.checkpointer, request_id, schedule=schedule)
+        snapshot = self._get_snapshot(config)
+        if snapshot is None or not snapshot.next:
+            return None
+        metrics.DEBATE_RESUMES.inc()
+        
+        started = time.perf_counter()
+        try:
+            result = self.app.invoke(None, config)
+        finally:
+            self.nodes.release(request_id)
+        metrics.WORKFLOW_SECONDS.labels(mode="invoke").observe(time.perf_counter() - started)
+        self._forget(config)
+        return result
+    
+    async def aresume(self, request_id: str, schedule: Optional[Schedule] = None) -> Optional[Dict[str, Any]]:
+        """resume 的异步版本"""
+        config = self._config(self.async_checkpointer, request_id, schedule=schedule)
+        snapshot = await self._aget_snapshot(config)
+        if snapshot is None or not snapshot.next:
+            return None
+        metrics.DEBATE_RESUMES.inc()
+        
+        started = time.perf_counter()
+        try:
+            result = await self.async_app.ainvoke(None, config)
+        finally:
+            self.nodes.release(request_id)
+        metrics.WORKFLOW_SECONDS.labels(mode="ainvoke").observe(time.perf_counter() - started)
+        await self._aforget(config)
+        return result
+    
+    def run(
+        self,
+        inputs: List[InputData],
+        request_id: Optional[str] = None,
+        schedule: Optional[Schedule] = None
+    ) -> Dict[str, Any]:
         """运行交易决策工作流
         
+        启用检查点且提供了 request_id 时，同一 request_id 之前失败的 debate 会从最后完成的回合继续。
+        
         Args:
             inputs: 输入数据列表，每个元素包含类型、数据和日期
+            request_id: 请求 ID，为 None 时自动生成
+            schedule: 本次运行的调度参数（优先级、截止时间），到达截止时间时返回已完成回合的结果（timed_out 为 "deadline"）
             
         Returns:
             最终状态
         """
-        # 初始化状态
-        state = initialize_state(inputs)
+        # 初始化状态，或从检查点继续
+        config = self._config(self.checkpointer, request_id, schedule=schedule)
+        request_id = request_id or uuid.uuid4().hex
+        state = self._initial_input(inputs, request_id, self._get_snapshot(config))
             
         if self.debug:
             print("开始运行交易决策工作流")
             
-        # 运行工作流
-        result = self.app.invoke(state)
+        # 运行工作流，无论成功与否都清理本次 debate 预先启动的任务和记忆
+        started = time.perf_counter()
+        try:
+            result = self.app.invoke(state, config)
+        finally:
+            self.nodes.release(request_id)
+        metrics.WORKFLOW_SECONDS.labels(mode="invoke").observe(time.perf_counter() - started)
+        self._forget(config)
         
         if self.debug:
             print("交易决策工作流完成")
             
         return result
+    
+    def stream(
+        self,
+        inputs: List[InputData],
+        event_sink: Optional[EventSink] = None,
+        request_id: Optional[str] = None,
+        schedule: Optional[Schedule] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """以流式方式运行交易决策工作流
+        
+        每个节点完成时产出一次（节点名称, 节点完成后的状态）；
+        提供 event_sink 时，智能体生成的 token 会实时发送给它。
+        
+        Args:
+            inputs: 输入数据列表，每个元素包含类型、数据和日期
+            event_sink: token 事件接收函数
+            request_id: 请求 ID，为 None 时自动生成
+            schedule: 本次运行的调度参数（优先级、截止时间），到达截止时间时返回已完成回合的结果（timed_out 为 "deadline"）
+            
+        Yields:
+            (节点名称, 状态) 元组
+        """
+        config = self._config(self.checkpointer, request_id, event_sink, schedule)
+        request_id = request_id or uuid.uuid4().hex
+        state = self._initial_input(inputs, request_id, self._get_snapshot(config))
+        
+        started = time.perf_counter()
+        try:
+            for chunk in self.app.stream(state, config=config, stream_mode="updates"):
+                for node_name, node_state in chunk.items():
+                    if self.debug:
+                        print(f"节点 {node_name} 完成")
+                    yield node_name, node_state
+        finally:
+            self.nodes.release(request_id)
+        metrics.WORKFLOW_SECONDS.labels(mode="stream").observe(time.perf_counter() - started)
+        self._forget(config)
+    
+    async def ainvoke(
+        self,
+        inputs: List[InputData],
+        request_id: Optional[str] = None,
+        schedule: Optional[Schedule] = None
+    ) -> Dict[str, Any]:
+        """异步运行交易决策工作流
+        
+        LLM 调用通过共享连接池的异步客户端发出，不为每次调用占用线程。
+        
+        Args:
+            inputs: 输入数据列表，每个元素包含类型、数据和日期
+            request_id: 请求 ID，为 None 时自动生成
+            schedule: 本次运行的调度参数（优先级、截止时间），到达截止时间时返回已完成回合的结果（timed_out 为 "deadline"）
+            
+        Returns:
+            最终状态
+        """
+        config = self._config(self.async_checkpointer, request_id, schedule=schedule)
+        request_id = request_id or uuid.uuid4().hex
+        state = self._initial_input(inputs, request_id, await self._aget_snapshot(config))
+        
+        started = time.perf_counter()
+        try:
+            result = await self.async_app.ainvoke(state, config)
+        finally:
+            self.nodes.release(request_id)
+        metrics.WORKFLOW_SECONDS.labels(mode="ainvoke").observe(time.perf_counter() - started)
+        await self._aforget(config)
+        return result
+    
+    async def astream(
+        self,
+        inputs: List[InputData],
+        event_sink: Optional[EventSink] = None,
+        request_id: Optional[str] = None,
+        schedule: Optional[Schedule] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """以流式方式异步运行交易决策工作流，产出内容与 stream 相同
+        
+        Args:
+            inputs: 输入数据列表，每个元素包含类型、数据和日期
+            event_sink: token 事件接收函数
+            request_id: 请求 ID，为 None 时自动生成
+            schedule: 本次运行的调度参数（优先级、截止时间），到达截止时间时返回已完成回合的结果（timed_out 为 "deadline"）
+            
+        Yields:
+            (节点名称, 状态) 元组
+        """
+        config = self._config(self.async_checkpointer, request_id, event_sink, schedule)
+        request_id = request_id or uuid.uuid4().hex
+        state = self._initial_input(inputs, request_id, await self._aget_snapshot(config))
+        
+        started = time.perf_counter()
+        try:
+            async for chunk in self.async_app.astream(state, config=config, stream_mode="updates"):
+                for node_name, node_state in chunk.items():
+                    if self.debug:
+                        print(f"节点 {node_name} 完成")
+                    yield node_name, node_state
+        finally:
+            self.nodes.release(request_id)
+        metrics.WORKFLOW_SECONDS.labels(mode="astream").observe(time.perf_counter() - started)
+        await self._aforget(config)
+
+
+class _Identity:
+    """按对象身份比较的键，持有对象的引用，对象存活期间它的 id 不会被复用"""
+    __slots__ = ("obj",)
+
+    def __init__(self, obj: Any):
+        self.obj = obj
+
+    def __hash__(self) -> int:
+        return id(self.obj)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Identity) and other.obj is self.obj
+
+
+# 同时保留的已编译工作流数上限，结束条件可由请求指定，超出时淘汰最久未使用的
+MAX_WORKFLOWS = 32
+
+# 已编译的工作流，按配置区分：(结束条件, 上下文预算, 单次调用超时, debug, pipelined, 模型, 缓存, 输出写入器, 检查点存储, 调度器)
+_WORKFLOWS: "OrderedDict[Tuple[Any, ...], TradingWorkflow]" = OrderedDict()
+_WORKFLOWS_LOCK = threading.Lock()
+
+
+def get_workflow(
+    max_rounds: int = 4,
+    debug: bool = False,
+    cache: Optional[ResponseCache] = None,
+    pipelined: bool = False,
+    artifacts: Optional[AsyncArtifactWriter] = None,
+    policy: Optional[StoppingPolicy] = None,
+    checkpointer: Optional[Any] = None,
+    async_checkpointer: Optional[Any] = None,
+    context: Optional[ContextBudget] = None,
+    scheduler: Optional[TokenScheduler] = None,
+    call_timeout: Optional[float] = None
+) -> TradingWorkflow:
+    """获取指定配置的工作流，每种配置在进程内只编译一次
+    
+    返回的工作流可被多个请求并发使用：编译后的 LangGraph 应用不保存运行状态，
+    每次运行的状态都由 initialize_state 重新创建。缓存、输出写入器、检查点存储和调度器按对象身份区分；
+    最多保留 MAX_WORKFLOWS 个工作流，被淘汰的工作流仍可被正在使用它的请求继续使用。
+    
+    Args:
+        max_rounds: 最大辩论回合数
+        debug: 是否启用调试模式
+        cache: LLM 响应缓存，为 None 时不使用缓存
+        pipelined: 是否让下一轮看多分析与本轮交易决策并发执行
+        artifacts: 任务输出写入器，为 None 时不保存每轮输出
+        policy: 辩论结束条件，提供时忽略 max_rounds
+        checkpointer: 检查点存储，为 None 时不保存检查点
+        async_checkpointer: 异步执行路径使用的检查点存储
+        context: 各任务提示词中辩论上下文的 token 预算，为 None 时使用默认预算
+        scheduler: LLM 调用的 token 预算调度器，为 None 时不限制
+        call_timeout: 单次 LLM 调用的超时（秒），为 None 时不限制
+        
+    Returns:
+        编译好的工作流
+    """
+    policy = (policy or StoppingPolicy(max_rounds=max_rounds)).validate()
+    context = (context or ContextBudget()).validate()
+    # 智能体的模型在每次调用时才确定（见 debate.agents.get_agent），与编译后的图无关，不计入配置
+    key = (policy, context, call_timeout, debug, pipelined,
+           *(_Identity(obj) for obj in (cache, artifacts, checkpointer, async_checkpointer, scheduler)))
+    with _WORKFLOWS_LOCK:
+        workflow = _WORKFLOWS.get(key)
+        if workflow is not None:
+            _WORKFLOWS.move_to_end(key)
+            return workflow
+        workflow = TradingWorkflow(
+            debug=debug,
+            cache=cache,
+            pipelined=pipelined,
+            artifacts=artifacts,
+            policy=policy,
+            checkpointer=checkpointer,
+            async_checkpointer=async_checkpointer,
+            context=context,
+            scheduler=scheduler,
+            call_timeout=call_timeout
+        )
+        _WORKFLOWS[key] = workflow
+        if len(_WORKFLOWS) > MAX_WORKFLOWS:
+            _WORKFLOWS.popitem(last=False)
+        return workflow
+
+
+def clear_workflows() -> None:
+    """清空已编译的工作流（配置变化或测试时使用）"""
+    with _WORKFLOWS_LOCK:
+        _WORKFLOWS.clear()
 
 
 def run_trading_workflow(
     inputs: List[InputData], 
     max_rounds: int = 4,
-    debug: bool = False
+    debug: bool = False,
+    cache: Optional[ResponseCache] = None,
+    pipelined: bool = False,
+    artifacts: Optional[AsyncArtifactWriter] = None,
+    policy: Optional[StoppingPolicy] = None
 ) -> Dict[str, Any]:
     """运行交易决策工作流
     
@@ -81,9 +472,67 @@ def run_trading_workflow(
         inputs: 输入数据列表，每个元素包含类型、数据和日期
         max_rounds: 最大辩论回合数
         debug: 是否启用调试模式
+        cache: LLM 响应缓存，为 None 时不使用缓存
+        pipelined: 是否让下一轮看多分析与本轮交易决策并发执行
+        artifacts: 任务输出写入器，为 None 时不保存每轮输出
+        policy: 辩论结束条件，提供时忽略 max_rounds
         
     Returns:
         最终状态
     """
-    workflow = TradingWorkflow(debug=debug, max_rounds=max_rounds)
-    return workflow.app.invoke(initialize_state(inputs)) 
\ No newline at end of file
+    workflow = get_workflow(
+        max_rounds=max_rounds,
+        debug=debug,
+        cache=cache,
+        pipelined=pipelined,
+        artifacts=artifacts,
+        policy=policy
+    )
+    return workflow.run(inputs)
+
+
+def run_trading_workflow_batch(
+    jobs: List[List[InputData]],
+    max_rounds: int = 4,
+    debug: bool = False,
+    cache: Optional[ResponseCache] = None,
+    pipelined: bool = False,
+    artifacts: Optional[AsyncArtifactWriter] = None,
+    policy: Optional[StoppingPolicy] = None,
+    max_concurrency: int = 8
+) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+    """并发运行多个交易决策工作流，按完成顺序返回结果
+    
+    所有任务共用同一个编译好的工作流，同时运行的任务数不超过 max_concurrency，
+    应根据 LLM 后端可同时处理的请求数设置。
+    
+    Args:
+        jobs: 每个任务的输入数据列表
+        max_rounds: 最大辩论回合数
+        debug: 是否启用调试模式
+        cache: LLM 响应缓存，为 None 时不使用缓存
+        pipelined: 是否让下一轮看多分析与本轮交易决策并发执行
+        artifacts: 任务输出写入器，为 None 时不保存每轮输出
+        policy: 辩论结束条件，提供时忽略 max_rounds
+        max_concurrency: 同时运行的任务数上限
+        
+    Yields:
+        (任务下标, 最终状态, 异常) 元组，成功时异常为 None，失败时最终状态为 None
+    """
+    workflow = get_workflow(
+        max_rounds=max_rounds,
+        debug=debug,
+        cache=cache,
+        pipelined=pipelined,
+        artifacts=artifacts,
+        policy=policy
+    )
+    
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="debate-batch") as pool:
+        futures = {pool.submit(workflow.run, inputs): index for index, inputs in enumerate(jobs)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                yield index, future.result(), None
+            except Exception as e:
+                yield index, None, e
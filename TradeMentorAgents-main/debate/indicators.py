@@ -0,0 +1,184 @@
+import math
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# 每年的交易日数，用于年化波动率
+TRADING_DAYS = 252
+# 计算的区间收益率（交易日数）
+RETURN_WINDOWS = (1, 5, 20, 60, 252)
+# 计算的简单移动平均线（交易日数）
+SMA_WINDOWS = (20, 50, 200)
+RSI_WINDOW = 14
+VOLUME_WINDOW = 20
+VOLATILITY_WINDOW = 20
+
+
+class PriceSeries(NamedTuple):
+    """按日期升序排列的列式价格数据"""
+    dates: List[str]
+    close: "np.ndarray"
+    volume: Optional["np.ndarray"]  # 没有成交量数据时为 None
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def to_series(prices: List[Mapping[str, Any]]) -> PriceSeries:
+    """将 {"date", "close", "volume"} 行列表转换为列式数组
+
+    按日期升序排列，同一日期只保留最后一行，收盘价缺失或不是数字的行会被丢弃。
+
+    Args:
+        prices: 价格行列表
+
+    Returns:
+        列式价格数据
+    """
+    import numpy as np
+
+    rows = {}
+    for row in prices:
+        if isinstance(row, Mapping):
+            rows[str(row.get("date", ""))] = row
+    dates = sorted(rows)
+
+    close = np.array([_to_float(rows[date].get("close")) for date in dates], dtype=np.float64)
+    volume = np.array([_to_float(rows[date].get("volume")) for date in dates], dtype=np.float64)
+    valid = np.isfinite(close) & (close > 0)
+    dates = [date for date, keep in zip(dates, valid) if keep]
+    close, volume = close[valid], volume[valid]
+    return PriceSeries(dates, close, volume if np.isfinite(volume).all() and len(volume) else None)
+
+
+def compute_indicators(series: PriceSeries) -> Dict[str, Any]:
+    """计算收益率、波动率、均线、RSI、成交量 z-score 等指标
+
+    数据不足以计算某个指标时对应的值为 None（区间收益率和均线只包含数据足够的窗口）。
+
+    Args:
+        series: 列式价格数据
+
+    Returns:
+        指标字典
+    """
+    import numpy as np
+
+    close = series.close
+    bars = len(close)
+    if bars == 0:
+        return {"bars": 0}
+
+    last = float(close[-1])
+    log_returns = np.diff(np.log(close))
+    running_max = np.maximum.accumulate(close)
+
+    indicators: Dict[str, Any] = {
+        "bars": bars,
+        "start": series.dates[0],
+        "end": series.dates[-1],
+        "last_close": last,
+        "returns": {window: last / float(close[-1 - window]) - 1 for window in RETURN_WINDOWS if bars > window},
+        "period_return": last / float(close[0]) - 1,
+        "volatility": None,
+        "period_volatility": None,
+        "sma": {},
+        "rsi": None,
+        "high": float(close.max()),
+        "low": float(close.min()),
+        "max_drawdown": float((close / running_max - 1).min()),
+        "last_volume": None,
+        "volume_zscore": None,
+    }
+
+    # 对数收益率的年化标准差
+    if len(log_returns) >= 2:
+        indicators["period_volatility"] = float(log_returns.std(ddof=1) * math.sqrt(TRADING_DAYS))
+    if len(log_returns) >= VOLATILITY_WINDOW:
+        indicators["volatility"] = float(log_returns[-VOLATILITY_WINDOW:].std(ddof=1) * math.sqrt(TRADING_DAYS))
+
+    # 简单移动平均线：用累积和一次算出所有窗口
+    cumulative = np.concatenate(([0.0], np.cumsum(close)))
+    for window in SMA_WINDOWS:
+        if bars >= window:
+            indicators["sma"][window] = float((cumulative[-1] - cumulative[-1 - window]) / window)
+
+    # 最近 RSI_WINDOW 个交易日的平均涨幅与平均跌幅（简单平均 RSI）
+    if bars > RSI_WINDOW:
+        changes = np.diff(close[-RSI_WINDOW - 1:])
+        gain = float(np.clip(changes, 0, None).mean())
+        loss = float(-np.clip(changes, None, 0).mean())
+        indicators["rsi"] = 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+
+    # 最新成交量相对之前 VOLUME_WINDOW 个交易日的 z-score
+    if series.volume is not None:
+        indicators["last_volume"] = float(series.volume[-1])
+        if bars > VOLUME_WINDOW:
+            previous = series.volume[-VOLUME_WINDOW - 1:-1]
+            std = float(previous.std(ddof=1))
+            if std > 0:
+                indicators["volume_zscore"] = (float(series.volume[-1]) - float(previous.mean())) / std
+    return indicators
+
+
+def _pct(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:+.2%}"
+
+
+def format_indicators(indicators: Dict[str, Any], brief: bool = False) -> List[str]:
+    """将指标格式化为固定行数的摘要，行数不随价格数据的长度变化
+
+    Args:
+        indicators: compute_indicators 的结果
+        brief: 简要模式只保留收益率、波动率、RSI 和成交量
+
+    Returns:
+        摘要行
+    """
+    if not indicators.get("bars"):
+        return []
+
+    last = indicators["last_close"]
+    returns = " ".join(f"{window}d {_pct(value)}" for window, value in indicators["returns"].items())
+    lines = [
+        f"{indicators['bars']} bars {indicators['start']}..{indicators['end']}, last close {last:.2f}",
+        f"Returns: {returns + ' ' if returns else ''}period {_pct(indicators['period_return'])}",
+    ]
+
+    volatility = indicators["volatility"]
+    period_volatility = indicators["period_volatility"]
+    if volatility is not None or period_volatility is not None:
+        parts = []
+        if volatility is not None:
+            parts.append(f"{VOLATILITY_WINDOW}d {volatility:.1%}")
+        if period_volatility is not None:
+            parts.append(f"period {period_volatility:.1%}")
+        lines.append(f"Volatility (annualized): {' '.join(parts)}")
+
+    if not brief and indicators["sma"]:
+        lines.append("SMA: " + " ".join(
+            f"{window}d {value:.2f} ({last / value - 1:+.1%})" for window, value in indicators["sma"].items()
+        ))
+
+    if indicators["rsi"] is not None:
+        lines.append(f"RSI({RSI_WINDOW}): {indicators['rsi']:.1f}")
+
+    if not brief:
+        high, low = indicators["high"], indicators["low"]
+        lines.append(
+            f"Range: high {high:.2f} ({last / high - 1:+.1%}) low {low:.2f} ({last / low - 1:+.1%}), "
+            f"max drawdown {indicators['max_drawdown']:.1%}"
+        )
+
+    if indicators["last_volume"] is not None:
+        zscore = indicators["volume_zscore"]
+        line = f"Volume: last {indicators['last_volume']:.0f}"
+        if zscore is not None:
+            line += f", z-score vs {VOLUME_WINDOW}d {zscore:+.2f}"
+        lines.append(line)
+    return lines
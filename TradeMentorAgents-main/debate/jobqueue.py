@@ -0,0 +1,435 @@
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobLostError(RuntimeError):
+    """执行任务的 worker 多次退出（租约过期），任务不再重试"""
+
+
+class JobCancelledError(RuntimeError):
+    """任务在开始执行前被取消"""
+
+
+class Job(NamedTuple):
+    """worker 领取的任务"""
+    id: int
+    payload: bytes  # pickle 后的 (函数, 参数)
+    attempts: int  # 包括本次在内的执行次数
+    created_at: float
+
+    def load(self) -> Tuple[Callable[..., Any], Tuple[Any, ...]]:
+        """反序列化出要执行的函数和参数"""
+        return pickle.loads(self.payload)
+
+
+def _dump_error(exc: BaseException) -> bytes:
+    """序列化异常，无法 pickle 时转换为 RuntimeError"""
+    try:
+        return pickle.dumps(exc)
+    except Exception:
+        return pickle.dumps(RuntimeError(f"{type(exc).__name__}: {exc}"))
+
+
+class JobQueue:
+    # 等待任务完成时查询数据库的间隔（秒）
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, path: str, lease: float = 60.0, max_attempts: int = 3):
+        """基于 SQLite 的本地任务队列，API 进程写入任务，worker 进程领取并执行，不需要外部消息队列
+
+        任务为 pickle 后的 (模块顶层函数, 参数)，与进程池执行器的要求相同。worker 领取任务时获得租约，
+        运行期间定期续约；worker 退出导致租约过期的任务重新排队（最多 max_attempts 次），
+        配合检查点可从最后完成的回合继续。待执行的任务按优先级、截止时间和提交顺序领取。
+        流式任务的事件通过 JobChannel 写入同一个数据库。
+
+        Args:
+            path: SQLite 文件路径，API 进程和所有 worker 进程使用同一个文件
+            lease: 租约时长（秒），worker 每隔三分之一租约续约一次
+            max_attempts: 每个任务最多执行的次数
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, status TEXT NOT NULL, priority INTEGER NOT NULL, deadline REAL, "
+            "payload BLOB NOT NULL, result BLOB, error BLOB, worker TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "lease_until REAL, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        # deadline 为 NULL 的任务排在有截止时间的任务之后
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_queued ON jobs (status, priority DESC, deadline IS NULL, deadline, id)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_until)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_events ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, event BLOB)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_events_channel ON job_events (channel, seq)")
+        self._conn.commit()
+
+        # 当前进程中等待任务完成的协程，由一个后台协程统一查询
+        self._waiters: Dict[int, "asyncio.Future[Any]"] = {}
+        self._poller: Optional["asyncio.Task[None]"] = None
+        self._requeued_at = 0.0
+
+    # ---- API 进程 ----
+
+    def put(
+        self,
+        fn: Callable[..., Any],
+        args: Sequence[Any] = (),
+        priority: int = 0,
+        deadline: Optional[float] = None
+    ) -> int:
+        """提交任务
+
+        Args:
+            fn: 模块顶层函数
+            args: 函数参数，必须可以 pickle
+            priority: 优先级，越大越先执行
+            deadline: 截止时间（Unix 时间戳），相同优先级时早的先执行
+
+        Returns:
+            任务 ID
+        """
+        payload = pickle.dumps((fn, tuple(args)))
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (status, priority, deadline, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                (QUEUED, priority, deadline, payload, time.time())
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def cancel(self, job_id: int) -> bool:
+        """取消尚未开始执行的任务，已经开始的任务会继续运行
+
+        Returns:
+            是否取消成功
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED)
+            )
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def _finished(self, job_ids: Sequence[int]) -> List[Tuple[int, str, Optional[bytes], Optional[bytes]]]:
+        placeholders = ", ".join("?" * len(job_ids))
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT id, status, result, error FROM jobs WHERE id IN ({placeholders}) "
+                f"AND status IN (?, ?, ?)",
+                (*job_ids, *FINISHED)
+            ).fetchall()
+
+    async def _poll(self) -> None:
+        """定期查询所有等待中的任务，完成后唤醒对应的协程"""
+        while self._waiters:
+            await asyncio.sleep(self.POLL_INTERVAL)
+            job_ids = list(self._waiters)
+            if not job_ids:
+                break
+            for job_id, status, result, error in await asyncio.to_thread(self._finished, job_ids):
+                future = self._waiters.pop(job_id, None)
+                if future is None or future.done():
+                    continue
+                if status == DONE:
+                    future.set_result(pickle.loads(result))
+                elif status == FAILED:
+                    future.set_exception(pickle.loads(error))
+                else:
+                    future.set_exception(JobCancelledError(f"任务 {job_id} 已取消"))
+
+    async def wait(self, job_id: int) -> Any:
+        """等待任务完成并返回结果
+
+        Raises:
+            任务抛出的异常；JobLostError: worker 多次退出；JobCancelledError: 任务已取消
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[job_id] = future
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll())
+        try:
+            return await future
+        finally:
+            self._waiters.pop(job_id, None)
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: int = 0,
+        deadline: Optional[float] = None,
+        on_submit: Optional[Callable[[int], None]] = None
+    ) -> Any:
+        """提交任务并等待结果；等待被取消时取消尚未开始的任务
+
+        Args:
+            fn: 模块顶层函数
+            *args: 函数参数
+            priority: 优先级
+            deadline: 截止时间（Unix 时间戳）
+            on_submit: 任务写入队列后以任务 ID 调用
+
+        Returns:
+            函数返回值
+        """
+        job_id = await asyncio.to_thread(self.put, fn, args, priority, deadline)
+        if on_submit is not None:
+            on_submit(job_id)
+        try:
+            return await self.wait(job_id)
+        except asyncio.CancelledError:
+            await asyncio.shield(asyncio.to_thread(self.cancel, job_id))
+            raise
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """查询任务的状态，已完成的任务包括返回值，失败的任务包括异常；任务不存在（或已被清理）时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, result, error, attempts, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, result, error, attempts, created_at, started_at, finished_at = row
+        return {
+            "id": job_id,
+            "status": status,
+            "attempts": attempts,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "result": pickle.loads(result) if result is not None else None,
+            "error": pickle.loads(error) if error is not None else None,
+        }
+
+    def channel(self) -> "JobChannel":
+        """创建新的事件通道"""
+        return JobChannel(self.path, uuid.uuid4().hex)
+
+    def stats(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+        counts.update(dict(rows))
+        return counts
+
+    # ---- worker 进程 ----
+
+    def requeue_expired(self) -> int:
+        """将租约已过期（worker 已退出）的任务重新排队，达到最大执行次数的任务标记为失败
+
+        Returns:
+            处理的任务数
+        """
+        now = time.time()
+        error = _dump_error(JobLostError(f"执行任务的 worker 已退出 {self.max_attempts} 次"))
+        with self._lock:
+            failed = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, worker = NULL, finished_at = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, error, now, RUNNING, now, self.max_attempts)
+            ).rowcount
+            requeued = self._conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_until = NULL WHERE status = ? AND lease_until < ?",
+                (QUEUED, RUNNING, now)
+            ).rowcount
+            self._conn.commit()
+        return failed + requeued
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """领取下一个任务并获得租约，没有待执行的任务时返回 None
+
+        Args:
+            worker: worker 标识
+
+        Returns:
+            领取的任务
+        """
+        now = time.time()
+        # 每隔半个租约检查一次过期的任务
+        if now - self._requeued_at >= self.lease / 2:
+            self._requeued_at = now
+            self.requeue_expired()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, lease_until = ?, started_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = ? "
+                "ORDER BY priority DESC, deadline IS NULL, deadline, id LIMIT 1) "
+                "RETURNING id, payload, attempts, created_at",
+                (RUNNING, worker, now + self.lease, now, QUEUED)
+            ).fetchone()
+            self._conn.commit()
+        return Job(*row) if row is not None else None
+
+    def heartbeat(self, job_ids: Iterable[int], worker: str) -> None:
+        """为 worker 正在执行的任务续约"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+        placeholders = ", ".join("?" * len(job_ids))
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET lease_until = ? WHERE worker = ? AND status = ? AND id IN ({placeholders})",
+                (time.time() + self.lease, worker, RUNNING, *job_ids)
+            )
+            self._conn.commit()
+
+    def _finish(self, job_id: int, worker: str, status: str, result: Optional[bytes], error: Optional[bytes]) -> bool:
+        # 租约过期后任务可能已被重新排队并由其他 worker 领取，只有仍持有任务的 worker 可以记录结果
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, payload = x'', lease_until = NULL, finished_at = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (status, result, error, time.time(), job_id, worker, RUNNING)
+            ).rowcount
+            self._conn.commit()
+        return updated > 0
+
+    def complete(self, job_id: int, worker: str, result: Any) -> bool:
+        """记录任务结果
+
+        Args:
+            job_id: 任务 ID
+            worker: 领取任务的 worker 标识
+            result: 任务的返回值
+
+        Returns:
+            是否已记录；任务已不属于该 worker（租约过期后被重新领取或已结束）时返回 False
+        """
+        try:
+            data = pickle.dumps(result)
+        except Exception as e:
+            return self.fail(job_id, worker, e)
+        return self._finish(job_id, worker, DONE, data, None)
+
+    def fail(self, job_id: int, worker: str, exc: BaseException) -> bool:
+        """记录任务抛出的异常，返回值同 complete"""
+        return self._finish(job_id, worker, FAILED, None, _dump_error(exc))
+
+    def prune(self, retention: float) -> int:
+        """删除结束超过 retention 秒的任务
+
+        Returns:
+            删除的任务数
+        """
+        cutoff = time.time() - retention
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?", (*FINISHED, cutoff)
+            ).rowcount
+            self._conn.commit()
+        return deleted
+
+    # ---- 事件通道 ----
+
+    def append_events(self, channel: str, events: List[Optional[Dict[str, Any]]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO job_events (channel, event) VALUES (?, ?)",
+                [(channel, pickle.dumps(event) if event is not None else None) for event in events]
+            )
+            self._conn.commit()
+
+    def read_events(self, channel: str, after: int) -> List[Tuple[int, Optional[Dict[str, Any]]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, event FROM job_events WHERE channel = ? AND seq > ? ORDER BY seq", (channel, after)
+            ).fetchall()
+        return [(seq, pickle.loads(event) if event is not None else None) for seq, event in rows]
+
+    def delete_events(self, channel: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM job_events WHERE channel = ?", (channel,))
+            self._conn.commit()
+
+
+@lru_cache()
+def open_queue(path: str) -> JobQueue:
+    """获取进程内共享的任务队列连接（供 JobChannel 使用）"""
+    return JobQueue(path)
+
+
+class JobChannel:
+    # worker 中缓冲 token 事件的最长时间（秒）和条数，其他事件立即写入
+    FLUSH_INTERVAL = 0.05
+    FLUSH_SIZE = 64
+    # API 进程中没有新事件时查询的间隔（秒）
+    FETCH_INTERVAL = 0.05
+
+    def __init__(self, path: str, channel_id: str):
+        """跨进程的事件队列
+
+        worker 中的流式任务 put 事件，API 进程在事件循环中 await aget 读取（数据库查询在线程中执行）；
+        事件保存在任务队列的数据库中，可以 pickle 后随任务一起提交。读取方 await aclose 时删除该通道的事件。
+
+        Args:
+            path: 任务队列的 SQLite 文件路径
+            channel_id: 通道 ID
+        """
+        self.path = path
+        self.channel_id = channel_id
+        self._pending: List[Optional[Dict[str, Any]]] = []
+        self._flushed_at = time.monotonic()
+        self._received: Deque[Optional[Dict[str, Any]]] = deque()
+        self._last_seq = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"path": self.path, "channel_id": self.channel_id}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["path"], state["channel_id"])
+
+    def put(self, event: Optional[Dict[str, Any]]) -> None:
+        """写入事件，token 事件合并后批量写入"""
+        self._pending.append(event)
+        now = time.monotonic()
+        if (event is None or event.get("type") != "token" or len(self._pending) >= self.FLUSH_SIZE
+                or now - self._flushed_at >= self.FLUSH_INTERVAL):
+            open_queue(self.path).append_events(self.channel_id, self._pending)
+            self._pending = []
+            self._flushed_at = now
+
+    async def aget(self) -> Optional[Dict[str, Any]]:
+        """等待并读取下一个事件，没有新事件时每隔 FETCH_INTERVAL 查询一次"""
+        job_queue = open_queue(self.path)
+        while not self._received:
+            for seq, event in await asyncio.to_thread(job_queue.read_events, self.channel_id, self._last_seq):
+                self._last_seq = seq
+                self._received.append(event)
+            if not self._received:
+                await asyncio.sleep(self.FETCH_INTERVAL)
+        return self._received.popleft()
+
+    async def aclose(self) -> None:
+        """读取方不再读取时调用，删除该通道的事件"""
+        await asyncio.to_thread(open_queue(self.path).delete_events, self.channel_id)
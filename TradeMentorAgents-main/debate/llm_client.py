@@ -0,0 +1,217 @@
+import asyncio
+import json
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from debate.timeouts import DeadlineExceeded, LLMTimeoutError, call_budget, timeout_error
+
+if TYPE_CHECKING:
+    import httpx
+    from debate.router import Endpoint, LLMRouter
+
+# litellm 风格的模型名称带有提供方前缀（如 "ollama/llama3.2:latest"），直接调用接口时需要去掉
+_PROVIDER_PREFIXES = ("ollama/", "openai/")
+
+
+def strip_provider_prefix(model: str) -> str:
+    for prefix in _PROVIDER_PREFIXES:
+        if model.startswith(prefix):
+            return model[len(prefix):]
+    return model
+
+
+def is_backend_error(exc: BaseException) -> bool:
+    """连接错误、超时、限流和服务端错误由后端引起，可以换一个后端重试（debate 截止时间已到时不重试）"""
+    import httpx
+
+    if isinstance(exc, LLMTimeoutError):
+        return not isinstance(exc, DeadlineExceeded)
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return isinstance(exc, httpx.TransportError)
+
+
+def build_messages(agent: Any, task: Any) -> List[Dict[str, str]]:
+    """根据 crewAI 的 Agent 和 Task 构造 chat completions 消息
+
+    Args:
+        agent: 智能体，使用其 role、goal、backstory
+        task: 任务，使用其 description、expected_output
+
+    Returns:
+        消息列表
+    """
+    system = f"You are {agent.role}. {agent.backstory}\nYour personal goal is: {agent.goal}"
+    user = task.description
+    if getattr(task, "expected_output", None):
+        user += f"\n\nThis is the expected criteria for your final answer: {task.expected_output}"
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
+class AsyncLLMClient:
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: str = "dummy_key",
+        timeout: float = 600.0,
+        max_connections: int = 1000,
+        max_keepalive_connections: int = 100
+    ):
+        """OpenAI 兼容接口的异步客户端，所有调用共用一个连接池
+
+        Args:
+            base_url: 接口地址，例如 "http://localhost:11434/v1"
+            model: 模型名称
+            api_key: API 密钥
+            timeout: 单次请求超时（秒）
+            max_connections: 连接池最大连接数
+            max_keepalive_connections: 保持存活的空闲连接数
+        """
+        import httpx
+
+        self.base_url = base_url.rstrip("/")
+        self.model = strip_provider_prefix(model)
+        self.api_key = api_key
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        import httpx
+
+        # httpx.AsyncClient 绑定创建时的事件循环，事件循环变化时重新创建
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=self.limits
+            )
+            self._loop = loop
+        return self._client
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        on_token: Optional[Callable[[str], None]] = None,
+        model: Optional[str] = None,
+        **params: Any
+    ) -> str:
+        """调用 chat completions 接口并返回完整回复
+
+        Args:
+            messages: 消息列表
+            on_token: token 回调，提供时使用流式接口，每收到一段内容调用一次
+            model: 覆盖默认模型
+            **params: 其他请求参数（如 temperature）
+
+        Returns:
+            回复文本
+        """
+        client = self._get_client()
+        payload = {
+            "model": strip_provider_prefix(model) if model else self.model,
+            "messages": messages,
+            **params
+        }
+
+        if on_token is None:
+            response = await client.post("/chat/completions", json=payload)
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"] or ""
+
+        payload["stream"] = True
+        parts = []
+        async with client.stream("POST", "/chat/completions", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    parts.append(delta)
+                    on_token(delta)
+        return "".join(parts)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class RoutedLLMClient:
+    def __init__(self, router: "LLMRouter", model: str, **client_options: Any):
+        """通过 LLMRouter 在多个后端之间分配调用的异步客户端，接口与 AsyncLLMClient 相同
+
+        每个后端使用各自的 AsyncLLMClient（独立的保持连接的连接池）。后端出错时在其他后端重试，
+        已经输出 token 的流式调用不会重试，以免重复输出。
+
+        Args:
+            router: 后端路由
+            model: 默认模型名称
+            **client_options: 传给每个 AsyncLLMClient 的参数（如 timeout、max_connections）
+        """
+        self.router = router
+        self.model = model
+        self._clients = {
+            endpoint.base_url: AsyncLLMClient(base_url=endpoint.base_url, model=model, **client_options)
+            for endpoint in router.endpoints
+        }
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        on_token: Optional[Callable[[str], None]] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        **params: Any
+    ) -> str:
+        """选择一个后端调用 chat completions 接口并返回完整回复，其他参数与 AsyncLLMClient.complete 相同
+
+        Args:
+            timeout: 每个后端上单次调用的超时（秒），超时的后端视为出错，换其他后端重试
+            deadline: 截止时间（Unix 时间戳），到达时结束调用且不再重试
+
+        Raises:
+            LLMTimeoutError: 调用超时且没有其他后端可以重试
+            DeadlineExceeded: 截止时间已到
+        """
+        model = model or self.model
+        streamed = False
+
+        def forward(delta: str) -> None:
+            nonlocal streamed
+            streamed = True
+            on_token(delta)
+
+        async def attempt(endpoint: "Endpoint") -> str:
+            client = self._clients[endpoint.base_url]
+            call = client.complete(messages, on_token=forward if on_token else None, model=model, **params)
+            try:
+                budget = call_budget(timeout, deadline)
+            except DeadlineExceeded:
+                call.close()
+                raise
+            try:
+                return await asyncio.wait_for(call, budget)
+            except asyncio.TimeoutError:
+                raise timeout_error(timeout, deadline) from None
+
+        return await self.router.acall(model, attempt, lambda exc: not streamed and is_backend_error(exc))
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
@@ -0,0 +1,116 @@
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from debate import metrics
+from debate.context import key_points, one_line
+from debate.metrics import estimate_tokens
+from debate.state import DebateRound
+
+# 一个进程内同时保留的 debate 记忆数上限，异常结束、没有释放的记忆按最久未使用淘汰
+MAX_SCOPES = 4096
+
+# 每轮分析中写入记忆的智能体
+MEMORY_AGENTS = ("bullish", "bearish")
+
+
+class DebateMemory:
+    def __init__(self, max_tokens: int):
+        """单个 debate 的智能体记忆：按顺序保存每个智能体之前各轮观点的要点
+
+        不计算向量、不写磁盘，只在进程内保存，debate 结束时随 MemoryStore.release 释放。
+
+        Args:
+            max_tokens: 每个智能体回忆内容的 token 预算，单条记忆压缩到预算的一半以内，至少能回忆最近两轮
+        """
+        self.max_tokens = max_tokens
+        self._agents = array("B")
+        self._rounds = array("H")
+        self._points: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def add(self, agent: str, round_num: int, text: str) -> None:
+        """记录智能体在第 round_num 轮（从1开始）的输出，只保存其要点"""
+        self._agents.append(MEMORY_AGENTS.index(agent))
+        self._rounds.append(round_num)
+        self._points.append(one_line(key_points(text, max(1, self.max_tokens // 2))))
+
+    def truncate(self, rounds: int) -> None:
+        """丢弃第 rounds 轮之后的记忆（重新运行未完成的回合时使用）"""
+        keep = len(self._rounds)
+        while keep and self._rounds[keep - 1] > rounds:
+            keep -= 1
+        del self._agents[keep:], self._rounds[keep:], self._points[keep:]
+
+    def recall(self, agent: str) -> Optional[str]:
+        """按时间顺序返回智能体之前各轮的要点，超出预算时只保留最近的几轮
+
+        Returns:
+            回忆内容，没有记忆时返回 None
+        """
+        index = MEMORY_AGENTS.index(agent)
+        lines: List[str] = []
+        used = 0
+        for i in range(len(self._points) - 1, -1, -1):
+            if self._agents[i] != index:
+                continue
+            line = f"Round {self._rounds[i]}: {self._points[i]}"
+            cost = estimate_tokens(line)
+            if lines and used + cost > self.max_tokens:
+                break
+            lines.append(line)
+            used += cost
+        return "\n".join(reversed(lines)) or None
+
+
+class MemoryStore:
+    def __init__(self, max_tokens: int, max_scopes: int = MAX_SCOPES):
+        """按 request_id 区分的 debate 记忆，可被多个线程和并发 debate 共用
+
+        记忆可以由已完成的回合重建，因此从检查点继续、在其他进程中运行或被淘汰后都能恢复。
+
+        Args:
+            max_tokens: 每个智能体回忆内容的 token 预算
+            max_scopes: 同时保留的 debate 记忆数上限
+        """
+        self.max_tokens = max_tokens
+        self.max_scopes = max_scopes
+        self._scopes: "OrderedDict[str, DebateMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._scopes)
+
+    def scope(self, request_id: str, rounds: Sequence[DebateRound]) -> DebateMemory:
+        """获取 debate 的记忆，不存在时由已完成的回合重建
+
+        Args:
+            request_id: 请求 ID
+            rounds: 已完成的回合
+
+        Returns:
+            该 debate 的记忆
+        """
+        with self._lock:
+            memory = self._scopes.get(request_id)
+            if memory is not None:
+                self._scopes.move_to_end(request_id)
+                return memory
+            memory = DebateMemory(self.max_tokens)
+            for round_num, debate_round in enumerate(rounds, 1):
+                memory.add("bullish", round_num, debate_round.bullish_analysis)
+                memory.add("bearish", round_num, debate_round.bearish_analysis)
+            self._scopes[request_id] = memory
+            if len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+            metrics.MEMORY_SCOPES.set(len(self._scopes))
+            return memory
+
+    def release(self, request_id: str) -> None:
+        """释放 debate 的记忆"""
+        with self._lock:
+            self._scopes.pop(request_id, None)
+            metrics.MEMORY_SCOPES.set(len(self._scopes))
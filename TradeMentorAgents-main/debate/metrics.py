@@ -0,0 +1,124 @@
+import os
+from typing import Any, Sequence, Tuple
+
+try:
+    import prometheus_client
+except ImportError:  # prometheus_client 为可选依赖，未安装时所有指标均为空操作
+    prometheus_client = None
+
+# LLM 调用耗时分桶（秒）：缓存命中在毫秒级，本地模型生成一次回复通常需要数秒到数分钟
+CALL_BUCKETS = (0.005, 0.05, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120, 300, 600)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+ROUND_BUCKETS = tuple(range(1, 11))
+PARSE_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01)
+
+
+class _NoopMetric:
+    """prometheus_client 未安装时使用的空指标"""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def dec(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+
+def _histogram(name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = CALL_BUCKETS) -> Any:
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Histogram(name, documentation, labels, buckets=buckets)
+
+
+def _counter(name: str, documentation: str, labels: Sequence[str] = ()) -> Any:
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Counter(name, documentation, labels)
+
+
+def _gauge(name: str, documentation: str, labels: Sequence[str] = ()) -> Any:
+    if prometheus_client is None:
+        return _NoopMetric()
+    return prometheus_client.Gauge(name, documentation, labels, multiprocess_mode="livesum")
+
+
+# 单次任务（一次 LLM 调用）耗时，source 为 llm（实际调用）、cache（缓存命中）或 speculative（使用预先运行的结果）
+LLM_CALL_SECONDS = _histogram(
+    "debate_llm_call_seconds", "Duration of a single agent task", ["agent", "round", "source"]
+)
+# 提示词/回复的 token 数，按字符数估算（约 4 个字符 1 个 token）
+LLM_PROMPT_TOKENS = _histogram(
+    "debate_llm_prompt_tokens", "Estimated prompt tokens per LLM call", ["agent", "round"], TOKEN_BUCKETS
+)
+LLM_COMPLETION_TOKENS = _histogram(
+    "debate_llm_completion_tokens", "Estimated completion tokens per LLM call", ["agent", "round"], TOKEN_BUCKETS
+)
+NODE_SECONDS = _histogram("debate_node_seconds", "Duration of a workflow node", ["node", "round"])
+SCORE_PARSE_SECONDS = _histogram(
+    "debate_score_parse_seconds", "Duration of extracting the trader score", buckets=PARSE_BUCKETS
+)
+WORKFLOW_SECONDS = _histogram("debate_workflow_seconds", "Duration of a whole debate", ["mode"])
+DEBATE_ROUNDS = _histogram("debate_rounds", "Number of rounds per finished debate", buckets=ROUND_BUCKETS)
+# 辩论结束原因：score_low / score_high（极端分数提前结束）、converged（分数收敛）、max_rounds（达到最大回合数）、
+# timeout / deadline（LLM 调用超时或到达截止时间，结果为已完成回合的决策）
+DEBATE_STOPS = _counter("debate_stops_total", "Finished debates by stop reason", ["reason"])
+# 从检查点继续（而不是从第一轮重新开始）的 debate 数
+DEBATE_RESUMES = _counter("debate_resumes_total", "Debates resumed from a checkpoint")
+
+# 进程内保留的 debate 记忆数（运行中的 debate 数，加上异常结束、尚未淘汰的记忆）
+MEMORY_SCOPES = _gauge("debate_memory_scopes", "Debate memories held in this process")
+
+# LLM 后端：进行中的调用数、因后端错误失败（并换其他后端重试）的调用数
+LLM_ENDPOINT_IN_FLIGHT = _gauge("debate_llm_endpoint_in_flight", "LLM calls in flight per backend", ["endpoint"])
+LLM_ENDPOINT_FAILURES = _counter("debate_llm_endpoint_failures_total", "LLM calls that failed on a backend", ["endpoint"])
+
+# LLM 调用调度器：等待调用名额的耗时、进行中调用的估算 token 数、排队的调用数
+SCHEDULER_WAIT_SECONDS = _histogram("debate_scheduler_wait_seconds", "Time an LLM call waited for token budget")
+TOKENS_IN_FLIGHT = _gauge("debate_tokens_in_flight", "Estimated tokens of LLM calls in flight")
+SCHEDULER_QUEUED = _gauge("debate_scheduler_queued", "LLM calls waiting for token budget")
+
+# 执行器：排队耗时、正在运行或排队的 debate 数、因队列已满被拒绝的请求数
+QUEUE_WAIT_SECONDS = _histogram("debate_queue_wait_seconds", "Time a debate waited for an executor worker", ["executor"])
+IN_FLIGHT = _gauge("debate_in_flight", "Debates running or queued in the executor", ["executor"])
+REJECTED = _counter("debate_rejected_total", "Debates rejected because the executor queue was full", ["executor"])
+# 加入了相同输入的运行中 debate、没有单独运行的请求数
+COALESCED = _counter("debate_coalesced_total", "Requests that joined an identical in-flight debate", ["endpoint"])
+
+
+def round_label(round_num: Any) -> str:
+    """轮次标签，未知轮次（如预先运行的任务）为空字符串"""
+    return str(round_num) if round_num is not None else ""
+
+
+def estimate_tokens(text: str) -> int:
+    """按字符数粗略估算 token 数（约 4 个字符 1 个 token）"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def generate_metrics() -> Tuple[bytes, str]:
+    """生成 Prometheus 文本格式的指标
+
+    设置 PROMETHEUS_MULTIPROC_DIR 时汇总所有进程的指标（进程池执行器或多个 worker）。
+
+    Returns:
+        (指标内容, Content-Type)
+
+    Raises:
+        RuntimeError: 未安装 prometheus_client
+    """
+    if prometheus_client is None:
+        raise RuntimeError("prometheus_client is not installed")
+    registry = prometheus_client.REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
@@ -1,59 +1,457 @@
-from typing import Dict, Any, List, Literal, Union, cast
-import re
+from typing import TYPE_CHECKING, Dict, Any, List, Literal, Optional, Tuple, Union, cast
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
 
-from crewai import Crew, Process, Task, Agent
 from copy import deepcopy
 
-from debate.state import State, get_sample_inputs
-from debate.agents import bullish_researcher, bearish_researcher, trader_agent
+# LangGraph 只向 config 参数标注为 RunnableConfig 的节点传入运行配置
+from langchain_core.runnables import RunnableConfig
+
+from debate.state import DebateRound, State, get_sample_inputs
+from debate.agents import agent_model, get_agent, get_async_llm_client, get_router, routed_agent
 from debate.tasks import TradingTasks
+from debate.streaming import EventSink, get_event_sink, get_schedule, stream_to
+from debate.cache import ResponseCache, make_cache_key, get_model_name, hash_inputs
+from debate.render import render_inputs
+from debate.llm_client import build_messages
+from debate.sinks import AsyncArtifactWriter
+from debate.policy import StoppingPolicy
+from debate.context import ContextBudget, key_points, roll_summary, round_summary
+from debate.memory import DebateMemory, MemoryStore
+from debate.scheduler import Schedule, TokenScheduler
+from debate.timeouts import DeadlineExceeded, LLMTimeoutError, limit_call
+from debate.scoring import parse_decision
+from debate.store import extract_symbol, latest_input_date
+from debate import metrics
+
+if TYPE_CHECKING:
+    from crewai import Agent, Task
 
 class Nodes:
-    def __init__(self, debug: bool = False):
+    # 未指定结束条件时的默认最大辩论回合数
+    MAX_ROUNDS = 4
+    # 启用简要输入（context.brief_inputs）时，看多/看空分析在前几轮使用完整输入，之后的轮次以及交易决策使用简要输入
+    FULL_INPUT_ROUNDS = 1
+    
+    def __init__(
+        self,
+        debug: bool = False,
+        cache: Optional[ResponseCache] = None,
+        pipelined: bool = False,
+        artifacts: Optional[AsyncArtifactWriter] = None,
+        policy: Optional[StoppingPolicy] = None,
+        context: Optional[ContextBudget] = None,
+        scheduler: Optional[TokenScheduler] = None,
+        call_timeout: Optional[float] = None
+    ):
         """初始化节点处理类
         
         Args:
             debug: 是否启用调试模式
+            cache: LLM 响应缓存，为 None 时不使用缓存
+            pipelined: 是否启用流水线模式。启用后，下一轮的看多分析只依赖本轮看空分析，
+                因此会与本轮交易决策并发执行；若辩论在本轮结束，则丢弃该结果
+            artifacts: 任务输出写入器，按请求 ID 和轮次在后台保存每轮输出，为 None 时不保存
+            policy: 辩论结束条件，为 None 时最多进行 MAX_ROUNDS 轮，分数 <=1 或 >=9 时提前结束
+            context: 各任务提示词中辩论上下文和智能体记忆的 token 预算，为 None 时使用默认预算
+            scheduler: LLM 调用的 token 预算调度器，按 debate 的优先级和截止时间排队，为 None 时不限制
+            call_timeout: 单次 LLM 调用的超时（秒），超时的后端视为出错并换其他后端重试，仍然超时时
+                debate 以已完成回合的结果结束；为 None 时只受截止时间限制
         """
         self.debug = debug
+        self.policy = (policy or StoppingPolicy(max_rounds=self.MAX_ROUNDS)).validate()
+        self.context = (context or ContextBudget()).validate()
+        # 每个 debate 独立的智能体记忆（代替 crewAI 的全局记忆），debate 结束时由 release 释放
+        self.memories = MemoryStore(self.context.memory) if self.context.memory else None
+        self.cache = cache
+        self.pipelined = pipelined
+        self.artifacts = artifacts
+        self.scheduler = scheduler
+        self.call_timeout = call_timeout
         # 初始化任务生成器
         self.tasks = TradingTasks()
+        
+        # 流水线模式下预先启动的看多分析：request_id -> (任务内容的键, 结果)，多个并发 debate 共用同一个 Nodes，
+        # 在下一轮取出或由 release 在 debate 结束（包括出错、超时）时取消
+        self._speculative: Dict[str, Tuple[str, Future]] = {}
+        self._async_speculative: Dict[str, Tuple[str, "asyncio.Task[str]"]] = {}
+        self._speculative_lock = threading.Lock()
+        self._speculative_pool: Optional[ThreadPoolExecutor] = None
+    
+    def _emit_text(
+        self,
+        event_sink: Optional[EventSink],
+        agent: "Agent",
+        task_name: str,
+        round_num: Optional[int],
+        text: str,
+        **flags: Any
+    ) -> None:
+        """将未经流式生成的完整结果（缓存命中、预先完成的任务）作为单个 token 事件发送"""
+        if event_sink is None:
+            return
+        event_sink({
+            "type": "token",
+            "node": "run_analysis_round",
+            "round": round_num,
+            "agent": agent.role,
+            "task": task_name,
+            "delta": text,
+            **flags
+        })
+    
+    def _lookup_cache(
+        self,
+        agent: "Agent",
+        task: "Task",
+        task_name: str,
+        event_sink: Optional[EventSink],
+        round_num: Optional[int]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """查询响应缓存：相同角色、相同提示词和相同模型的任务直接复用缓存结果
+        
+        Returns:
+            (缓存结果, 缓存键)，未启用缓存时均为 None，未命中时缓存结果为 None
+        """
+        if self.cache is None:
+            return None, None
+        cache_key = make_cache_key(agent.role, task.description, get_model_name(agent.llm))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            if self.debug:
+                print(f"{task_name}命中缓存")
+            self._emit_text(event_sink, agent, task_name, round_num, cached, cached=True)
+        return cached, cache_key
+    
+    def _observe_call(
+        self,
+        agent: "Agent",
+        task: "Task",
+        round_num: Optional[int],
+        result: str,
+        elapsed: float,
+        source: str = "llm"
+    ) -> None:
+        """记录一次任务的耗时，实际调用 LLM 时同时记录估算的提示词/回复 token 数"""
+        round_label = metrics.round_label(round_num)
+        metrics.LLM_CALL_SECONDS.labels(agent=agent.role, round=round_label, source=source).observe(elapsed)
+        if source == "llm":
+            metrics.LLM_PROMPT_TOKENS.labels(agent=agent.role, round=round_label).observe(self._prompt_tokens(agent, task))
+            metrics.LLM_COMPLETION_TOKENS.labels(agent=agent.role, round=round_label).observe(metrics.estimate_tokens(result))
     
-    def _run_task(self, agent: Agent, task: Task, task_name: str) -> str:
+    def _prompt_tokens(self, agent: "Agent", task: "Task") -> int:
+        """估算任务提示词（系统提示词 + 任务描述）的 token 数"""
+        return metrics.estimate_tokens("".join(message["content"] for message in build_messages(agent, task)))
+    
+    def _run_task(
+        self,
+        agent: "Agent",
+        task: "Task",
+        task_name: str,
+        event_sink: Optional[EventSink] = None,
+        round_num: Optional[int] = None,
+        schedule: Optional[Schedule] = None
+    ) -> str:
         """运行单个任务并返回结果
         
+        启用调度器时，未命中缓存的任务先按估算的 token 数排队等待调用名额；
+        LLM 调用由 LLMRouter 分配到负载最低的后端，使用为该智能体配置的模型。
+        每次调用最多 call_timeout 秒（且不超过截止时间）：剩余时间作为 HTTP 请求超时，生成期间每个 token
+        到达时也会检查时限，超时的调用在当前线程内结束，不会在重试时继续占用后端。
+        
         Args:
             agent: 要使用的智能体
             task: 要运行的任务
             task_name: 任务名称（用于调试信息）
+            event_sink: 事件接收函数，提供时将生成的 token 实时发送出去
+            round_num: 当前轮次（从1开始，附加到 token 事件上）
+            schedule: 所属 debate 的调度参数（优先级、截止时间）
             
         Returns:
             任务结果文本
+            
+        Raises:
+            LLMTimeoutError: 调用超时且没有其他后端可以重试
+            DeadlineExceeded: 截止时间已到
         """
         if self.debug:
             print(f"运行{task_name}...")
-            
-        # 创建Crew
-        crew = Crew(
-            agents=[agent],
-            tasks=[task],
-            process=Process.sequential,
-            verbose=self.debug
-        )
         
-        # 运行并获取结果
-        result = str(crew.kickoff())
+        started = time.perf_counter()
+        cached, cache_key = self._lookup_cache(agent, task, task_name, event_sink, round_num)
+        if cached is not None:
+            self._observe_call(agent, task, round_num, cached, time.perf_counter() - started, source="cache")
+            return cached
         
-        # 检查结果格式
-        output_filename = f"{task_name.lower().replace(' ', '_')}.txt"
-        if result and output_filename in result:
-            result = f"{task_name}完成，但结果格式不正确"
+        deadline = schedule.deadline if schedule is not None else None
+            
+        # crewAI 在第一次运行任务时才导入
+        from crewai import Crew, Process, Task
+        
+        streamed = False
+        
+        def forward(event: Dict[str, Any]) -> None:
+            nonlocal streamed
+            streamed = True
+            event_sink(event)
+        
+        def kickoff(endpoint: Any) -> str:
+            with limit_call(self.call_timeout, deadline):
+                # 每次尝试使用新的 Task 和指向所选后端的智能体，不修改调用方的 Task；HTTP 请求的超时为本次调用的剩余时间
+                attempt_agent = routed_agent(agent, endpoint.base_url)
+                attempt = Task(description=task.description, expected_output=task.expected_output, agent=attempt_agent)
+                crew = Crew(
+                    agents=[attempt_agent],
+                    tasks=[attempt],
+                    process=Process.sequential,
+                    verbose=self.debug
+                )
+                with stream_to(forward if event_sink else None, node="run_analysis_round", round=round_num,
+                               agent=agent.role, task=task_name):
+                    return str(crew.kickoff())
+        
+        # 运行并获取结果（耗时包括创建 Crew 的开销，不包括排队时间），
+        # 后端出错或超时且尚未输出 token 时换一个后端重试，截止时间已到时不再重试
+        slot = self.scheduler.slot(self._prompt_tokens(agent, task), schedule) if self.scheduler else nullcontext()
+        with slot:
+            started = time.perf_counter()
+            result = get_router().call(
+                agent_model(agent),
+                kickoff,
+                lambda exc: not streamed and not isinstance(exc, DeadlineExceeded)
+            )
+        elapsed = time.perf_counter() - started
+        self._observe_call(agent, task, round_num, result, elapsed)
+        
+        if cache_key is not None and result:
+            self.cache.set(cache_key, result, elapsed)
             
         if self.debug:
             print(f"{task_name}完成")
             
         return result
     
+    async def _arun_task(
+        self,
+        agent: "Agent",
+        task: "Task",
+        task_name: str,
+        event_sink: Optional[EventSink] = None,
+        round_num: Optional[int] = None,
+        schedule: Optional[Schedule] = None
+    ) -> str:
+        """异步运行单个任务并返回结果
+        
+        不创建 Crew，而是通过共享连接池的异步客户端直接调用 OpenAI 兼容接口（由 LLMRouter 选择后端），
+        智能体的角色、目标和背景作为系统提示词。
+        
+        Args:
+            agent: 要使用的智能体
+            task: 要运行的任务
+            task_name: 任务名称（用于调试信息）
+            event_sink: 事件接收函数，提供时将生成的 token 实时发送出去
+            round_num: 当前轮次（从1开始，附加到 token 事件上）
+            schedule: 所属 debate 的调度参数（优先级、截止时间）
+            
+        Returns:
+            任务结果文本
+            
+        Raises:
+            LLMTimeoutError: 调用超时且没有其他后端可以重试
+            DeadlineExceeded: 截止时间已到
+        """
+        if self.debug:
+            print(f"运行{task_name}...")
+        
+        started = time.perf_counter()
+        cached, cache_key = self._lookup_cache(agent, task, task_name, event_sink, round_num)
+        if cached is not None:
+            self._observe_call(agent, task, round_num, cached, time.perf_counter() - started, source="cache")
+            return cached
+        
+        on_token = None
+        if event_sink is not None:
+            def on_token(delta: str) -> None:
+                self._emit_text(event_sink, agent, task_name, round_num, delta)
+        
+        slot = self.scheduler.aslot(self._prompt_tokens(agent, task), schedule) if self.scheduler else nullcontext()
+        async with slot:
+            started = time.perf_counter()
+            result = await get_async_llm_client().complete(
+                build_messages(agent, task), on_token=on_token, model=agent_model(agent),
+                timeout=self.call_timeout, deadline=schedule.deadline if schedule is not None else None
+            )
+        elapsed = time.perf_counter() - started
+        self._observe_call(agent, task, round_num, result, elapsed)
+        
+        if cache_key is not None and result:
+            self.cache.set(cache_key, result, elapsed)
+        
+        if self.debug:
+            print(f"{task_name}完成")
+        
+        return result
+    
+    def _analysis_inputs(self, state: State, round_index: int) -> str:
+        """获取第 round_index 轮（从0开始）看多/看空分析使用的输入文本"""
+        if not self.context.brief_inputs or round_index < self.FULL_INPUT_ROUNDS:
+            return self._full_inputs(state)
+        return self._brief_inputs(state)
+    
+    def _trader_inputs(self, state: State) -> str:
+        """获取交易决策任务使用的输入文本"""
+        return self._brief_inputs(state) if self.context.brief_inputs else self._full_inputs(state)
+    
+    def _full_inputs(self, state: State) -> str:
+        """获取完整输入文本"""
+        return state.get("inputs_text") or render_inputs(state["inputs"])
+    
+    def _brief_inputs(self, state: State) -> str:
+        """获取简要输入文本"""
+        return state.get("inputs_brief") or render_inputs(state["inputs"], brief=True)
+    
+    def _speculative_key(self, task: "Task") -> str:
+        agent = get_agent("bullish")
+        return make_cache_key(agent.role, task.description, get_model_name(agent.llm))
+    
+    def _memory(self, state: State) -> Optional[DebateMemory]:
+        """获取当前 debate 的智能体记忆，未启用记忆时返回 None"""
+        if self.memories is None:
+            return None
+        return self.memories.scope(state["request_id"], state["debate_rounds"])
+    
+    def _recall(self, state: State, agent: str) -> Optional[str]:
+        memory = self._memory(state)
+        return memory.recall(agent) if memory is not None else None
+    
+    def _next_bullish_task(self, state: State, inputs: Any, next_round: int, bearish_analysis: Optional[str]) -> "Task":
+        """创建第 next_round 轮（从0开始）的看多任务，run_analysis_round 和流水线模式共用"""
+        return self.tasks.bullish_analysis_task(
+            inputs=inputs,
+            previous_round=next_round if next_round > 0 else None,
+            bearish_analysis=key_points(bearish_analysis, self.context.rebuttal) if next_round > 0 else None,
+            memory=self._recall(state, "bullish")
+        )
+    
+    def _bearish_task(self, state: State, inputs: Any, current_round: int, bullish_analysis: str) -> "Task":
+        """创建第 current_round 轮（从0开始）的看空任务，引用的看多分析按预算压缩"""
+        return self.tasks.bearish_analysis_task(
+            inputs=inputs,
+            previous_round=current_round if current_round > 0 else None,
+            bullish_analysis=key_points(bullish_analysis, self.context.rebuttal),
+            memory=self._recall(state, "bearish")
+        )
+    
+    def _remember(self, state: State, agent: str, round_num: int, text: str) -> None:
+        """将智能体本轮的输出写入当前 debate 的记忆"""
+        memory = self._memory(state)
+        if memory is not None:
+            memory.add(agent, round_num, text)
+    
+    def _trader_task(self, state: State, current_round: int, bullish_analysis: str, bearish_analysis: str) -> "Task":
+        """创建第 current_round 轮（从0开始）的交易决策任务
+        
+        本轮两份分析合计按预算压缩，之前的回合只提供滚动摘要，提示词大小不随回合数增长。
+        """
+        analysis_tokens = self.context.trader // 2 if self.context.trader else None
+        return self.tasks.trader_decision_task(
+            inputs=self._trader_inputs(state),
+            previous_round=current_round if current_round > 0 else None,
+            bullish_analysis=key_points(bullish_analysis, analysis_tokens),
+            bearish_analysis=key_points(bearish_analysis, analysis_tokens),
+            history=state.get("debate_summary") if self.context.history else None
+        )
+    
+    def _speculate_bullish(
+        self,
+        state: State,
+        inputs: Any,
+        next_round: int,
+        bearish_analysis: str,
+        schedule: Optional[Schedule] = None
+    ) -> None:
+        """在后台预先运行下一轮的看多分析"""
+        task = self._next_bullish_task(state, inputs, next_round, bearish_analysis)
+        
+        with self._speculative_lock:
+            if state["request_id"] in self._speculative:
+                return
+            if self._speculative_pool is None:
+                self._speculative_pool = ThreadPoolExecutor(thread_name_prefix="debate-speculative")
+            self._speculative[state["request_id"]] = (self._speculative_key(task), self._speculative_pool.submit(
+                self._run_task, get_agent("bullish"), task, "看多分析", schedule=schedule
+            ))
+        
+        if self.debug:
+            print(f"预先启动第 {next_round + 1} 轮看多分析")
+    
+    def _take_speculative(self, state: State, task: "Task") -> Optional[str]:
+        """取出当前 debate 预先运行的结果，与任务不一致时丢弃并返回 None"""
+        if not self._speculative:
+            return None
+        with self._speculative_lock:
+            entry = self._speculative.pop(state["request_id"], None)
+        if entry is None:
+            return None
+        key, future = entry
+        if key != self._speculative_key(task):
+            future.cancel()
+            return None
+        return future.result()
+    
+    def _aspeculate_bullish(
+        self,
+        state: State,
+        inputs: Any,
+        next_round: int,
+        bearish_analysis: str,
+        schedule: Optional[Schedule] = None
+    ) -> None:
+        """在事件循环中预先运行下一轮的看多分析"""
+        task = self._next_bullish_task(state, inputs, next_round, bearish_analysis)
+        
+        with self._speculative_lock:
+            if state["request_id"] in self._async_speculative:
+                return
+            self._async_speculative[state["request_id"]] = (self._speculative_key(task), asyncio.ensure_future(
+                self._arun_task(get_agent("bullish"), task, "看多分析", schedule=schedule)
+            ))
+        
+        if self.debug:
+            print(f"预先启动第 {next_round + 1} 轮看多分析")
+    
+    async def _atake_speculative(self, state: State, task: "Task") -> Optional[str]:
+        """_take_speculative 的异步版本"""
+        if not self._async_speculative:
+            return None
+        with self._speculative_lock:
+            entry = self._async_speculative.pop(state["request_id"], None)
+        if entry is None:
+            return None
+        key, future = entry
+        if key != self._speculative_key(task):
+            future.cancel()
+            return None
+        return await future
+    
+    def release(self, request_id: str) -> None:
+        """debate 结束（包括出错、超时和取消）时取消它预先启动的看多分析并释放记忆
+        
+        线程中已经开始的调用无法取消，会在单次调用超时或截止时间内结束，结果被丢弃。
+        """
+        with self._speculative_lock:
+            entries = [self._speculative.pop(request_id, None), self._async_speculative.pop(request_id, None)]
+        for entry in entries:
+            if entry is not None:
+                entry[1].cancel()
+                if self.debug:
+                    print("辩论已结束，丢弃预先启动的看多分析")
+        if self.memories is not None:
+            self.memories.release(request_id)
+    
     # def prepare_news(self, state: State) -> State:
     #     """准备新闻数据，如果没有则使用样例新闻
         
@@ -79,90 +477,217 @@ class Nodes:
             更新后的状态
         """
         # print(state)
+        started = time.perf_counter()
         if not state["inputs"]:
             if self.debug:
                 print("使用样例输入进行分析")
             state["inputs"] = get_sample_inputs()
         
+        # 每次 debate 只渲染一次输入，之后所有任务和轮次复用（简要输入只在启用时渲染）
+        state["inputs_text"] = render_inputs(state["inputs"])
+        state["inputs_brief"] = render_inputs(state["inputs"], brief=True) if self.context.brief_inputs else None
+        
+        # 渲染后不再需要原始输入，只保留哈希、股票代码和日期用于关联存储的结果，减小状态和响应的体积
+        state["input_hash"] = hash_inputs(state["inputs"])
+        state["symbol"] = extract_symbol(state["inputs"])
+        state["input_date"] = latest_input_date(state["inputs"])
+        state["inputs"] = None
+        
+        metrics.NODE_SECONDS.labels(node="prepare_inputs", round="").observe(time.perf_counter() - started)
         return state
     
-    def run_analysis_round(self, state: State) -> State:
+    def run_analysis_round(self, state: State, config: Optional[RunnableConfig] = None) -> State:
         """运行一轮分析
         
+        LLM 调用超时或到达截止时间时丢弃本轮未完成的输出，记录 timed_out 后结束辩论，
+        最终决策和分数为最后一个完成的回合的结果。
+        
         Args:
             state: 当前状态
+            config: LangGraph 运行配置，可通过 configurable.event_sink 接收 token 事件，
+                通过 configurable.schedule 指定优先级和截止时间
             
         Returns:
             更新后的状态
         """
+        try:
+            return self._analysis_round(state, config)
+        except LLMTimeoutError as e:
+            return self._time_out(state, e)
+    
+    async def arun_analysis_round(self, state: State, config: Optional[RunnableConfig] = None) -> State:
+        """run_analysis_round 的异步版本"""
+        try:
+            return await self._aanalysis_round(state, config)
+        except LLMTimeoutError as e:
+            return self._time_out(state, e)
+    
+    def _time_out(self, state: State, error: LLMTimeoutError) -> State:
+        """记录本轮因超时未完成，已完成的回合保持不变"""
+        state["timed_out"] = "deadline" if isinstance(error, DeadlineExceeded) else "timeout"
+        if self.debug:
+            print(f"第 {len(state['debate_rounds']) + 1} 轮未完成（{error}），使用已完成回合的结果结束辩论")
+        return state
+    
+    def _analysis_round(self, state: State, config: Optional[Dict[str, Any]] = None) -> State:
+        """运行一轮分析，LLM 调用超时时抛出 LLMTimeoutError"""
         # 获取当前轮次
+        started = time.perf_counter()
         current_round = len(state["debate_rounds"])
+        event_sink = get_event_sink(config)
+        schedule = get_schedule(config)
         
         if self.debug:
             print(f"执行第 {current_round + 1} 轮分析...")
             
         # news_content = state["news"]
-        inputs = state["inputs"]
+        inputs = self._analysis_inputs(state, current_round)
+        
+        # 丢弃之前未完成的本轮记忆（失败后重新运行本轮时）
+        memory = self._memory(state)
+        if memory is not None:
+            memory.truncate(current_round)
         
         # 第一步：运行看多分析
         # 获取前轮分析（如果有）
         previous_bearish = None
         if current_round > 0:
-            previous_bearish = state["analyses"][-1]  # 上一轮的看空分析
-            
-        # 创建看多任务
-        bullish_task = self.tasks.bullish_analysis_task(
-            inputs=inputs,
-            previous_round=current_round if current_round > 0 else None,
-            bearish_analysis=previous_bearish
-        )
-        
-        # 运行任务并获取结果
-        bullish_result = self._run_task(bullish_researcher, bullish_task, "看多分析")
+            previous_bearish = state["debate_rounds"][-1].bearish_analysis  # 上一轮的看空分析
             
-        # 存入状态
-        state["analyses"].append(bullish_result)
+        # 创建看多任务（引用的看空分析按预算压缩）
+        bullish_task = self._next_bullish_task(state, inputs, current_round, previous_bearish)
+        
+        # 运行任务并获取结果（流水线模式下优先使用上一轮预先启动的结果）
+        speculative_started = time.perf_counter()
+        bullish_result = self._take_speculative(state, bullish_task) if self.pipelined else None
+        if bullish_result is not None:
+            self._observe_call(get_agent("bullish"), bullish_task, current_round + 1, bullish_result,
+                               time.perf_counter() - speculative_started, source="speculative")
+            self._emit_text(event_sink, get_agent("bullish"), "看多分析", current_round + 1, bullish_result, speculative=True)
+        else:
+            bullish_result = self._run_task(
+                get_agent("bullish"), bullish_task, "看多分析", event_sink, current_round + 1, schedule
+            )
+        self._remember(state, "bullish", current_round + 1, bullish_result)
             
         # 第二步：运行看空分析
-        # 创建看空任务
-        bearish_task = self.tasks.bearish_analysis_task(
-            inputs=inputs,
-            previous_round=current_round if current_round > 0 else None,
-            bullish_analysis=bullish_result  # 使用刚生成的看多分析
-        )
+        # 创建看空任务（使用刚生成的看多分析）
+        bearish_task = self._bearish_task(state, inputs, current_round, bullish_result)
         
         # 运行任务并获取结果
-        bearish_result = self._run_task(bearish_researcher, bearish_task, "看空分析")
-            
-        # 存入状态
-        state["analyses"].append(bearish_result)
+        bearish_result = self._run_task(
+            get_agent("bearish"), bearish_task, "看空分析", event_sink, current_round + 1, schedule
+        )
+        self._remember(state, "bearish", current_round + 1, bearish_result)
+        
+        # 流水线模式：下一轮看多分析只依赖本轮看空分析（和看多智能体自己的记忆），与本轮交易决策并发执行
+        if self.pipelined and current_round + 1 < self.policy.max_rounds:
+            self._speculate_bullish(
+                state, self._analysis_inputs(state, current_round + 1), current_round + 1, bearish_result, schedule
+            )
             
         # 第三步：运行交易决策
         # 创建交易决策任务
-        trader_task = self.tasks.trader_decision_task(
-            inputs=inputs,
-            previous_round=current_round if current_round > 0 else None,
-            bullish_analysis=bullish_result,
-            bearish_analysis=bearish_result
-        )
+        trader_task = self._trader_task(state, current_round, bullish_result, bearish_result)
         
         # 运行任务并获取结果
-        trader_result = self._run_task(trader_agent, trader_task, "交易决策")
+        trader_result = self._run_task(
+            get_agent("trader"), trader_task, "交易决策", event_sink, current_round + 1, schedule
+        )
         
-        # 添加辩论轮次记录
-        state["debate_rounds"].append({
-            "bullish_analysis": bullish_result,
-            "bearish_analysis": bearish_result,
-            "trader_decision": trader_result
-        })
+        return self._record_round(state, current_round, bullish_result, bearish_result, trader_result, started)
+    
+    async def _aanalysis_round(self, state: State, config: Optional[Dict[str, Any]] = None) -> State:
+        """异步运行一轮分析，与 _analysis_round 生成相同的提示词"""
+        started = time.perf_counter()
+        current_round = len(state["debate_rounds"])
+        event_sink = get_event_sink(config)
+        schedule = get_schedule(config)
+        
+        if self.debug:
+            print(f"执行第 {current_round + 1} 轮分析...")
+        
+        inputs = self._analysis_inputs(state, current_round)
+        memory = self._memory(state)
+        if memory is not None:
+            memory.truncate(current_round)
+        
+        # 第一步：看多分析（流水线模式下优先使用上一轮预先启动的结果）
+        bullish_task = self._next_bullish_task(
+            state, inputs, current_round, state["debate_rounds"][-1].bearish_analysis if current_round > 0 else None
+        )
+        speculative_started = time.perf_counter()
+        bullish_result = await self._atake_speculative(state, bullish_task) if self.pipelined else None
+        if bullish_result is not None:
+            self._observe_call(get_agent("bullish"), bullish_task, current_round + 1, bullish_result,
+                               time.perf_counter() - speculative_started, source="speculative")
+            self._emit_text(event_sink, get_agent("bullish"), "看多分析", current_round + 1, bullish_result, speculative=True)
+        else:
+            bullish_result = await self._arun_task(
+                get_agent("bullish"), bullish_task, "看多分析", event_sink, current_round + 1, schedule
+            )
+        self._remember(state, "bullish", current_round + 1, bullish_result)
+        
+        # 第二步：看空分析
+        bearish_task = self._bearish_task(state, inputs, current_round, bullish_result)
+        bearish_result = await self._arun_task(
+            get_agent("bearish"), bearish_task, "看空分析", event_sink, current_round + 1, schedule
+        )
+        self._remember(state, "bearish", current_round + 1, bearish_result)
+        
+        if self.pipelined and current_round + 1 < self.policy.max_rounds:
+            self._aspeculate_bullish(
+                state, self._analysis_inputs(state, current_round + 1), current_round + 1, bearish_result, schedule
+            )
+        
+        # 第三步：交易决策
+        trader_task = self._trader_task(state, current_round, bullish_result, bearish_result)
+        trader_result = await self._arun_task(
+            get_agent("trader"), trader_task, "交易决策", event_sink, current_round + 1, schedule
+        )
+        
+        return self._record_round(state, current_round, bullish_result, bearish_result, trader_result, started)
+    
+    def _record_round(
+        self,
+        state: State,
+        current_round: int,
+        bullish_result: str,
+        bearish_result: str,
+        trader_result: str,
+        started: float
+    ) -> State:
+        """记录一轮辩论的结果、提取分数并更新最新决策，started 为本轮开始时的 perf_counter 值"""
+        # 添加辩论轮次记录（每轮的分析只保存这一份）
+        debate_round = DebateRound(bullish_result, bearish_result, trader_result)
+        state["debate_rounds"].append(debate_round)
+        
+        # 在后台保存本轮输出，不阻塞当前请求
+        if self.artifacts is not None:
+            for kind, content in zip(DebateRound._fields, debate_round):
+                self.artifacts.write(state.get("request_id") or "anonymous", current_round + 1, kind, content)
         
         # 提取分数
+        parse_started = time.perf_counter()
         score = self.extract_score_from_decision(trader_result)
+        metrics.SCORE_PARSE_SECONDS.observe(time.perf_counter() - parse_started)
         state["trader_scores"].append(score)
         
         # 设置最新决策
         state["decision"] = trader_result
         
+        # 更新之前回合的滚动摘要，供后面回合的交易决策使用
+        if self.context.history:
+            state["debate_summary"] = roll_summary(
+                state.get("debate_summary"),
+                round_summary(current_round + 1, bullish_result, bearish_result, trader_result, self.context.history),
+                self.context.history
+            )
+        
+        metrics.NODE_SECONDS.labels(node="run_analysis_round", round=str(current_round + 1)).observe(
+            time.perf_counter() - started
+        )
+        
         if self.debug:
             print(f"第 {current_round + 1} 轮分析完成，得分：{score}")
         
@@ -177,101 +702,15 @@ class Nodes:
         Returns:
             提取的分数，如果无法提取则返回5.0（中性）
         """
-        if not decision_text:
-            if self.debug:
-                print("决策文本为空")
-            return 5.0
-            
-        if self.debug:
-            print("尝试从以下文本中提取分数：")
-            print(decision_text[:200] + "..." if len(decision_text) > 200 else decision_text)
-        
-        # 存储所有可能的分数
-        potential_scores = []
-        
-        # 模式1：标准格式 "Score: X"
-        try:
-            lines = decision_text.split("\n")
-            for line in lines:
-                line = line.strip()
-                if line.startswith("Score:"):
-                    # 提取分数值
-                    score_part = line.split("Score:")[1].strip()
-                    # 取第一个单词并转换为浮点数
-                    score = float(score_part.split()[0].replace(',', '.'))
-                    potential_scores.append(score)
-                    if self.debug:
-                        print(f"从'Score:'行提取到分数: {score}")
-        except Exception as e:
-            if self.debug:
-                print(f"标准格式提取出错: {e}")
-        
-        # 模式2：使用正则表达式寻找"Score: X"或"Score: X/10"格式
-        try:
-            pattern1 = r'Score:\s*(\d+(?:\.\d+)?)\s*(?:/10)?'
-            matches = re.findall(pattern1, decision_text, re.IGNORECASE)
-            for match in matches:
-                try:
-                    score = float(match.replace(',', '.'))
-                    if 0 <= score <= 10:
-                        potential_scores.append(score)
-                        if self.debug:
-                            print(f"从正则表达式1提取到分数: {score}")
-                except:
-                    pass
-        except Exception as e:
-            if self.debug:
-                print(f"正则表达式1提取出错: {e}")
-        
-        # 模式3：查找"X out of 10"或"X/10"格式
-        try:
-            pattern2 = r'(\d+(?:\.\d+)?)\s*(?:out of|\/)\s*10'
-            matches = re.findall(pattern2, decision_text, re.IGNORECASE)
-            for match in matches:
-                try:
-                    score = float(match.replace(',', '.'))
-                    if 0 <= score <= 10:
-                        potential_scores.append(score)
-                        if self.debug:
-                            print(f"从正则表达式2提取到分数: {score}")
-                except:
-                    pass
-        except Exception as e:
-            if self.debug:
-                print(f"正则表达式2提取出错: {e}")
+        decision = parse_decision(decision_text)
         
-        # 模式4：在"SCORE AND RECOMMENDATION"部分后的第一个数字
-        try:
-            pattern3 = r'SCORE AND RECOMMENDATION.*?(\d+(?:\.\d+)?)'
-            match = re.search(pattern3, decision_text, re.IGNORECASE | re.DOTALL)
-            if match:
-                try:
-                    score = float(match.group(1).replace(',', '.'))
-                    if 0 <= score <= 10:
-                        potential_scores.append(score)
-                        if self.debug:
-                            print(f"从'SCORE AND RECOMMENDATION'部分提取到分数: {score}")
-                except:
-                    pass
-        except Exception as e:
-            if self.debug:
-                print(f"正则表达式3提取出错: {e}")
-        
-        # 如果有多个候选分数，优先选择在[0-10]范围内的
-        valid_scores = [s for s in potential_scores if 0 <= s <= 10]
-        
-        if valid_scores:
-            # 如果有多个有效分数，取最可能的一个（通常是第一个找到的）
-            final_score = valid_scores[0]
-            if self.debug:
-                print(f"最终选择的分数: {final_score}")
-            return final_score
-            
         if self.debug:
-            print("未能提取到有效分数，使用默认值5.0")
+            if decision.score_found:
+                print(f"提取到分数: {decision.score}，操作: {decision.action}，信心: {decision.conviction}，仓位: {decision.sizing}")
+            else:
+                print("未能提取到有效分数，使用默认值5.0")
         
-        # 默认返回中性分数
-        return 5.0
+        return decision.score
     
     def check_decision_criteria(self, state: State) -> Literal["continue", "end"]:
         """检查是否应该结束辩论
@@ -282,27 +721,27 @@ class Nodes:
         Returns:
             "continue" 继续辩论，"end" 结束辩论
         """
-        # 如果没有分数，继续辩论
-        if not state["trader_scores"]:
-            return "continue"
+        if state.get("timed_out"):
+            return self._stop(state, state["timed_out"])
         
-        # 获取最新分数
-        current_score = state["trader_scores"][-1]
-        
-        # 如果分数极端（<=1或>=9），立即结束
-        if current_score <= 1 or current_score >= 9:
-            if self.debug:
-                print(f"根据极端分数 {current_score} 结束辩论")
-            return "end"
+        reason = self.policy.stop_reason(state["trader_scores"], len(state["debate_rounds"]))
+        if reason is None:
+            return "continue"
         
-        # 如果已经进行了足够多的回合，结束辩论
-        if len(state["debate_rounds"]) >= 4:
-            if self.debug:
+        if self.debug:
+            if reason in ("score_low", "score_high"):
+                print(f"根据极端分数 {state['trader_scores'][-1]} 结束辩论")
+            elif reason == "converged":
+                print(f"分数已收敛（{state['trader_scores'][-2]} -> {state['trader_scores'][-1]}），结束辩论")
+            else:
                 print("已达到最大辩论回合数，结束辩论")
-            return "end"
-        
-        # 否则继续辩论
-        return "continue"
+        return self._stop(state, reason)
+    
+    def _stop(self, state: State, reason: str) -> Literal["end"]:
+        """记录辩论结束的原因和回合数"""
+        metrics.DEBATE_STOPS.labels(reason=reason).inc()
+        metrics.DEBATE_ROUNDS.observe(len(state["debate_rounds"]))
+        return "end"
     
     def finalize_decision(self, state: State) -> State:
         """最终确定交易决策
@@ -313,6 +752,9 @@ class Nodes:
         Returns:
             最终状态
         """
+        # debate 已结束，丢弃预先启动的看多分析并释放记忆
+        self.release(state["request_id"])
+        
         if not state["trader_scores"]:
             if self.debug:
                 print("未进行任何分析，无法做出决策")
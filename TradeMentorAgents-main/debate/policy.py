@@ -0,0 +1,58 @@
+from typing import List, NamedTuple, Optional
+
+
+class StoppingPolicy(NamedTuple):
+    """辩论结束条件
+
+    可哈希、可 pickle，可直接作为已编译工作流的缓存键，也可传入进程池中的任务。
+    """
+    # 最大辩论回合数
+    max_rounds: int = 4
+    # 分数 <= sell_threshold 或 >= buy_threshold 时立即结束
+    sell_threshold: float = 1.0
+    buy_threshold: float = 9.0
+    # 相邻两轮交易决策分数之差小于该值时视为已收敛并结束，为 None 时不检测收敛
+    convergence_delta: Optional[float] = None
+
+    def validate(self) -> "StoppingPolicy":
+        """检查参数是否合法
+
+        Returns:
+            自身，便于链式调用
+
+        Raises:
+            ValueError: 参数不合法
+        """
+        if self.max_rounds < 1:
+            raise ValueError("max_rounds 必须大于等于 1")
+        if not 0 <= self.sell_threshold < self.buy_threshold <= 10:
+            raise ValueError("必须满足 0 <= sell_threshold < buy_threshold <= 10")
+        if self.convergence_delta is not None and self.convergence_delta <= 0:
+            raise ValueError("convergence_delta 必须大于 0")
+        return self
+
+    def stop_reason(self, scores: List[float], rounds: int) -> Optional[str]:
+        """判断辩论是否应该结束
+
+        Args:
+            scores: 每轮交易决策的分数
+            rounds: 已完成的回合数
+
+        Returns:
+            结束原因（score_low、score_high、converged、max_rounds），继续辩论时返回 None
+        """
+        if scores:
+            current_score = scores[-1]
+            if current_score <= self.sell_threshold:
+                return "score_low"
+            if current_score >= self.buy_threshold:
+                return "score_high"
+            if (
+                self.convergence_delta is not None
+                and len(scores) >= 2
+                and abs(current_score - scores[-2]) < self.convergence_delta
+            ):
+                return "converged"
+        if rounds >= self.max_rounds:
+            return "max_rounds"
+        return None
@@ -0,0 +1,151 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Mapping
+
+# 简要渲染（用于交易决策任务）时新闻正文保留的最大字符数
+BRIEF_CONTENT_CHARS = 600
+# 价格数据超过该行数时渲染为技术指标摘要，而不是逐行列出
+PRICE_SUMMARY_MIN_BARS = 10
+# 指标摘要之后附带的最近几行原始价格（简要模式不附带）
+PRICE_RECENT_BARS = 5
+
+_INLINE_SPACE = re.compile(r"[ \t\r\f\v\u00a0]+")
+
+# 输入类型 -> 渲染函数(data, brief) -> 文本
+Renderer = Callable[[Any, bool], str]
+_RENDERERS: Dict[str, Renderer] = {}
+
+
+def register_renderer(input_type: str) -> Callable[[Renderer], Renderer]:
+    """注册某种输入类型的渲染函数
+
+    Args:
+        input_type: InputData 的 type 字段，例如 "news"
+
+    Returns:
+        装饰器
+    """
+    def decorator(fn: Renderer) -> Renderer:
+        _RENDERERS[input_type] = fn
+        return fn
+    return decorator
+
+
+def normalize_whitespace(text: str) -> str:
+    """压缩行内空白、去掉每行首尾空白，并删除空行"""
+    lines = (_INLINE_SPACE.sub(" ", line).strip() for line in str(text).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit].rstrip() + " …"
+
+
+def _compact_json(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+@register_renderer("news")
+def render_news(data: Any, brief: bool = False) -> str:
+    if not isinstance(data, Mapping):
+        return normalize_whitespace(data)
+
+    lines = []
+    if data.get("title"):
+        lines.append(f"Title: {normalize_whitespace(data['title'])}")
+    if data.get("author"):
+        lines.append(f"Author: {data['author']}")
+    if data.get("url") and not brief:
+        lines.append(f"Source: {data['url']}")
+
+    content = normalize_whitespace(data.get("content", ""))
+    if content:
+        lines.append(_truncate(content, BRIEF_CONTENT_CHARS) if brief else content)
+
+    # 其余字段原样保留
+    extra = {k: v for k, v in data.items() if k not in ("title", "author", "url", "content")}
+    if extra:
+        lines.append(_compact_json(extra))
+    return "\n".join(lines)
+
+
+@register_renderer("price_historical")
+def render_price_historical(data: Any, brief: bool = False) -> str:
+    if not isinstance(data, Mapping) or not isinstance(data.get("prices"), list):
+        return _compact_json(data)
+
+    prices = data["prices"]
+    lines = [f"Symbol: {data.get('symbol', '')}"]
+    if not prices:
+        return lines[0]
+
+    # 按日期升序排列，便于计算区间涨跌幅
+    ordered = sorted(prices, key=lambda row: str(row.get("date", "")))
+    columns = list(ordered[0].keys())
+    if len(ordered) > PRICE_SUMMARY_MIN_BARS:
+        # 较长的历史数据只给出固定大小的指标摘要和最近几行，提示词长度不随数据长度增长
+        from debate.indicators import compute_indicators, format_indicators, to_series
+
+        lines.extend(format_indicators(compute_indicators(to_series(ordered)), brief=brief))
+        rows = [] if brief else ordered[-PRICE_RECENT_BARS:]
+    elif brief and len(ordered) > 2:
+        # 简要模式只保留首尾两行和区间涨跌幅
+        rows = [ordered[0], ordered[-1]]
+        first, last = ordered[0].get("close"), ordered[-1].get("close")
+        if isinstance(first, (int, float)) and isinstance(last, (int, float)) and first:
+            lines.append(f"{len(ordered)} bars, change {(last - first) / first:+.2%}")
+    else:
+        rows = ordered
+
+    if rows:
+        lines.append(" ".join(columns))
+    for row in rows:
+        lines.append(" ".join(str(row.get(column, "")) for column in columns))
+    return "\n".join(lines)
+
+
+def _as_dict(item: Any) -> Dict[str, Any]:
+    if hasattr(item, "model_dump"):
+        return item.model_dump()
+    return dict(item)
+
+
+def render_input(item: Any, brief: bool = False) -> str:
+    """将单条 InputData 渲染为紧凑的文本块
+
+    Args:
+        item: 输入数据（字典或 pydantic 模型）
+        brief: 是否使用简要模式
+
+    Returns:
+        文本块
+    """
+    item = _as_dict(item)
+    input_type = item.get("type", "data")
+    renderer = _RENDERERS.get(input_type)
+    body = renderer(item.get("data"), brief) if renderer else _compact_json(item.get("data"))
+    return f"[{input_type.upper()} {item.get('date', '')}]\n{body}"
+
+
+def render_inputs(inputs: List[Any], brief: bool = False) -> str:
+    """将输入数据列表渲染为规范化的文本，重复的输入只保留一份
+
+    Args:
+        inputs: 输入数据列表
+        brief: 是否使用简要模式（新闻正文截断、价格只保留首尾）
+
+    Returns:
+        渲染后的文本
+    """
+    seen = set()
+    blocks = []
+    for item in inputs or []:
+        block = render_input(item, brief=brief)
+        if block in seen:
+            continue
+        seen.add(block)
+        blocks.append(block)
+    return "\n\n".join(blocks)
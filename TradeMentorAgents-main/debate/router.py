@@ -0,0 +1,215 @@
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from debate import metrics
+from debate.llm_client import strip_provider_prefix
+
+T = TypeVar("T")
+
+# 调用耗时的指数加权平均系数
+LATENCY_DECAY = 0.2
+# 后端出错后暂停分配请求的秒数
+FAILURE_COOLDOWN = 30.0
+
+
+class NoEndpointError(RuntimeError):
+    """没有可以提供所需模型的后端"""
+
+
+class Endpoint:
+    def __init__(self, base_url: str, models: Optional[Sequence[str]] = None):
+        """一个 OpenAI 兼容的模型服务
+
+        Args:
+            base_url: 接口地址，例如 "http://localhost:11434/v1"
+            models: 该服务提供的模型，为 None 时视为提供所有模型
+        """
+        self.base_url = base_url.rstrip("/")
+        self.models = frozenset(strip_provider_prefix(model) for model in models) if models else None
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.calls = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    def serves(self, model: str) -> bool:
+        return self.models is None or strip_provider_prefix(model) in self.models
+
+
+def parse_endpoints(spec: str) -> List[Endpoint]:
+    """解析逗号分隔的后端列表
+
+    每一项为接口地址，可以用 "#" 附加 "|" 分隔的模型列表，限制该后端只处理这些模型，例如
+    "http://gpu1:11434/v1,http://gpu2:11434/v1#llama3.2:latest|qwen2.5:14b"
+
+    Args:
+        spec: 后端列表
+
+    Returns:
+        后端列表
+
+    Raises:
+        ValueError: 没有任何后端
+    """
+    endpoints = []
+    for item in spec.split(","):
+        url, _, models = item.strip().partition("#")
+        if url:
+            endpoints.append(Endpoint(url, [m.strip() for m in models.split("|") if m.strip()] or None))
+    if not endpoints:
+        raise ValueError("至少需要配置一个 LLM 后端")
+    return endpoints
+
+
+class LLMRouter:
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        cooldown: float = FAILURE_COOLDOWN,
+        decay: float = LATENCY_DECAY
+    ):
+        """在多个模型服务之间分配 LLM 调用
+
+        每次调用选择负载最低的后端，负载按 (进行中的调用数 + 1) × 平均调用耗时 估算，
+        因此较快的后端会分到更多请求。调用出错的后端在 cooldown 秒内不再分配请求，
+        出错的调用在其他提供同一模型的后端上重试。可被多个线程和事件循环共用。
+
+        Args:
+            endpoints: 后端列表
+            cooldown: 后端出错后暂停分配请求的秒数
+            decay: 调用耗时的指数加权平均系数
+        """
+        self.endpoints = list(endpoints)
+        self.cooldown = cooldown
+        self.decay = decay
+        self._lock = threading.Lock()
+
+    def choose(self, model: str, exclude: Sequence[Endpoint] = ()) -> Endpoint:
+        """选择一个后端并将其进行中的调用数加 1，调用结束后必须调用 release
+
+        Args:
+            model: 模型名称
+            exclude: 本次调用已经失败过的后端
+
+        Returns:
+            选中的后端
+
+        Raises:
+            NoEndpointError: 没有可以提供该模型的后端
+        """
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.serves(model) and e not in exclude]
+            if not candidates:
+                raise NoEndpointError(f"没有可以提供模型 {model} 的 LLM 后端")
+            now = time.monotonic()
+            # 全部后端都在暂停期时仍然尝试，由调用结果决定是否恢复
+            available = [e for e in candidates if e.down_until <= now] or candidates
+            # 还没有耗时样本的后端按其他后端的平均耗时估算
+            known = [e.latency for e in available if e.latency is not None]
+            default_latency = sum(known) / len(known) if known else 1.0
+            endpoint = min(
+                available,
+                key=lambda e: (e.in_flight + 1) * (e.latency if e.latency is not None else default_latency)
+            )
+            endpoint.in_flight += 1
+        metrics.LLM_ENDPOINT_IN_FLIGHT.labels(endpoint=endpoint.base_url).inc()
+        return endpoint
+
+    def release(self, endpoint: Endpoint, elapsed: Optional[float] = None, failed: bool = False) -> None:
+        """结束一次调用
+
+        Args:
+            endpoint: choose 返回的后端
+            elapsed: 调用耗时，成功时用于更新平均耗时
+            failed: 是否因后端错误失败，失败的后端暂停分配请求
+        """
+        with self._lock:
+            endpoint.in_flight -= 1
+            if failed:
+                endpoint.failures += 1
+                endpoint.down_until = time.monotonic() + self.cooldown
+            elif elapsed is not None:
+                endpoint.calls += 1
+                endpoint.down_until = 0.0
+                endpoint.latency = (
+                    elapsed if endpoint.latency is None
+                    else endpoint.latency + self.decay * (elapsed - endpoint.latency)
+                )
+        metrics.LLM_ENDPOINT_IN_FLIGHT.labels(endpoint=endpoint.base_url).dec()
+        if failed:
+            metrics.LLM_ENDPOINT_FAILURES.labels(endpoint=endpoint.base_url).inc()
+
+    def _attempts(self, model: str) -> int:
+        return sum(1 for e in self.endpoints if e.serves(model))
+
+    def call(self, model: str, fn: Callable[[Endpoint], T], can_retry: Callable[[BaseException], bool]) -> T:
+        """在选中的后端上调用 fn，出错且 can_retry 返回 True 时换一个后端重试
+
+        Args:
+            model: 模型名称
+            fn: 接收后端并执行一次调用的函数
+            can_retry: 判断异常是否由后端引起、可以在其他后端重试
+
+        Returns:
+            fn 的返回值
+
+        Raises:
+            NoEndpointError: 没有可以提供该模型的后端
+        """
+        tried: List[Endpoint] = []
+        while True:
+            endpoint = self.choose(model, tried)
+            started = time.perf_counter()
+            try:
+                result = fn(endpoint)
+            except BaseException as e:
+                retry = isinstance(e, Exception) and can_retry(e)
+                self.release(endpoint, failed=retry)
+                tried.append(endpoint)
+                if not retry or len(tried) >= self._attempts(model):
+                    raise
+                continue
+            self.release(endpoint, time.perf_counter() - started)
+            return result
+
+    async def acall(
+        self,
+        model: str,
+        fn: Callable[[Endpoint], Awaitable[T]],
+        can_retry: Callable[[BaseException], bool]
+    ) -> T:
+        """call 的异步版本"""
+        tried: List[Endpoint] = []
+        while True:
+            endpoint = self.choose(model, tried)
+            started = time.perf_counter()
+            try:
+                result = await fn(endpoint)
+            except BaseException as e:
+                # 取消（客户端断开）不算后端错误
+                retry = isinstance(e, Exception) and can_retry(e)
+                self.release(endpoint, failed=retry)
+                tried.append(endpoint)
+                if not retry or len(tried) >= self._attempts(model):
+                    raise
+                continue
+            self.release(endpoint, time.perf_counter() - started)
+            return result
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """各后端的进行中调用数、平均调用耗时、成功/失败次数和是否可用"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "base_url": e.base_url,
+                    "models": sorted(e.models) if e.models is not None else None,
+                    "in_flight": e.in_flight,
+                    "latency_seconds": e.latency,
+                    "calls": e.calls,
+                    "failures": e.failures,
+                    "available": e.down_until <= now,
+                }
+                for e in self.endpoints
+            ]
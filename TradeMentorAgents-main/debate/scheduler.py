@@ -0,0 +1,161 @@
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from debate import metrics
+from debate.timeouts import DeadlineExceeded
+
+
+class Schedule(NamedTuple):
+    """debate 的调度参数，可 pickle，可传入进程池中的任务"""
+    # 优先级，越大越先获得 LLM 调用名额
+    priority: int = 0
+    # 截止时间（Unix 时间戳），相同优先级时截止时间早的先调用，为 None 时排在有截止时间的请求之后；
+    # 到达截止时间时仍在排队的调用和进行中的调用都会以 DeadlineExceeded 结束
+    deadline: Optional[float] = None
+
+    def remaining(self) -> Optional[float]:
+        """距截止时间的秒数（可能为负），没有截止时间时返回 None"""
+        return self.deadline - time.time() if self.deadline is not None else None
+
+
+class _Waiter:
+    __slots__ = ("cost", "notify", "granted", "cancelled")
+
+    def __init__(self, cost: int, notify: Callable[[], None]):
+        self.cost = cost
+        self.notify = notify
+        self.granted = False
+        self.cancelled = False
+
+
+class TokenScheduler:
+    def __init__(self, max_tokens: int, completion_tokens: int = 0):
+        """按 token 数控制同时发往模型服务的 LLM 调用
+
+        所有进行中调用的估算 token 数（提示词 + 预留的回复 token）之和不超过 max_tokens；
+        超出时调用按 (优先级, 截止时间, 到达顺序) 排队。队首的调用放不下时后面较小的调用也不会插队，
+        避免长提示词一直得不到执行。单个调用超过 max_tokens 时按 max_tokens 计算，在没有其他调用时执行。
+        可被多个线程和事件循环共用。
+
+        Args:
+            max_tokens: 同时进行的 LLM 调用的 token 数上限
+            completion_tokens: 每次调用为回复预留的 token 数
+        """
+        if max_tokens <= 0:
+            raise ValueError("max_tokens 必须大于 0")
+        self.max_tokens = max_tokens
+        self.completion_tokens = completion_tokens
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, float, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def cost(self, prompt_tokens: int) -> int:
+        """一次调用占用的 token 数"""
+        return max(1, min(prompt_tokens + self.completion_tokens, self.max_tokens))
+
+    def _enqueue(self, waiter: _Waiter, schedule: Schedule) -> None:
+        deadline = schedule.deadline if schedule.deadline is not None else math.inf
+        with self._lock:
+            heapq.heappush(self._waiters, (-schedule.priority, deadline, next(self._seq), waiter))
+            self._grant()
+
+    def _grant(self) -> None:
+        """按顺序放行队首能放下的调用，调用方需持有锁"""
+        while self._waiters:
+            waiter = self._waiters[0][-1]
+            if waiter.cancelled:
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight + waiter.cost > self.max_tokens:
+                break
+            heapq.heappop(self._waiters)
+            self.in_flight += waiter.cost
+            waiter.granted = True
+            waiter.notify()
+        metrics.TOKENS_IN_FLIGHT.set(self.in_flight)
+        metrics.SCHEDULER_QUEUED.set(len(self._waiters))
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """放弃排队；已经获得名额时归还"""
+        with self._lock:
+            granted = waiter.granted
+            waiter.cancelled = True
+        if granted:
+            self.release(waiter.cost)
+
+    def release(self, cost: int) -> None:
+        """归还一次调用占用的 token 数"""
+        with self._lock:
+            self.in_flight -= cost
+            self._grant()
+
+    @contextmanager
+    def slot(self, prompt_tokens: int, schedule: Optional[Schedule] = None) -> Iterator[None]:
+        """等待获得调用名额，离开上下文时归还
+
+        Args:
+            prompt_tokens: 估算的提示词 token 数
+            schedule: 调度参数，为 None 时使用默认优先级
+
+        Raises:
+            DeadlineExceeded: 等到截止时间仍未获得名额
+        """
+        schedule = schedule or Schedule()
+        event = threading.Event()
+        waiter = _Waiter(self.cost(prompt_tokens), event.set)
+        started = time.perf_counter()
+        self._enqueue(waiter, schedule)
+        remaining = schedule.remaining()
+        if not event.wait(max(0.0, remaining) if remaining is not None else None):
+            self._abandon(waiter)
+            raise DeadlineExceeded("debate 的截止时间已到")
+        metrics.SCHEDULER_WAIT_SECONDS.observe(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            self.release(waiter.cost)
+
+    @asynccontextmanager
+    async def aslot(self, prompt_tokens: int, schedule: Optional[Schedule] = None) -> AsyncIterator[None]:
+        """slot 的异步版本，等待期间被取消或到达截止时间时放弃排队"""
+        schedule = schedule or Schedule()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake() -> None:
+            if not future.done():
+                future.set_result(None)
+
+        waiter = _Waiter(self.cost(prompt_tokens), lambda: loop.call_soon_threadsafe(wake))
+        started = time.perf_counter()
+        self._enqueue(waiter, schedule)
+        remaining = schedule.remaining()
+        try:
+            await asyncio.wait_for(future, max(0.0, remaining) if remaining is not None else None)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            raise DeadlineExceeded("debate 的截止时间已到") from None
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        metrics.SCHEDULER_WAIT_SECONDS.observe(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            self.release(waiter.cost)
+
+    def stats(self) -> Dict[str, Any]:
+        """进行中调用的 token 数、上限和排队的调用数"""
+        with self._lock:
+            return {
+                "tokens_in_flight": self.in_flight,
+                "max_tokens": self.max_tokens,
+                "queued": sum(1 for entry in self._waiters if not entry[-1].cancelled),
+            }
@@ -0,0 +1,157 @@
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+# 未能提取到分数时使用的中性分数
+DEFAULT_SCORE = 5.0
+
+# 一次扫描找出分数和操作建议的所有候选位置。每个分支以一个字符开头，整个模式以字符集开头，
+# sre 据此跳过不可能匹配的字符；不使用全局 IGNORECASE 和 ^，否则每个位置都要尝试全部分支。
+# 各分支只消耗不含数字的关键字（X/10 除外），不会遮住其他分支的候选位置，与原先对全文分别扫描的结果一致。
+_DECISION = re.compile(
+    r"[\n\dSsſ]"
+    r"(?:"
+    # "X/10" 或 "X out of 10"（从第一个数字开始）
+    r"(?<=\d)(?P<ratio>\d*+(?:\.\d+)?)\s*+(?:/|(?i:out of))\s*+10"
+    # 任意位置的 "score:"（不区分大小写），以及结果段落标题和其后的第一个数字
+    r"|(?<=[Ssſ])(?i:core)(?:(?P<any>:)|(?P<section>(?i: and recommendation))(?=(?s:.*?)(?P<first>\d+(?:\.\d+)?))?)"
+    r"|(?<=\n)(?:"
+    # 行首的 "Score:"（区分大小写）
+    r"[^\S\n]*(?P<line>Score:)"
+    # 行首的 "Action: BUY"、"**Conviction:** HIGH"、"- Sizing: [HALF] position" 等字段
+    r"|[ \t>*#-]*(?P<name>(?i:action|conviction|sizing))\**[ \t]*:(?=[ \t]*[*\[]*[ \t]*(?P<value>(?i:[a-z]+)))"
+    r"))"
+)
+# 行首 "Score:" 之后同一行的第一个单词，到同一行的下一个 "Score:" 为止（原实现按 "Score:" 分割该行）
+_LINE_VALUE = re.compile(r"[^\S\n]*((?:(?!Score:)\S)*)")
+# "score:" 之后的数值（可以换行）
+_SCORE_VALUE = re.compile(r"\s*(\d+(?:\.\d+)?)")
+
+# 决策数量达到该值时 parse_decisions 才使用进程池：每条决策的解析约需几十微秒，
+# 数量较少时启动进程和传递文本的开销（约 0.1 秒加上单进程耗时的一成）大于并行节省的时间
+PARALLEL_THRESHOLD = 10000
+
+
+class DecisionFields(NamedTuple):
+    """从交易决策中提取的结构化字段"""
+    score: float
+    action: Optional[str]  # BUY / SELL / HOLD
+    conviction: Optional[str]  # HIGH / MEDIUM / LOW
+    sizing: Optional[str]  # FULL / HALF / QUARTER
+    score_found: bool  # 为 False 时 score 为 DEFAULT_SCORE
+
+
+def _in_range(value: Optional[float]) -> bool:
+    return value is not None and 0 <= value <= 10
+
+
+def parse_decision(text: Optional[str]) -> DecisionFields:
+    """提取交易决策中的分数和操作建议
+
+    分数按以下优先级选取，与原先逐个正则扫描全文的结果一致：
+    行首 "Score: X" > 任意位置 "Score: X" > "X/10" 或 "X out of 10" > "SCORE AND RECOMMENDATION" 后的第一个数字，
+    只接受 0-10 之间的分数，都没有时返回 DEFAULT_SCORE；某个行首 "Score:" 后不是数字时不再使用之后的行首分数。
+    所有候选和 Action、Conviction、Sizing 都由 _DECISION 在一次扫描中找出；
+    有结果段落标题时字段只取标题之后的，没有时取全文的。
+
+    Args:
+        text: 交易决策文本
+
+    Returns:
+        结构化字段
+    """
+    if not text:
+        return DecisionFields(DEFAULT_SCORE, None, None, None, False)
+
+    # 行首的分支匹配换行符，在开头补一个使第一行也能匹配
+    text = "\n" + text
+    line = any_score = ratio = section = None
+    line_stopped = in_section = False
+    fields: Dict[str, str] = {}
+    section_fields: Dict[str, str] = {}
+
+    for match in _DECISION.finditer(text):
+        kind = match.lastgroup
+        if kind == "ratio":
+            if ratio is None:
+                value = float(text[match.start():match.end("ratio")])
+                if _in_range(value):
+                    ratio = value
+        elif kind in ("section", "first"):
+            if not in_section:
+                in_section = True
+                if kind == "first":
+                    section = float(match.group("first"))
+        elif kind == "value":
+            (section_fields if in_section else fields).setdefault(
+                match.group("name").lower(), match.group("value").upper()
+            )
+        else:  # "line" / "any"：行首的 "Score:" 同时也是任意位置的候选
+            if kind == "line" and line is None and not line_stopped:
+                try:
+                    value = float(_LINE_VALUE.match(text, match.end()).group(1).replace(",", "."))
+                except ValueError:
+                    line_stopped = True
+                else:
+                    if _in_range(value):
+                        line = value
+            if any_score is None:
+                value_match = _SCORE_VALUE.match(text, match.end())
+                if value_match is not None and _in_range(float(value_match.group(1))):
+                    any_score = float(value_match.group(1))
+
+    if in_section:
+        fields = section_fields
+    score = next((value for value in (line, any_score, ratio, section) if _in_range(value)), None)
+    return DecisionFields(
+        score if score is not None else DEFAULT_SCORE,
+        fields.get("action"),
+        fields.get("conviction"),
+        fields.get("sizing"),
+        score is not None
+    )
+
+
+def extract_score(text: Optional[str]) -> float:
+    """从交易决策中提取分数，无法提取时返回 DEFAULT_SCORE"""
+    return parse_decision(text).score
+
+
+def _parse_chunk(texts: List[Optional[str]]) -> List[DecisionFields]:
+    return [parse_decision(text) for text in texts]
+
+
+def parse_decisions(
+    texts: Iterable[Optional[str]],
+    processes: int = 1,
+    chunksize: int = 4096
+) -> List[DecisionFields]:
+    """批量解析交易决策，用于对大量历史决策重新评分
+
+    Args:
+        texts: 交易决策文本
+        processes: 进程数（不超过 CPU 核数），大于 1 且决策数量达到 PARALLEL_THRESHOLD 时分块在进程池中并行解析
+        chunksize: 每个进程每次处理的决策数
+
+    Returns:
+        与输入顺序一致的结构化字段列表
+    """
+    texts = list(texts)
+    processes = min(processes, os.cpu_count() or 1)
+    if processes <= 1 or len(texts) < PARALLEL_THRESHOLD:
+        return _parse_chunk(texts)
+
+    from multiprocessing import Pool
+
+    chunks = [texts[i:i + chunksize] for i in range(0, len(texts), chunksize)]
+    with Pool(processes) as pool:
+        return [fields for chunk in pool.imap(_parse_chunk, chunks) for fields in chunk]
+
+
+def extract_scores(
+    texts: Iterable[Optional[str]],
+    processes: int = 1,
+    chunksize: int = 4096
+) -> List[float]:
+    """批量提取分数，参数同 parse_decisions"""
+    return [fields.score for fields in parse_decisions(texts, processes, chunksize)]
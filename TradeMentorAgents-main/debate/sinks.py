@@ -0,0 +1,178 @@
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactRecord(NamedTuple):
+    """一条任务输出记录"""
+    request_id: str
+    round: int
+    kind: str  # bullish_analysis / bearish_analysis / trader_decision
+    content: str
+    created_at: float
+
+
+class ArtifactSink:
+    """持久化目标，子类实现 write_batch 即可接入 BatchWriter"""
+
+    def write_batch(self, records: List[Any]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+_UNSAFE_PATH_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+
+class DirectorySink(ArtifactSink):
+    def __init__(self, base_dir: str):
+        """将输出写入本地目录：<base_dir>/<request_id>/round_<n>_<kind>.txt
+
+        Args:
+            base_dir: 输出根目录
+        """
+        self.base_dir = base_dir
+
+    def write_batch(self, records: List[ArtifactRecord]) -> None:
+        for record in records:
+            directory = os.path.join(self.base_dir, _UNSAFE_PATH_CHARS.sub("_", record.request_id))
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"round_{record.round}_{record.kind}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(record.content)
+
+
+class SQLiteSink(ArtifactSink):
+    def __init__(self, path: str):
+        """将输出写入 SQLite 文件
+
+        Args:
+            path: SQLite 文件路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            "request_id TEXT NOT NULL, round INTEGER NOT NULL, kind TEXT NOT NULL, "
+            "content TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (request_id, round, kind))"
+        )
+        self._conn.commit()
+
+    def write_batch(self, records: List[ArtifactRecord]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO artifacts (request_id, round, kind, content, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            records
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class BatchWriter:
+    def __init__(
+        self,
+        sink: ArtifactSink,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        name: str = "batch-writer"
+    ):
+        """在后台线程中批量写入记录，调用方不会被磁盘 IO 阻塞
+
+        Args:
+            sink: 持久化目标
+            batch_size: 每批写入的最大记录数
+            flush_interval: 未攒满一批时的最长等待时间（秒）
+            max_pending: 待写入记录上限，超出后丢弃新记录
+            name: 后台线程名称
+        """
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, record: Any) -> None:
+        """提交一条记录，不等待写入完成；队列已满时丢弃并计数"""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        closed = False
+        while not closed:
+            batch: List[Any] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if record is None:
+                    closed = True
+                    break
+                batch.append(record)
+
+            if batch:
+                try:
+                    self.sink.write_batch(batch)
+                except Exception:
+                    self.failed += len(batch)
+                    logger.exception("%s 写入 %d 条记录失败", self._thread.name, len(batch))
+
+    def close(self) -> None:
+        """写完已提交的记录后关闭"""
+        self._queue.put(None)
+        self._thread.join()
+        self.sink.close()
+
+
+class AsyncArtifactWriter(BatchWriter):
+    def __init__(
+        self,
+        sink: ArtifactSink,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000
+    ):
+        """在后台线程中批量写入任务输出
+
+        Args:
+            sink: 持久化目标
+            batch_size: 每批写入的最大记录数
+            flush_interval: 未攒满一批时的最长等待时间（秒）
+            max_pending: 待写入记录上限，超出后丢弃新记录
+        """
+        super().__init__(sink, batch_size, flush_interval, max_pending, name="artifact-writer")
+
+    def write(self, request_id: str, round_num: int, kind: str, content: str) -> None:
+        """提交一条输出记录，不等待写入完成
+
+        Args:
+            request_id: 请求 ID
+            round_num: 轮次（从1开始）
+            kind: 输出类型
+            content: 输出内容
+        """
+        self.put(ArtifactRecord(request_id, round_num, kind, content, time.time()))
@@ -1,4 +1,5 @@
-from typing import TypedDict, List, Dict, Any, Optional, Literal, Union
+from typing import TypedDict, List, Dict, Any, Iterable, Mapping, NamedTuple, Optional, Literal, Sequence, Tuple, Union
+import uuid
 
 # Define input data types
 class InputData(TypedDict):
@@ -6,20 +7,40 @@ class InputData(TypedDict):
     data: Any  # 数据内容可以是任意类型
     date: str
 
+class DebateRound(NamedTuple):
+    """One debate round. Each analysis is stored only here (no per-instance __dict__)."""
+    bullish_analysis: str
+    bearish_analysis: str
+    trader_decision: str
+
 # Define state structure for the workflow
 class State(TypedDict):
-    inputs: List[InputData]  # 存储所有输入数据
-    analyses: List[str]
+    request_id: str  # 请求 ID，用于区分并发 debate 的输出
+    inputs: Optional[List[InputData]]  # 原始输入数据，渲染为文本后置为 None，只保留 input_hash
+    input_hash: Optional[str]  # 输入数据的规范化哈希
+    symbol: Optional[str]  # 输入数据中的股票代码，与 input_date 一起在从检查点继续后保存结果时使用
+    input_date: Optional[str]  # 输入数据中最新的日期
+    inputs_text: Optional[str]  # 渲染后的完整输入文本，每次 debate 只渲染一次
+    inputs_brief: Optional[str]  # 渲染后的简要输入文本，只在启用 ContextBudget.brief_inputs 时渲染
     trader_scores: List[float]
-    debate_rounds: List[Dict[str, str]]
+    debate_rounds: List[DebateRound]
+    debate_summary: Optional[str]  # 之前回合的滚动摘要，大小受 ContextBudget.history 限制
     decision: Optional[str]
+    stop_policy: Optional[Dict[str, Any]]  # 使用的结束条件，从检查点继续时据此重建工作流
+    timed_out: Optional[str]  # 因 LLM 调用超时（timeout）或到达截止时间（deadline）提前结束时的原因，结果为已完成回合的决策
 
 # Helper functions for state manipulation if needed
-def initialize_state(input_data: List[InputData] = None) -> State:
+def initialize_state(
+    input_data: List[InputData] = None,
+    request_id: Optional[str] = None,
+    stop_policy: Optional[Dict[str, Any]] = None
+) -> State:
     """Initialize the state for the trading workflow.
     
     Args:
         input_data: List of input data. Cannot be None or empty.
+        request_id: Request id used to key per-debate outputs and checkpoints. A random id is generated if None.
+        stop_policy: The StoppingPolicy of the run as a dict, kept so that a checkpointed run can be resumed.
     
     Returns:
         A new state dictionary with provided inputs.
@@ -32,13 +53,93 @@ def initialize_state(input_data: List[InputData] = None) -> State:
         raise ValueError("输入数据不能为空，必须提供至少一条输入数据")
     
     return {
+        "request_id": request_id or uuid.uuid4().hex,
         "inputs": input_data,
-        "analyses": [],
+        "input_hash": None,
+        "symbol": None,
+        "input_date": None,
+        "inputs_text": None,
+        "inputs_brief": None,
         "trader_scores": [],
         "debate_rounds": [],
-        "decision": None
+        "debate_summary": None,
+        "decision": None,
+        "stop_policy": stop_policy,
+        "timed_out": None
     }
 
+def round_dicts(rounds: Iterable[Union[DebateRound, Mapping[str, str]]]) -> List[Dict[str, str]]:
+    """Convert debate rounds to plain dicts for JSON output.
+    
+    Args:
+        rounds: DebateRound records (or dicts, e.g. from older stored results).
+    
+    Returns:
+        A list of {"bullish_analysis", "bearish_analysis", "trader_decision"} dicts.
+    """
+    return [item._asdict() if isinstance(item, DebateRound) else dict(item) for item in rounds or []]
+
+def _analyses(state: Mapping[str, Any]) -> List[str]:
+    # 按原先的顺序展开：每轮先看多后看空
+    return [text for item in round_dicts(state.get("debate_rounds"))
+            for text in (item["bullish_analysis"], item["bearish_analysis"])]
+
+# 可在响应中返回的字段 -> 从最终状态中取值的函数
+STATE_FIELDS = {
+    "request_id": lambda state: state.get("request_id"),
+    "input_hash": lambda state: state.get("input_hash"),
+    "decision": lambda state: state.get("decision"),
+    "score": lambda state: state["trader_scores"][-1] if state.get("trader_scores") else None,
+    "trader_scores": lambda state: list(state.get("trader_scores") or []),
+    "debate_rounds": lambda state: round_dicts(state.get("debate_rounds")),
+    "analyses": _analyses,
+    "timed_out": lambda state: state.get("timed_out"),
+}
+# 字段别名
+FIELD_ALIASES = {"scores": "trader_scores", "rounds": "debate_rounds"}
+# 未指定 fields 时返回的字段（不含原始输入和重复的 analyses）
+DEFAULT_FIELDS = ("request_id", "input_hash", "trader_scores", "debate_rounds", "decision", "timed_out")
+
+def parse_fields(spec: Optional[Union[str, Sequence[str]]]) -> Optional[Tuple[str, ...]]:
+    """Parse a response projection such as "decision,scores".
+    
+    Args:
+        spec: Comma separated field names (or a sequence of them). Aliases "scores" and "rounds" are accepted.
+    
+    Returns:
+        Canonical field names in request order, or None when spec is empty.
+        
+    Raises:
+        ValueError: If a field name is unknown.
+    """
+    if not spec:
+        return None
+    names = spec.split(",") if isinstance(spec, str) else spec
+    fields = []
+    for name in (name.strip() for name in names):
+        if not name:
+            continue
+        name = FIELD_ALIASES.get(name, name)
+        if name not in STATE_FIELDS:
+            raise ValueError(f"未知的字段: {name}，可选: {', '.join(sorted(set(STATE_FIELDS) | set(FIELD_ALIASES)))}")
+        if name not in fields:
+            fields.append(name)
+    return tuple(fields) or None
+
+def project_state(state: Optional[Mapping[str, Any]], fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+    """Project a final workflow state into a JSON-serializable response dict.
+    
+    Args:
+        state: Final state returned by the workflow.
+        fields: Canonical field names from parse_fields. DEFAULT_FIELDS is used if None.
+    
+    Returns:
+        A dict containing only the requested fields, or None if state is None.
+    """
+    if state is None:
+        return None
+    return {name: STATE_FIELDS[name](state) for name in fields or DEFAULT_FIELDS}
+
 def get_sample_inputs() -> List[InputData]:
     """Get sample inputs for testing.
     
@@ -0,0 +1,232 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from debate.cache import hash_inputs
+from debate.sinks import ArtifactSink
+from debate.state import round_dicts
+
+# 列表查询返回的字段（不含每轮分析全文）
+_SUMMARY_COLUMNS = (
+    "id, request_id, input_hash, symbol, input_date, rounds, final_score, scores, "
+    "decision, stop_policy, model, elapsed, created_at"
+)
+
+
+class DebateRecord(NamedTuple):
+    """一次已完成 debate 的持久化记录"""
+    request_id: Optional[str]
+    input_hash: str
+    symbol: Optional[str]
+    input_date: Optional[str]
+    rounds: int
+    final_score: Optional[float]
+    scores: str  # JSON 数组
+    decision: Optional[str]
+    debate_rounds: str  # JSON 数组
+    stop_policy: Optional[str]  # JSON 对象
+    model: Optional[str]
+    elapsed: Optional[float]
+    created_at: float
+
+
+def _input_dict(item: Any) -> Dict[str, Any]:
+    return item.model_dump() if hasattr(item, "model_dump") else dict(item)
+
+
+def extract_symbol(inputs: List[Any]) -> Optional[str]:
+    """从输入数据中取出股票代码（价格数据或新闻数据中的 symbol/ticker 字段），没有时返回 None"""
+    for item in inputs or []:
+        data = _input_dict(item).get("data")
+        if isinstance(data, Mapping):
+            for field in ("symbol", "ticker"):
+                if data.get(field):
+                    return str(data[field]).upper()
+    return None
+
+
+def latest_input_date(inputs: List[Any]) -> Optional[str]:
+    """输入数据中最新的日期（debate 针对的交易日），没有时返回 None"""
+    dates = [str(_input_dict(item).get("date")) for item in inputs or [] if _input_dict(item).get("date")]
+    return max(dates) if dates else None
+
+
+def make_record(
+    inputs: List[Any],
+    result: Mapping[str, Any],
+    elapsed: Optional[float] = None,
+    policy: Optional[Mapping[str, Any]] = None,
+    model: Optional[str] = None
+) -> DebateRecord:
+    """根据输入数据和工作流最终状态构造持久化记录
+
+    Args:
+        inputs: 输入数据列表，从检查点继续的 debate 没有原始输入，使用最终状态中保存的哈希、股票代码和日期
+        result: 工作流最终状态
+        elapsed: debate 总耗时（秒）
+        policy: 使用的结束条件
+        model: 模型名称（交易决策使用的模型）
+
+    Returns:
+        持久化记录
+    """
+    scores = list(result.get("trader_scores") or [])
+    debate_rounds = round_dicts(result.get("debate_rounds"))
+    return DebateRecord(
+        request_id=result.get("request_id"),
+        input_hash=result.get("input_hash") or hash_inputs(inputs),
+        symbol=result.get("symbol") or extract_symbol(inputs),
+        input_date=result.get("input_date") or latest_input_date(inputs),
+        rounds=len(debate_rounds),
+        final_score=scores[-1] if scores else None,
+        scores=json.dumps(scores),
+        decision=result.get("decision"),
+        debate_rounds=json.dumps(debate_rounds, ensure_ascii=False),
+        stop_policy=json.dumps(dict(policy)) if policy is not None else None,
+        model=model,
+        elapsed=elapsed,
+        created_at=time.time()
+    )
+
+
+def parse_database_url(url: str) -> str:
+    """从 DATABASE_URL 中取出 SQLite 文件路径
+
+    Args:
+        url: 形如 "sqlite:///debates.db"（相对路径）或 "sqlite:////var/lib/debates.db"（绝对路径）
+
+    Returns:
+        SQLite 文件路径
+
+    Raises:
+        ValueError: 不是 SQLite 地址
+    """
+    prefix = "sqlite:///"
+    if not url.startswith(prefix):
+        raise ValueError(f"DATABASE_URL 目前只支持 SQLite（{prefix}<path>）: {url}")
+    return url[len(prefix):]
+
+
+class DebateStore(ArtifactSink):
+    def __init__(self, path: str):
+        """将 debate 结果保存到 SQLite，并按股票代码、日期和输入哈希建立索引
+
+        可作为 BatchWriter 的持久化目标在后台批量写入，查询方法可在任意线程调用。
+
+        Args:
+            path: SQLite 文件路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS debates ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, request_id TEXT, input_hash TEXT NOT NULL, "
+            "symbol TEXT, input_date TEXT, rounds INTEGER NOT NULL, final_score REAL, scores TEXT NOT NULL, "
+            "decision TEXT, debate_rounds TEXT NOT NULL, stop_policy TEXT, model TEXT, elapsed REAL, "
+            "created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_debates_symbol_date ON debates (symbol, input_date, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_debates_date ON debates (input_date, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_debates_input_hash ON debates (input_hash, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_debates_request_id ON debates (request_id)")
+        self._conn.commit()
+
+    def write_batch(self, records: List[DebateRecord]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT INTO debates ({', '.join(DebateRecord._fields)}) "
+                f"VALUES ({', '.join('?' * len(DebateRecord._fields))})",
+                records
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        for field in ("scores", "debate_rounds", "stop_policy"):
+            if record.get(field) is not None:
+                record[field] = json.loads(record[field])
+        return record
+
+    def get(self, debate_id: int) -> Optional[Dict[str, Any]]:
+        """按 ID 获取完整记录（包括每轮分析全文），不存在时返回 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM debates WHERE id = ?", (debate_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def find(
+        self,
+        symbol: Optional[str] = None,
+        input_date: Optional[str] = None,
+        input_hash: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """按条件查询记录摘要，最新的在前
+
+        Args:
+            symbol: 股票代码
+            input_date: 输入数据的最新日期（YYYY-MM-DD）
+            input_hash: 输入数据的规范化哈希
+            limit: 最多返回的条数
+
+        Returns:
+            记录摘要列表（不含每轮分析全文）
+        """
+        conditions = []
+        params: List[Any] = []
+        for column, value in (("symbol", symbol.upper() if symbol else None), ("input_date", input_date),
+                              ("input_hash", input_hash)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_SUMMARY_COLUMNS} FROM debates{where} ORDER BY created_at DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def latest_for_inputs(self, inputs: List[Any]) -> Optional[Dict[str, Any]]:
+        """获取与给定输入数据完全相同的最近一次 debate 的完整记录，没有时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM debates WHERE input_hash = ? ORDER BY created_at DESC LIMIT 1",
+                (hash_inputs(inputs),)
+            ).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def iter_decisions(self, batch_size: int = 10000) -> Iterator[List[Tuple[int, Optional[str]]]]:
+        """按 ID 顺序分批读取所有交易决策，用于批量重新评分
+
+        每批单独查询，不会长时间持有锁，读取期间仍可写入新记录。
+
+        Args:
+            batch_size: 每批的条数
+
+        Returns:
+            (id, decision) 列表的迭代器
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, decision FROM debates WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield [(row["id"], row["decision"]) for row in rows]
+            last_id = rows[-1]["id"]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional, Tuple
+
+if TYPE_CHECKING:
+    from debate.scheduler import Schedule
+
+# 事件接收函数，接收一个可 JSON 序列化的事件字典
+EventSink = Callable[[Dict[str, Any]], None]
+
+# 当前线程/协程正在运行的任务所绑定的事件接收函数及其元数据
+_current_sink: ContextVar[Optional[Tuple[EventSink, Dict[str, Any]]]] = ContextVar(
+    "debate_event_sink", default=None
+)
+
+
+def emit_token(token: str) -> None:
+    """将 token 发送给当前任务绑定的事件接收函数，未绑定时忽略"""
+    bound = _current_sink.get()
+    if bound is None or not token:
+        return
+    sink, meta = bound
+    sink({"type": "token", **meta, "delta": token})
+
+
+@contextmanager
+def stream_to(sink: Optional[EventSink], **meta: Any) -> Iterator[None]:
+    """在上下文范围内将 token 事件发送到指定的接收函数
+
+    Args:
+        sink: 事件接收函数，为 None 时不发送任何事件
+        **meta: 附加到每个 token 事件上的元数据（如 agent、round）
+    """
+    if sink is None:
+        yield
+        return
+    token = _current_sink.set((sink, meta))
+    try:
+        yield
+    finally:
+        _current_sink.reset(token)
+
+
+def get_event_sink(config: Optional[Dict[str, Any]]) -> Optional[EventSink]:
+    """从 LangGraph 运行配置中取出事件接收函数
+
+    Args:
+        config: 节点收到的运行配置
+
+    Returns:
+        事件接收函数，未配置时返回 None
+    """
+    if not config:
+        return None
+    return config.get("configurable", {}).get("event_sink")
+
+
+def get_schedule(config: Optional[Dict[str, Any]]) -> Optional["Schedule"]:
+    """从 LangGraph 运行配置中取出本次运行的调度参数（优先级、截止时间）
+
+    Args:
+        config: 节点收到的运行配置
+
+    Returns:
+        调度参数，未配置时返回 None
+    """
+    if not config:
+        return None
+    return config.get("configurable", {}).get("schedule")
@@ -1,37 +1,62 @@
-from crewai import Task
-from debate.agents import bullish_researcher, bearish_researcher, trader_agent
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+from debate.agents import get_agent
+from debate.render import render_inputs
 from textwrap import dedent
 
+if TYPE_CHECKING:
+    from crewai import Task
+
 class TradingTasks:
-    def bullish_analysis_task(self, inputs=None, previous_round=None, bearish_analysis=None):
+    def _render(self, inputs):
+        """将输入数据渲染为紧凑文本，已渲染的文本原样返回"""
+        if inputs is None or isinstance(inputs, str):
+            return inputs
+        return render_inputs(inputs)
+    
+    def _memory_section(self, memory):
+        """该智能体之前各轮观点的要点，没有时为空字符串"""
+        if not memory:
+            return ""
+        return dedent("""
+            
+            Your own key points from earlier rounds (stay consistent and build on them rather than repeating them):
+            {memory}
+            """).format(memory=memory)
+    
+    def bullish_analysis_task(self, inputs=None, previous_round=None, bearish_analysis=None, memory=None):
         """创建看多分析任务
         
         Args:
-            inputs: 输入数据
+            inputs: 输入数据，可以是 render_inputs 渲染好的文本
             previous_round: 前一轮次号码（如果有）
             bearish_analysis: 前一轮看空分析（如果有）
+            memory: 该智能体之前各轮观点的要点（如果有）
             
         Returns:
             配置好的Task对象
         """
-        description = dedent(f"""
+        inputs = self._render(inputs)
+        description = dedent("""
             Analyze the inputs content and identify all bullish signals that suggest buying. 
             Focus on growth potential, positive indicators, and favorable market conditions.
             Then, counter any bearish arguments with solid reasoning.
             
             Here is the inputs to analyze:
             {inputs}
-            """)
+            """).format(inputs=inputs)
             
         # 如果有前一轮分析，添加相关内容
         if previous_round and bearish_analysis:
-            description += dedent(f"""
+            description += dedent("""
                 
                 Your analysis should also address the following bearish analysis from round {previous_round}:
                 
                 BEARISH ANALYSIS:
                 {bearish_analysis}
-                """)
+                """).format(previous_round=previous_round, bearish_analysis=bearish_analysis)
+            
+        description += self._memory_section(memory)
             
         description += dedent("""
             
@@ -56,42 +81,46 @@ class TradingTasks:
             [Your final recommendation with conviction level]
             """)
             
+        from crewai import Task
         return Task(
             description=description,
             expected_output="A structured bullish analysis highlighting buying opportunities with strong counters to bearish arguments",
-            agent=bullish_researcher,
-            output_file="debate/output/bullish_analysis.txt",
+            agent=get_agent("bullish"),
         )
     
-    def bearish_analysis_task(self, inputs=None, previous_round=None, bullish_analysis=None):
+    def bearish_analysis_task(self, inputs=None, previous_round=None, bullish_analysis=None, memory=None):
         """创建看空分析任务
         
         Args:
-            inputs: 输入数据
+            inputs: 输入数据，可以是 render_inputs 渲染好的文本
             previous_round: 前一轮次号码（如果有）
             bullish_analysis: 前一轮看多分析（如果有）
+            memory: 该智能体之前各轮观点的要点（如果有）
             
         Returns:
             配置好的Task对象
         """
-        description = dedent(f"""
+        inputs = self._render(inputs)
+        description = dedent("""
             Analyze the inputs content and identify all bearish signals that suggest caution or selling.
             Focus on risks, negative indicators, and unfavorable market conditions.
             Then, counter any bullish arguments with solid reasoning.
             
             Here is the inputs content to analyze:
             {inputs}
-            """)
+            """).format(inputs=inputs)
             
         # 如果有前一轮分析，添加相关内容
         if previous_round and bullish_analysis:
-            description += dedent(f"""
+            description += dedent("""
                 
                 Your analysis should also address the following bullish analysis from round {previous_round}:
                 
                 BULLISH ANALYSIS:
                 {bullish_analysis}
-                """)
+                """).format(previous_round=previous_round, bullish_analysis=bullish_analysis)
+            
+        description += self._memory_section(memory)
             
         description += dedent("""
             
@@ -116,53 +145,64 @@ class TradingTasks:
             [Your final recommendation with conviction level]
             """)
             
+        from crewai import Task
         return Task(
             description=description,
             expected_output="A structured bearish analysis highlighting risks with strong counters to bullish arguments",
-            agent=bearish_researcher,
-            output_file="debate/output/bearish_analysis.txt",
+            agent=get_agent("bearish"),
         )
     
-    def trader_decision_task(self, inputs=None, previous_round=None, bullish_analysis=None, bearish_analysis=None):
+    def trader_decision_task(self, inputs=None, previous_round=None, bullish_analysis=None, bearish_analysis=None,
+                             history=None):
         """创建交易决策任务
         
         Args:
-            inputs: 输入数据
+            inputs: 输入数据，可以是 render_inputs 渲染好的文本
             previous_round: 前一轮次号码（如果有）
             bullish_analysis: 看多分析（如果有）
             bearish_analysis: 看空分析（如果有）
+            history: 之前回合的摘要（如果有）
             
         Returns:
             配置好的Task对象
         """
-        description = dedent(f"""
+        inputs = self._render(inputs)
+        description = dedent("""
             Evaluate the debate between bullish and bearish researchers and make a trading decision.
             
             Here is the inputs content that was analyzed:
             {inputs}
-            """)
+            """).format(inputs=inputs)
             
         # 添加轮次信息（如果有）
         if previous_round:
-            description += dedent(f"""
+            description += dedent("""
                 
                 This is round {previous_round} of the debate.
-                """)
+                """).format(previous_round=previous_round)
+            
+        # 添加之前回合的摘要（如果有）
+        if history:
+            description += dedent("""
+                
+                SUMMARY OF EARLIER ROUNDS:
+                {history}
+                """).format(history=history)
             
         # 添加分析内容（如果有）
         if bullish_analysis:
-            description += dedent(f"""
+            description += dedent("""
                 
                 BULLISH ANALYSIS:
                 {bullish_analysis}
-                """)
+                """).format(bullish_analysis=bullish_analysis)
             
         if bearish_analysis:
-            description += dedent(f"""
+            description += dedent("""
                 
                 BEARISH ANALYSIS:
                 {bearish_analysis}
-                """)
+                """).format(bearish_analysis=bearish_analysis)
         
         description += dedent("""
             
@@ -202,18 +242,29 @@ class TradingTasks:
             Sizing: [FULL/HALF/QUARTER] position
             """)
             
+        from crewai import Task
         return Task(
             description=description,
             expected_output="A structured decision with numeric score, clear rationale, and specific action recommendation",
-            agent=trader_agent,
-            output_file="debate/output/trader_decision.txt",
+            agent=get_agent("trader"),
         )
 
 
 # 创建任务生成器实例
 trading_tasks = TradingTasks()
 
-# 导出基础任务（用于向后兼容，实际运行时应直接使用TradingTasks实例创建任务）
-bullish_analysis_task = trading_tasks.bullish_analysis_task()
-bearish_analysis_task = trading_tasks.bearish_analysis_task()
-trader_decision_task = trading_tasks.trader_decision_task() 
\ No newline at end of file
+# 基础任务（用于向后兼容，实际运行时应直接使用TradingTasks实例创建任务），在第一次访问时才创建
+_BASE_TASKS = {
+    "bullish_analysis_task": trading_tasks.bullish_analysis_task,
+    "bearish_analysis_task": trading_tasks.bearish_analysis_task,
+    "trader_decision_task": trading_tasks.trader_decision_task,
+}
+
+@lru_cache()
+def _get_base_task(name: str) -> "Task":
+    return _BASE_TASKS[name]()
+
+def __getattr__(name: str) -> Any:
+    if name in _BASE_TASKS:
+        return _get_base_task(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
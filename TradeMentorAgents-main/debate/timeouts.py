@@ -0,0 +1,122 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Tuple
+
+
+class LLMTimeoutError(TimeoutError):
+    """单次 LLM 调用超过了超时时间"""
+
+
+class DeadlineExceeded(LLMTimeoutError):
+    """debate 的截止时间已到"""
+
+
+def call_budget(timeout: Optional[float], deadline: Optional[float]) -> Optional[float]:
+    """计算一次 LLM 调用最多可用的秒数：单次调用超时与距截止时间的剩余时间中较小的一个
+
+    Args:
+        timeout: 单次调用超时（秒），为 None 时不限制
+        deadline: debate 的截止时间（Unix 时间戳），为 None 时不限制
+
+    Returns:
+        可用秒数，两者都为 None 时返回 None
+
+    Raises:
+        DeadlineExceeded: 截止时间已过
+    """
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise DeadlineExceeded("debate 的截止时间已到")
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def timeout_error(timeout: Optional[float], deadline: Optional[float]) -> LLMTimeoutError:
+    """用完 call_budget 给出的时间后应抛出的异常：截止时间已到（或只有截止时间）时为 DeadlineExceeded"""
+    if timeout is None or (deadline is not None and time.time() >= deadline):
+        return DeadlineExceeded("debate 的截止时间已到")
+    return LLMTimeoutError(f"LLM 调用超过 {timeout:g} 秒未完成")
+
+
+def is_timeout(exc: BaseException) -> bool:
+    """异常（或引起它的异常）是否为超时，包括 HTTP 客户端的超时异常（如 httpx.ReadTimeout、openai.APITimeoutError）"""
+    seen = set()
+    current: Optional[BaseException] = exc
+    while current is not None and id(current) not in seen:
+        if isinstance(current, TimeoutError) or "Timeout" in type(current).__name__:
+            return True
+        seen.add(id(current))
+        current = current.__cause__ or current.__context__
+    return False
+
+
+# 当前线程中正在进行的 LLM 调用的时限：(到期时的 monotonic 时间, 单次调用超时, 截止时间)
+_call_limit: ContextVar[Optional[Tuple[float, Optional[float], Optional[float]]]] = ContextVar(
+    "debate_call_limit", default=None
+)
+
+
+@contextmanager
+def limit_call(timeout: Optional[float], deadline: Optional[float]) -> Iterator[Optional[float]]:
+    """在上下文范围内限制一次阻塞的 LLM 调用（如 crew.kickoff）的总时长，调用在当前线程中结束，不会被放弃后继续运行
+
+    上下文中发出的 HTTP 请求以剩余时间作为超时（见 remaining_call），结束迟迟没有响应的请求；
+    流式生成期间 check_call 在每个 token 到达时检查时限，结束生成过久的调用。
+    上下文中抛出的 HTTP 超时异常转换为 LLMTimeoutError / DeadlineExceeded。
+
+    Args:
+        timeout: 单次调用超时（秒），为 None 时不限制
+        deadline: debate 的截止时间（Unix 时间戳），为 None 时不限制
+
+    Yields:
+        可用秒数，两者都为 None 时为 None
+
+    Raises:
+        LLMTimeoutError: 超过单次调用超时
+        DeadlineExceeded: 截止时间已到
+    """
+    budget = call_budget(timeout, deadline)
+    if budget is None:
+        yield None
+        return
+    token = _call_limit.set((time.monotonic() + budget, timeout, deadline))
+    try:
+        yield budget
+    except LLMTimeoutError:
+        raise
+    except Exception as e:
+        if is_timeout(e):
+            raise timeout_error(timeout, deadline) from e
+        raise
+    finally:
+        _call_limit.reset(token)
+
+
+def remaining_call() -> Optional[float]:
+    """当前 LLM 调用距 limit_call 设置的时限还剩的秒数，用作调用中每个 HTTP 请求的超时；未设置时限时返回 None
+
+    Raises:
+        LLMTimeoutError: 超过单次调用超时
+        DeadlineExceeded: 截止时间已到
+    """
+    limit = _call_limit.get()
+    if limit is None:
+        return None
+    remaining = limit[0] - time.monotonic()
+    if remaining <= 0:
+        raise timeout_error(limit[1], limit[2])
+    return remaining
+
+
+def check_call() -> None:
+    """检查当前 LLM 调用是否已超过 limit_call 设置的时限，未设置时限时直接返回
+
+    Raises:
+        LLMTimeoutError: 超过单次调用超时
+        DeadlineExceeded: 截止时间已到
+    """
+    limit = _call_limit.get()
+    if limit is not None and time.monotonic() >= limit[0]:
+        raise timeout_error(limit[1], limit[2])
@@ -9,6 +9,7 @@ from langchain_openai import ChatOpenAI
 from debate.state import State, initialize_state, get_sample_news
 from debate.agents import bullish_researcher, bearish_researcher, trader_agent
 from debate.tasks import bullish_analysis_task, bearish_analysis_task, trader_decision_task
+from debate.scoring import extract_score
 
 class TradingWorkflow:
     def __init__(
@@ -51,23 +52,7 @@ class TradingWorkflow:
         Returns:
             The extracted score as a float.
         """
-        try:
-            # Look for "Score: X" in the decision text
-            lines = decision_text.split("\n")
-            for line in lines:
-                if line.strip().startswith("Score:"):
-                    # Extract the score value
-                    score_part = line.strip().split("Score:")[1].strip()
-                    # Take the first word and convert to float
-                    score = float(score_part.split()[0])
-                    return score
-        except Exception as e:
-            if self.debug:
-                print(f"Error extracting score: {e}")
-            return 5.0  # Default to neutral if extraction fails
-        
-        # If no score found, default to neutral
-        return 5.0
+        return extract_score(decision_text)
     
     def create_round_tasks(self, round_num: int) -> List[Task]:
         """为当前回合创建任务，并传入必要的上下文
@@ -4,7 +4,7 @@ import os
 import sys
 import json
 from debate.graph import TradingWorkflow
-from debate.state import initialize_state, get_sample_inputs
+from debate.state import STATE_FIELDS, initialize_state, get_sample_inputs, project_state
 def main():
     # 设置日志等级
     debug = "--debug" in sys.argv
@@ -46,7 +46,7 @@ def main():
     
     # 保存结果到文件
     with open("trading_result.json", "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+        json.dump(project_state(result, tuple(STATE_FIELDS)), f, ensure_ascii=False, indent=2)
     
     # 输出决策
     print("\n====== 交易决策 ======")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 与 benchmarks 相同，直接从源码目录导入 debate 包和 API 的 app 包
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "api")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,86 @@
+"""执行器的准入控制：名额用完时拒绝请求（API 返回 503），名额在任务真正结束后才释放"""
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.core.executor import DebateExecutor, QueueFullError  # noqa: E402
+from debate.state import get_sample_inputs  # noqa: E402
+
+
+def block(event):
+    event.wait(5)
+    return "done"
+
+
+def test_rejects_when_capacity_is_used():
+    executor = DebateExecutor(kind="thread", max_workers=1, max_queue=1)
+    try:
+        executor.reserve()
+        executor.reserve()
+        with pytest.raises(QueueFullError):
+            executor.reserve()
+        executor.release()
+        executor.reserve()
+        assert executor.in_flight == executor.capacity == 2
+    finally:
+        executor.shutdown()
+
+
+def test_slot_is_held_until_the_job_finishes():
+    executor = DebateExecutor(kind="thread", max_workers=1, max_queue=0)
+    finish = threading.Event()
+
+    async def main():
+        waiter = asyncio.ensure_future(executor.submit(block, finish))
+        await asyncio.sleep(0.05)
+        assert executor.in_flight == 1
+        with pytest.raises(QueueFullError):
+            await executor.submit(block, finish)
+
+        # 等待方被取消（客户端断开）时线程中的任务仍在运行，名额不释放
+        waiter.cancel()
+        await asyncio.sleep(0.05)
+        assert executor.in_flight == 1
+
+        finish.set()
+        for _ in range(100):
+            if executor.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert executor.in_flight == 0
+
+    try:
+        asyncio.run(main())
+    finally:
+        executor.shutdown()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    pytest.importorskip("fastapi")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.core.coalesce import FlightRegistry
+    from app.routers import base
+
+    # 名额已被占满的执行器
+    executor = DebateExecutor(kind="thread", max_workers=1, max_queue=0)
+    executor.reserve()
+    monkeypatch.setattr(base, "get_executor", lambda: executor)
+    monkeypatch.setattr(base, "get_flights", lambda: FlightRegistry())
+
+    app = FastAPI()
+    app.include_router(base.router)
+    yield TestClient(app)
+    executor.shutdown()
+
+
+@pytest.mark.parametrize("path", ["/debate", "/debate/stream"])
+def test_api_returns_503_when_queue_is_full(client, path):
+    response = client.post(path, json={"data": get_sample_inputs()})
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
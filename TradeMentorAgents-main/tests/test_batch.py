@@ -0,0 +1,27 @@
+"""批量 debate 共享批量名额，不占满单个请求的并发"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.core.executor import DebateExecutor  # noqa: E402
+
+
+def test_batch_jobs_share_batch_slots():
+    executor = DebateExecutor(kind="async", max_workers=8, max_queue=0, batch_concurrency=2)
+    running = []
+    peak = []
+
+    async def job():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.02)
+        running.pop()
+
+    async def main():
+        await asyncio.gather(*(executor.submit_batched(job) for _ in range(6)))
+
+    asyncio.run(main())
+    assert max(peak) == 2
+    assert executor.in_flight == 0
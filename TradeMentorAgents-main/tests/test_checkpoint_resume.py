@@ -0,0 +1,83 @@
+"""从检查点继续失败的 debate：已完成的回合不重新运行"""
+import time
+
+import pytest
+
+pytest.importorskip("langgraph.checkpoint.sqlite")
+
+import debate.graph  # noqa: E402
+from debate.checkpoint import make_checkpointer  # noqa: E402
+from debate.graph import TradingWorkflow  # noqa: E402
+from debate.nodes import Nodes  # noqa: E402
+from debate.policy import StoppingPolicy  # noqa: E402
+from debate.state import get_sample_inputs  # noqa: E402
+
+
+class ScriptedNodes(Nodes):
+    """不调用 LLM 的 Nodes：记录运行的回合，fail_rounds 中的回合第一次运行时抛出异常"""
+    calls = []
+    fail_rounds = set()
+
+    def _analysis_round(self, state, config=None):
+        started = time.perf_counter()
+        current_round = len(state["debate_rounds"])
+        self.calls.append(current_round + 1)
+        if current_round + 1 in self.fail_rounds:
+            self.fail_rounds.discard(current_round + 1)
+            raise RuntimeError("LLM 后端不可用")
+        return self._record_round(
+            state, current_round, f"bullish {current_round + 1}", f"bearish {current_round + 1}",
+            "Score: 5\nAction: HOLD", started
+        )
+
+
+@pytest.fixture
+def workflow(tmp_path, monkeypatch):
+    monkeypatch.setattr(debate.graph, "Nodes", ScriptedNodes)
+    monkeypatch.setattr(ScriptedNodes, "calls", [])
+    monkeypatch.setattr(ScriptedNodes, "fail_rounds", set())
+    return TradingWorkflow(
+        policy=StoppingPolicy(max_rounds=3),
+        checkpointer=make_checkpointer(str(tmp_path / "checkpoints.db"))
+    )
+
+
+def test_resume_continues_from_last_completed_round(workflow):
+    ScriptedNodes.fail_rounds.add(2)
+    with pytest.raises(RuntimeError):
+        workflow.run(get_sample_inputs(), "req-1")
+
+    saved = workflow.checkpoint("req-1")
+    assert len(saved["debate_rounds"]) == 1
+
+    result = workflow.resume("req-1")
+    assert ScriptedNodes.calls == [1, 2, 2, 3]
+    assert len(result["debate_rounds"]) == 3
+    assert result["trader_scores"] == [5.0, 5.0, 5.0]
+    # 保存结果所需的字段在检查点中保留
+    assert (result["symbol"], result["input_date"]) == ("NVDA", "2025-05-02")
+    # 成功结束后删除检查点
+    assert workflow.checkpoint("req-1") is None
+    assert workflow.resume("req-1") is None
+
+
+def test_resubmitting_same_inputs_resumes(workflow):
+    ScriptedNodes.fail_rounds.add(3)
+    with pytest.raises(RuntimeError):
+        workflow.run(get_sample_inputs(), "req-2")
+
+    result = workflow.run(get_sample_inputs(), "req-2")
+    assert ScriptedNodes.calls == [1, 2, 3, 3]
+    assert len(result["debate_rounds"]) == 3
+
+
+def test_different_inputs_start_over(workflow):
+    ScriptedNodes.fail_rounds.add(2)
+    with pytest.raises(RuntimeError):
+        workflow.run(get_sample_inputs(), "req-3")
+
+    inputs = get_sample_inputs()
+    inputs[1]["data"]["symbol"] = "AMD"
+    result = workflow.run(inputs, "req-3")
+    assert ScriptedNodes.calls == [1, 2, 1, 2, 3]
+    assert result["symbol"] == "AMD"
@@ -0,0 +1,152 @@
+"""合并相同 debate 的 Flight：共享结果，等待方离开不影响运行"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app.core.coalesce import FlightRegistry, flight_key  # noqa: E402
+from debate.policy import StoppingPolicy  # noqa: E402
+from debate.state import get_sample_inputs  # noqa: E402
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_same_key_shares_one_run():
+    async def main():
+        flights = FlightRegistry()
+        release = asyncio.Event()
+        started = []
+
+        async def runner(flight):
+            started.append(flight)
+            await release.wait()
+            return {"decision": "BUY"}
+
+        first, coalesced_first = flights.join_or_start("key", runner)
+        second, coalesced_second = flights.join_or_start("key", runner)
+        assert second is first
+        assert (coalesced_first, coalesced_second) == (False, True)
+
+        release.set()
+        assert await asyncio.gather(first.wait(), second.wait()) == [{"decision": "BUY"}] * 2
+        assert len(started) == 1
+        assert flights.stats()["in_flight"] == 0
+        assert (flights.started, flights.coalesced) == (1, 1)
+
+    run(main())
+
+
+def test_waiters_leaving_does_not_cancel_the_run():
+    async def main():
+        flights = FlightRegistry()
+        release = asyncio.Event()
+
+        async def runner(flight):
+            await release.wait()
+            return {"decision": "SELL"}
+
+        flight, _ = flights.join_or_start("key", runner)
+        waiter = asyncio.ensure_future(flight.wait())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        # 客户端重试时仍加入同一个运行
+        retry, coalesced = flights.join_or_start("key", runner)
+        assert retry is flight and coalesced
+        release.set()
+        assert await retry.wait() == {"decision": "SELL"}
+        assert not flight.task.cancelled()
+
+    run(main())
+
+
+def test_error_reaches_every_waiter_and_subscriber():
+    async def main():
+        flights = FlightRegistry()
+
+        async def runner(flight):
+            flight.publish({"type": "progress", "round": 1})
+            await asyncio.sleep(0)
+            raise RuntimeError("LLM 后端不可用")
+
+        flight = flights.start("key", runner)
+        events = [event async for event in flight.subscribe()]
+        assert [event["type"] for event in events] == ["progress", "error"]
+        with pytest.raises(RuntimeError):
+            await flight.wait()
+        assert flights.join("key") is None
+
+    run(main())
+
+
+def test_late_subscriber_replays_events():
+    async def main():
+        flights = FlightRegistry()
+        step = asyncio.Event()
+
+        async def runner(flight):
+            flight.publish({"type": "token", "delta": "a"})
+            await step.wait()
+            flight.publish({"type": "token", "delta": "b"})
+            return {}
+
+        flight = flights.start("key", runner)
+        await asyncio.sleep(0)
+        late = asyncio.ensure_future(_collect(flight))
+        await asyncio.sleep(0)
+        step.set()
+        assert [event["delta"] for event in await late] == ["a", "b"]
+
+    run(main())
+
+
+async def _collect(flight):
+    return [event async for event in flight.subscribe()]
+
+
+def test_stream_and_plain_runs_use_different_keys():
+    inputs = get_sample_inputs()
+    policy = StoppingPolicy()
+    assert flight_key(inputs, policy) == flight_key(get_sample_inputs(), StoppingPolicy())
+    assert flight_key(inputs, policy) != flight_key(inputs, policy, streaming=True)
+    assert flight_key(inputs, policy) != flight_key(inputs, StoppingPolicy(max_rounds=2))
+
+    async def main():
+        flights = FlightRegistry()
+        release = asyncio.Event()
+
+        async def runner(flight):
+            await release.wait()
+            return {"decision": "HOLD"}
+
+        stream = flights.start(flight_key(inputs, policy, streaming=True), runner)
+        # 非流式请求可以加入流式运行，反之不行
+        plain, coalesced = flights.join_or_start(
+            flight_key(inputs, policy), runner, also=(flight_key(inputs, policy, streaming=True),)
+        )
+        assert plain is stream and coalesced
+        assert flights.join(flight_key(inputs, policy)) is None
+        release.set()
+        await stream.wait()
+
+    run(main())
+
+
+def test_disabled_registry_runs_every_request():
+    async def main():
+        flights = FlightRegistry(enabled=False)
+
+        async def runner(flight):
+            return {}
+
+        first, _ = flights.join_or_start("key", runner)
+        second, coalesced = flights.join_or_start("key", runner)
+        assert second is not first and not coalesced
+        await asyncio.gather(first.wait(), second.wait())
+
+    run(main())
@@ -0,0 +1,129 @@
+"""SQLite 任务队列的租约、重新排队和取消"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from debate.jobqueue import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobCancelledError, JobLostError, JobQueue
+
+
+def add(a, b):
+    return a + b
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    def make(**kwargs):
+        return JobQueue(str(tmp_path / "queue.db"), **kwargs)
+    return make
+
+
+def test_expired_lease_is_requeued_and_claimed_again(make_queue):
+    queue = make_queue(lease=0.05, max_attempts=3)
+    job_id = queue.put(add, (1, 2))
+
+    job = queue.claim("worker-1")
+    assert (job.id, job.attempts) == (job_id, 1)
+    assert queue.claim("worker-2") is None
+
+    # worker-1 退出，不再续约
+    time.sleep(0.1)
+    assert queue.requeue_expired() == 1
+    assert queue.get(job_id)["status"] == QUEUED
+
+    job = queue.claim("worker-2")
+    assert (job.id, job.attempts) == (job_id, 2)
+    fn, args = job.load()
+    assert queue.complete(job.id, "worker-2", fn(*args))
+    assert queue.get(job_id)["status"] == DONE
+    assert queue.get(job_id)["result"] == 3
+
+
+def test_stale_worker_cannot_overwrite_the_new_run(make_queue):
+    queue = make_queue(lease=0.05)
+    job_id = queue.put(add, (1, 2))
+    queue.claim("worker-1")
+    time.sleep(0.1)
+    queue.requeue_expired()
+    queue.claim("worker-2")
+
+    # worker-1 只是执行得慢，租约过期后才结束
+    assert not queue.complete(job_id, "worker-1", 100)
+    assert not queue.fail(job_id, "worker-1", RuntimeError("late"))
+    assert queue.get(job_id)["status"] == RUNNING
+
+    assert queue.complete(job_id, "worker-2", 3)
+    assert not queue.complete(job_id, "worker-2", 4)
+    assert queue.get(job_id)["result"] == 3
+
+
+def test_heartbeat_keeps_the_lease(make_queue):
+    queue = make_queue(lease=0.2)
+    job_id = queue.put(add, (1, 2))
+    queue.claim("worker-1")
+    for _ in range(3):
+        time.sleep(0.1)
+        queue.heartbeat([job_id], "worker-1")
+    assert queue.requeue_expired() == 0
+    assert queue.get(job_id)["status"] == RUNNING
+
+
+def test_job_fails_after_max_attempts(make_queue):
+    queue = make_queue(lease=0.05, max_attempts=2)
+    job_id = queue.put(add, (1, 2))
+    for _ in range(2):
+        assert queue.claim("worker").id == job_id
+        time.sleep(0.1)
+        queue.requeue_expired()
+
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert isinstance(job["error"], JobLostError)
+    assert queue.claim("worker") is None
+    with pytest.raises(JobLostError):
+        asyncio.run(queue.wait(job_id))
+
+
+def test_only_queued_jobs_can_be_cancelled(make_queue):
+    queue = make_queue()
+    running = queue.put(add, (1, 2))
+    queued = queue.put(add, (3, 4))
+    queue.claim("worker")
+    assert not queue.cancel(running)
+    assert queue.cancel(queued)
+    assert queue.get(queued)["status"] == CANCELLED
+    with pytest.raises(JobCancelledError):
+        asyncio.run(queue.wait(queued))
+
+
+def test_run_reports_job_id_and_returns_worker_result(make_queue):
+    queue = make_queue()
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            job = queue.claim("worker")
+            if job is None:
+                time.sleep(0.01)
+                continue
+            fn, args = job.load()
+            queue.complete(job.id, "worker", fn(*args))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    submitted = []
+    try:
+        assert asyncio.run(queue.run(add, 2, 3, on_submit=submitted.append)) == 5
+    finally:
+        stop.set()
+        thread.join()
+    assert queue.get(submitted[0])["status"] == DONE
+
+
+def test_higher_priority_is_claimed_first(make_queue):
+    queue = make_queue()
+    low = queue.put(add, (1, 1), priority=0)
+    urgent = queue.put(add, (1, 1), priority=0, deadline=time.time() + 10)
+    high = queue.put(add, (1, 1), priority=5)
+    assert [queue.claim("worker").id for _ in range(3)] == [high, urgent, low]
@@ -0,0 +1,95 @@
+"""LLMRouter 在后端出错时的故障转移"""
+import asyncio
+
+import pytest
+
+from debate.router import Endpoint, LLMRouter, NoEndpointError
+
+
+class BackendError(Exception):
+    pass
+
+
+def make_router(*urls, **kwargs):
+    return LLMRouter([Endpoint(url) for url in urls], **kwargs)
+
+
+def test_fails_over_to_another_endpoint():
+    router = make_router("http://a/v1", "http://b/v1")
+    tried = []
+
+    def call(endpoint):
+        tried.append(endpoint.base_url)
+        if endpoint.base_url == "http://a/v1":
+            raise BackendError("connection refused")
+        return "ok"
+
+    assert router.call("gpt", call, lambda e: isinstance(e, BackendError)) == "ok"
+    assert tried == ["http://a/v1", "http://b/v1"]
+    a, b = router.endpoints
+    assert (a.failures, a.in_flight, b.calls, b.in_flight) == (1, 0, 1, 0)
+
+    # 出错的后端在暂停期内不再被选中
+    tried.clear()
+    router.call("gpt", call, lambda e: True)
+    assert tried == ["http://b/v1"]
+
+
+def test_does_not_retry_when_error_is_not_retryable():
+    router = make_router("http://a/v1", "http://b/v1")
+    tried = []
+
+    def call(endpoint):
+        tried.append(endpoint.base_url)
+        raise ValueError("bad prompt")
+
+    with pytest.raises(ValueError):
+        router.call("gpt", call, lambda e: False)
+    assert tried == ["http://a/v1"]
+    assert router.endpoints[0].failures == 0
+
+
+def test_raises_after_every_endpoint_failed():
+    router = make_router("http://a/v1", "http://b/v1")
+    tried = []
+
+    def call(endpoint):
+        tried.append(endpoint.base_url)
+        raise BackendError(endpoint.base_url)
+
+    with pytest.raises(BackendError):
+        router.call("gpt", call, lambda e: True)
+    assert sorted(tried) == ["http://a/v1", "http://b/v1"]
+    assert all(endpoint.in_flight == 0 for endpoint in router.endpoints)
+
+
+def test_only_endpoints_serving_the_model_are_used():
+    router = LLMRouter([Endpoint("http://a/v1", ["llama3"]), Endpoint("http://b/v1", ["qwen"])])
+    assert router.call("qwen", lambda endpoint: endpoint.base_url, lambda e: True) == "http://b/v1"
+    with pytest.raises(NoEndpointError):
+        router.call("mistral", lambda endpoint: endpoint.base_url, lambda e: True)
+
+
+def test_async_fails_over_and_cancellation_is_not_a_backend_error():
+    router = make_router("http://a/v1", "http://b/v1")
+
+    async def flaky(endpoint):
+        if endpoint.base_url == "http://a/v1":
+            raise BackendError("503")
+        return endpoint.base_url
+
+    async def hang(endpoint):
+        await asyncio.sleep(10)
+
+    async def main():
+        assert await router.acall("gpt", flaky, lambda e: True) == "http://b/v1"
+        task = asyncio.ensure_future(router.acall("gpt", hang, lambda e: True))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    a, b = router.endpoints
+    assert (a.failures, b.failures) == (1, 0)
+    assert a.in_flight == b.in_flight == 0
@@ -0,0 +1,89 @@
+"""debate.scoring 与原先逐个正则扫描的分数提取（benchmarks/score_parser.py 中的 legacy_extract_score）的一致性"""
+import importlib.util
+import os
+import random
+
+import pytest
+
+from debate.scoring import DEFAULT_SCORE, extract_score, extract_scores, parse_decision
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_benchmark():
+    spec = importlib.util.spec_from_file_location("score_parser", os.path.join(ROOT, "benchmarks", "score_parser.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+score_parser = _load_benchmark()
+legacy_extract_score = score_parser.legacy_extract_score
+
+DECISIONS = [
+    # 按提示词格式输出的完整决策
+    "## ASSESSMENT OF BULLISH ARGUMENTS\nStrong data center demand.\n"
+    "## ASSESSMENT OF BEARISH ARGUMENTS\nValuation is stretched at 35x.\n"
+    "## SCORE AND RECOMMENDATION\nScore: 7\nAction: BUY\nConviction: HIGH\nSizing: HALF",
+    # 各种偏差
+    "Score: 6.5/10\nAction: HOLD",
+    "**Score:** 8\nAction: BUY",
+    "Score: [3]\nAction: SELL",
+    "score: 4",
+    "SCORE: 9 (strongly bullish)",
+    "Score: 4,5\nAction: HOLD",
+    "I rate this 7.5/10 given the guidance raise.",
+    "Final score: 2 out of 10",
+    "## Score and Recommendation\nThe setup merits a 6 overall.",
+    # 超出范围或无效的分数
+    "Score: 12\nOn balance 7/10.",
+    "Score: N/A\nScore: 8",
+    "Score:\nRevenue grew 12% and the stock is 3/10 attractive.",
+    "SCORE AND RECOMMENDATION 42",
+    "Rating: 8",
+    "no score here",
+    "",
+    None,
+    # 小写后长度会变化的字符
+    "İstanbul exposure is limited.\nScore: 5.5",
+    # 多个分数时取优先级最高的
+    "Revenue up 9/10 quarters.\nScore: 4",
+    "Margins 3 out of 10 years positive; overall Score: 6 /10",
+    # 同一行中有多个 "Score:"
+    "Score:7Score:8",
+    "Score:,10Score: 3",
+    # 无效的分数之后紧接着 X/10
+    "Score: 11.7.2/10",
+    "12/10/10 and 9/10",
+]
+
+
+@pytest.mark.parametrize("text", DECISIONS)
+def test_matches_legacy_extractor(text):
+    assert extract_score(text) == legacy_extract_score(text)
+
+
+def test_matches_legacy_extractor_on_generated_decisions():
+    rng = random.Random(0)
+    texts = [score_parser.make_decision(rng) for _ in range(2000)]
+    mismatches = [text for text in texts if extract_score(text) != legacy_extract_score(text)]
+    assert mismatches == []
+
+
+def test_bulk_interface_matches_single():
+    rng = random.Random(1)
+    texts = [score_parser.make_decision(rng) for _ in range(200)] + DECISIONS
+    assert extract_scores(texts) == [extract_score(text) for text in texts]
+
+
+def test_fields_come_from_the_result_section():
+    text = "Action: SELL earlier in the analysis\n## SCORE AND RECOMMENDATION\nScore: 6\n**Action:** buy\n- Sizing: [quarter]"
+    assert parse_decision(text)[1:4] == ("BUY", None, "QUARTER")
+    assert parse_decision("Action: SELL\nScore: 3")[1:4] == ("SELL", None, None)
+
+
+def test_fields():
+    fields = parse_decision(DECISIONS[0])
+    assert fields == (7.0, "BUY", "HIGH", "HALF", True)
+    assert parse_decision("no score here").score_found is False
+    assert parse_decision(None).score == DEFAULT_SCORE